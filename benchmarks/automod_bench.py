@@ -0,0 +1,72 @@
+"""Mesure le coût d'évaluation des règles automod par message selon le nombre de règles
+
+Usage : python benchmarks/automod_bench.py [nombre de messages]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.automod import RuleSet, MessageFacts
+
+RULE_COUNTS = (10, 100, 1000, 5000)
+WORDS = ['salut', 'bonjour', 'merci', 'discord', 'serveur', 'jeu', 'ce', 'soir', 'qui', 'vient', 'lol', 'gg', 'vocal', 'stream']
+
+def make_rules(count, rng):
+    """Règles synthétiques : mots interdits, regex, seuils combinés"""
+    rules = []
+    for index in range(count):
+        kind = index % 4
+        word = f"interdit{index}"
+        if kind == 0:
+            source = f'content contains "{word}" then delete, warn'
+        elif kind == 1:
+            source = f'content ~ /{word}\\d+/ then delete'
+        elif kind == 2:
+            source = f'mentions >= {rng.randint(5, 50)} and account_age < {rng.randint(1, 30)} then mute 600'
+        else:
+            source = f'(content contains "{word}" or links > {rng.randint(3, 20)}) and rate >= {rng.randint(5, 15)} then ban'
+        rules.append((index, f"regle{index}", source))
+    return rules
+
+def make_messages(count, rng):
+    """Messages ordinaires ; 1 % contient un mot interdit"""
+    messages = []
+    for _ in range(count):
+        content = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 25)))
+        if rng.random() < 0.01:
+            content += f" interdit{rng.randint(0, 40)}"
+        messages.append(MessageFacts(
+            content,
+            mentions=rng.choice([0, 0, 0, 1, 2]),
+            links=rng.choice([0, 0, 0, 1]),
+            rate=rng.randint(1, 6),
+            account_age=rng.uniform(0, 2000)
+        ))
+    return messages
+
+def main():
+    message_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(42)
+    messages = make_messages(message_count, rng)
+
+    print(f"{'Règles':>8} {'Compilation':>12} {'µs/message':>11} {'Déclenchées':>12}")
+    for rule_count in RULE_COUNTS:
+        rules = make_rules(rule_count, rng)
+
+        start = time.perf_counter()
+        ruleset = RuleSet(rules)
+        compile_time = time.perf_counter() - start
+
+        matched = 0
+        start = time.perf_counter()
+        for facts in messages:
+            matched += len(ruleset.evaluate(facts))
+        per_message = (time.perf_counter() - start) / message_count * 1e6
+
+        print(f"{rule_count:>8} {compile_time * 1000:>10.1f}ms {per_message:>11.2f} {matched:>12}")
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,5 @@
 import discord
 from discord.ext import commands
-import sqlite3
 import json
 import os
 import asyncio
@@ -10,7 +9,6 @@ from typing import Optional
 class Backup(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db_path = 'server.db'
         self.backup_dir = 'backups'
         
         # Créer le dossier de sauvegarde s'il n'existe pas
@@ -24,11 +22,8 @@ class Backup(commands.Cog):
 
     def init_database(self):
         """Initialise la base de données SQLite pour les backups"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Créer la table des backups
-        cursor.execute('''
+        self.bot.db.setup('''
             CREATE TABLE IF NOT EXISTS backups (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT UNIQUE NOT NULL,
@@ -40,72 +35,42 @@ class Backup(commands.Cog):
                 description TEXT
             )
         ''')
-        
-        conn.commit()
-        conn.close()
 
-    def log_backup(self, name, server_id, server_name, created_by, file_path, description=""):
+    async def log_backup(self, name, server_id, server_name, created_by, file_path, description=""):
         """Enregistre un backup dans la base de données"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        await self.bot.db.execute('''
             INSERT OR REPLACE INTO backups (name, server_id, server_name, created_by, file_path, description)
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (name, server_id, server_name, created_by, file_path, description))
-        
-        conn.commit()
-        conn.close()
 
-    def get_backups(self, server_id=None):
+    async def get_backups(self, server_id=None):
         """Récupère la liste des backups"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         if server_id:
-            cursor.execute('''
+            return await self.bot.db.query('''
                 SELECT name, server_name, created_at, created_by, description 
                 FROM backups 
                 WHERE server_id = ? 
                 ORDER BY created_at DESC
             ''', (server_id,))
-        else:
-            cursor.execute('''
-                SELECT name, server_name, created_at, created_by, description 
-                FROM backups 
-                ORDER BY created_at DESC
-            ''')
         
-        results = cursor.fetchall()
-        conn.close()
-        return results
+        return await self.bot.db.query('''
+            SELECT name, server_name, created_at, created_by, description 
+            FROM backups 
+            ORDER BY created_at DESC
+        ''')
 
-    def get_backup_info(self, name):
+    async def get_backup_info(self, name):
         """Récupère les informations d'un backup spécifique"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        return await self.bot.db.query_one('''
             SELECT server_id, server_name, created_at, created_by, file_path, description 
             FROM backups 
             WHERE name = ?
         ''', (name,))
-        
-        result = cursor.fetchone()
-        conn.close()
-        return result
 
-    def delete_backup(self, name):
+    async def delete_backup(self, name):
         """Supprime un backup de la base de données"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM backups WHERE name = ?', (name,))
-        result = cursor.rowcount > 0
-        
-        conn.commit()
-        conn.close()
-        return result
+        deleted = await self.bot.db.execute('DELETE FROM backups WHERE name = ?', (name,))
+        return deleted > 0
 
     # -- BACKUP FUNCTIONS --
 
@@ -148,6 +113,7 @@ class Backup(commands.Cog):
         for role in guild.roles:
             if role.name != "@everyone":  # Ignorer le rôle @everyone
                 role_data = {
+                    "id": role.id,
                     "name": role.name,
                     "color": role.color.value,
                     "hoist": role.hoist,
@@ -168,6 +134,7 @@ class Backup(commands.Cog):
         # Sauvegarder les catégories
         for category in guild.categories:
             category_data = {
+                "id": category.id,
                 "name": category.name,
                 "position": category.position,
                 "overwrites": self.get_overwrites(category.overwrites)
@@ -177,6 +144,7 @@ class Backup(commands.Cog):
         # Sauvegarder les salons textuels
         for channel in guild.text_channels:
             channel_data = {
+                "id": channel.id,
                 "name": channel.name,
                 "type": "text",
                 "position": channel.position,
@@ -191,6 +159,7 @@ class Backup(commands.Cog):
         # Sauvegarder les salons vocaux
         for channel in guild.voice_channels:
             channel_data = {
+                "id": channel.id,
                 "name": channel.name,
                 "type": "voice",
                 "position": channel.position,
@@ -205,6 +174,7 @@ class Backup(commands.Cog):
         for channel in guild.channels:
             if channel.type == discord.ChannelType.news:
                 channel_data = {
+                    "id": channel.id,
                     "name": channel.name,
                     "type": "news",
                     "position": channel.position,
@@ -219,6 +189,7 @@ class Backup(commands.Cog):
         for channel in guild.channels:
             if channel.type == discord.ChannelType.forum:
                 channel_data = {
+                    "id": channel.id,
                     "name": channel.name,
                     "type": "forum",
                     "position": channel.position,
@@ -488,7 +459,7 @@ class Backup(commands.Cog):
     async def create_backup(self, ctx, name, description=""):
         """Crée une sauvegarde du serveur"""
         # Vérifier si le nom existe déjà
-        existing_backup = self.get_backup_info(name)
+        existing_backup = await self.get_backup_info(name)
         if existing_backup:
             embed = discord.Embed(
                 title="⚠️ Sauvegarde existante",
@@ -522,7 +493,7 @@ class Backup(commands.Cog):
             file_path = await self.save_backup_file(backup_data, name)
             
             # Enregistrer dans la base de données
-            self.log_backup(name, ctx.guild.id, ctx.guild.name, ctx.author.id, file_path, description)
+            await self.log_backup(name, ctx.guild.id, ctx.guild.name, ctx.author.id, file_path, description)
             
             # Créer l'embed de succès
             success_embed = discord.Embed(
@@ -552,7 +523,7 @@ class Backup(commands.Cog):
     async def load_backup(self, ctx, name):
         """Charge une sauvegarde"""
         # Vérifier si la sauvegarde existe
-        backup_info = self.get_backup_info(name)
+        backup_info = await self.get_backup_info(name)
         if not backup_info:
             embed = discord.Embed(
                 title="❌ Sauvegarde introuvable",
@@ -664,7 +635,7 @@ class Backup(commands.Cog):
 
     async def list_backups(self, ctx):
         """Liste les sauvegardes disponibles"""
-        backups = self.get_backups(ctx.guild.id)
+        backups = await self.get_backups(ctx.guild.id)
         
         if not backups:
             embed = discord.Embed(
@@ -701,7 +672,7 @@ class Backup(commands.Cog):
 
     async def backup_info(self, ctx, name):
         """Affiche les informations d'une sauvegarde"""
-        backup_info = self.get_backup_info(name)
+        backup_info = await self.get_backup_info(name)
         
         if not backup_info:
             embed = discord.Embed(
@@ -746,7 +717,7 @@ class Backup(commands.Cog):
 
     async def delete_backup_cmd(self, ctx, name):
         """Supprime une sauvegarde"""
-        backup_info = self.get_backup_info(name)
+        backup_info = await self.get_backup_info(name)
         
         if not backup_info:
             embed = discord.Embed(
@@ -805,7 +776,7 @@ class Backup(commands.Cog):
                 os.remove(file_path)
             
             # Supprimer de la base de données
-            self.delete_backup(name)
+            await self.delete_backup(name)
             
             success_embed = discord.Embed(
                 title="✅ Sauvegarde supprimée",
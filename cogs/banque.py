@@ -1,102 +1,184 @@
 import discord
 from discord.ext import commands
-import sqlite3
-import json
-from datetime import datetime
+import asyncio
 import os
+import re
+from datetime import datetime, timedelta
+from typing import Optional
+from core.ledger import TransactionLedger
+from core.econstats import EconomyStats
+from core.casino import PayoutSpec, DEFAULT_PAYOUTS
+
+RELATIVE_DURATION = re.compile(r'^(\d+)([jdhm])$')
+DATE_LIKE = re.compile(r'^[\d/.-]+$|^\d+[a-z]+$')  # Filtre de +logs qui ressemble à une date ou une durée
+LEDGER_ACTIONS = ('give', 'pay', 'pay_out', 'pay_in', 'casino_win', 'casino_loss')  # Actions du journal
 
 class Banque(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db_path = 'server.db'
-        self.logs_file = 'banque_logs.json'
+        self.logs_file = 'banque_logs.json'  # Ancien journal JSON, importé une fois dans `transactions`
         self.casino_cooldown = {}  # {user_id: last_use_time}
         self.casino_cooldown_duration = 300  # 5 minutes en secondes
+        self.casino_spec_file = 'casino.json'  # Table des gains du casino {"payouts": [...]} (DEFAULT_PAYOUTS si absent ou invalide)
+        self.casino_sim_max_rounds = 20000000  # Parties max (joueurs x parties) pour +casinosim
+        self.starting_balance = 1000  # Solde d'un nouveau compte
+        self.ledger_batch = True  # Regrouper les écritures du journal sans mouvement d'argent (un commit par lot)
+        self.ledger_flush_interval = 2  # Délai max (secondes) avant l'écriture d'un lot
+        self.max_logs = 25  # Entrées max affichées par +logs
+        self.ledger_archive_after = 90  # Âge (jours) à partir duquel les transactions sont archivées
+        self.ledger_archive_dir = 'ledger_archives'  # Dossier des segments compressés
         
         # Initialiser la base de données
         self.init_database()
         
-        # Créer le fichier de logs s'il n'existe pas
-        if not os.path.exists(self.logs_file):
-            with open(self.logs_file, 'w', encoding='utf-8') as f:
-                json.dump([], f, ensure_ascii=False, indent=2)
+        # Statistiques de l'économie (reconstruites depuis la table, puis tenues à jour)
+        self.economy = EconomyStats()
+        rows = self.bot.db.submit(lambda conn: conn.execute('SELECT balance FROM banque').fetchall()).result()
+        self.economy.build(row[0] for row in rows)
+        
+        # Table des gains du casino, partagée avec le simulateur
+        self.casino_spec = self.load_casino_spec()
+        
+        # Journal des transactions (ajout seul)
+        self.ledger = TransactionLedger(
+            self.bot.db,
+            self.ledger_batch,
+            self.ledger_flush_interval,
+            archive_dir=self.ledger_archive_dir
+        )
+        migrated = self.ledger.migrate_json(self.logs_file)
+        if migrated:
+            print(f"{migrated} transactions importées depuis {self.logs_file}")
+        
+        # Archivage quotidien des anciennes transactions
+        self.tasks = [self.bot.loop.create_task(self.ledger_rotation_task())]
+
+    def cog_unload(self):
+        """Arrête les tâches et écrit les transactions en attente"""
+        for task in self.tasks:
+            task.cancel()
+        self.ledger.flush_nowait()
+
+    def load_casino_spec(self):
+        """Table des gains du fichier de configuration, ou DEFAULT_PAYOUTS s'il est absent ou invalide"""
+        if os.path.exists(self.casino_spec_file):
+            try:
+                return PayoutSpec.load(self.casino_spec_file)
+            except (OSError, ValueError) as e:
+                print(f"Erreur lors du chargement de {self.casino_spec_file}, table par défaut utilisée: {e}")
+        return PayoutSpec(DEFAULT_PAYOUTS)
 
     # -- DATABASE --
 
     def init_database(self):
         """Initialise la base de données SQLite"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Créer la table des comptes bancaires
-        cursor.execute('''
+        self.bot.db.setup('''
             CREATE TABLE IF NOT EXISTS banque (
                 user_id INTEGER PRIMARY KEY,
                 balance INTEGER DEFAULT 1000,
                 last_casino TIMESTAMP
             )
         ''')
-        
-        conn.commit()
-        conn.close()
 
     def log_transaction(self, action, user_id, target_id=None, amount=None, success=True):
-        """Enregistre une transaction dans le fichier de logs"""
-        try:
-            with open(self.logs_file, 'r', encoding='utf-8') as f:
-                logs = json.load(f)
-        except:
-            logs = []
-        
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "action": action,
-            "user_id": user_id,
-            "target_id": target_id,
-            "amount": amount,
-            "success": success
-        }
-        
-        logs.append(log_entry)
-        
-        with open(self.logs_file, 'w', encoding='utf-8') as f:
-            json.dump(logs, f, ensure_ascii=False, indent=2)
-
-    def get_balance(self, user_id):
+        """Enregistre une transaction sans mouvement d'argent (tentative refusée) dans le journal"""
+        self.ledger.record(action, user_id, target_id, amount, success)
+
+    async def get_balance(self, user_id):
         """Récupère le solde d'un utilisateur"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT balance FROM banque WHERE user_id = ?', (user_id,))
-        result = cursor.fetchone()
-        
-        if result is None:
-            # Créer un nouveau compte avec 1000 coins
-            cursor.execute('INSERT INTO banque (user_id, balance) VALUES (?, ?)', (user_id, 1000))
-            conn.commit()
-            balance = 1000
-        else:
-            balance = result[0]
-        
-        conn.close()
+        balance, created = await self.bot.db.run(self._get_balance, user_id)
+        if created:
+            self.economy.add_account(balance)
         return balance
 
-    def update_balance(self, user_id, amount):
-        """Met à jour le solde d'un utilisateur"""
-        conn = sqlite3.connect(self.db_path)
+    def _get_balance(self, conn, user_id):
+        """Lit le solde, en créant le compte si besoin (thread de la base)"""
         cursor = conn.cursor()
         
         cursor.execute('SELECT balance FROM banque WHERE user_id = ?', (user_id,))
         result = cursor.fetchone()
         
         if result is None:
-            cursor.execute('INSERT INTO banque (user_id, balance) VALUES (?, ?)', (user_id, 1000 + amount))
-        else:
-            new_balance = result[0] + amount
-            cursor.execute('UPDATE banque SET balance = ? WHERE user_id = ?', (new_balance, user_id))
+            # Créer un nouveau compte avec le solde de départ
+            cursor.execute('INSERT INTO banque (user_id, balance) VALUES (?, ?)', (user_id, self.starting_balance))
+            return self.starting_balance, True
         
-        conn.commit()
-        conn.close()
+        return result[0], False
+
+    async def update_balance(self, user_id, amount, entry=None):
+        """Met à jour le solde d'un utilisateur et retourne le nouveau solde
+
+        entry (TransactionLedger.entry) est écrite dans le journal au sein de
+        la même transaction que le solde.
+        """
+        balance, created = await self.bot.db.run(self._update_balance, user_id, amount, entry)
+        if created:
+            self.economy.add_account(balance)
+        else:
+            self.economy.update(balance - amount, balance)
+        return balance
+
+    def _update_balance(self, conn, user_id, amount, entry=None):
+        """Applique une variation de solde et son écriture du journal dans une seule transaction (thread de la base)
+
+        Retourne (nouveau solde, compte créé).
+        """
+        created = conn.execute(
+            'INSERT OR IGNORE INTO banque (user_id, balance) VALUES (?, ?)',
+            (user_id, self.starting_balance)
+        ).rowcount > 0
+        balance = conn.execute(
+            'UPDATE banque SET balance = balance + ? WHERE user_id = ? RETURNING balance',
+            (amount, user_id)
+        ).fetchone()[0]
+        if entry is not None:
+            TransactionLedger.write(conn, [entry])
+        return balance, created
+
+    async def transfer(self, payer_id, payee_id, amount):
+        """Transfère de l'argent entre deux comptes
+
+        Retourne (solde du payeur, solde du bénéficiaire), ou None si le solde
+        du payeur est insuffisant.
+        """
+        balances, created = await self.bot.db.run(self._transfer, payer_id, payee_id, amount)
+        for _ in range(created):
+            self.economy.add_account(self.starting_balance)
+        if balances is not None:
+            self.economy.update(balances[0] + amount, balances[0])
+            self.economy.update(balances[1] - amount, balances[1])
+        return balances
+
+    def _transfer(self, conn, payer_id, payee_id, amount):
+        """Débit, crédit et écritures du journal dans une seule transaction (thread de la base)
+
+        Retourne ((solde du payeur, solde du bénéficiaire) ou None, nombre de comptes créés).
+        """
+        created = 0
+        for user_id in (payer_id, payee_id):
+            created += conn.execute(
+                'INSERT OR IGNORE INTO banque (user_id, balance) VALUES (?, ?)',
+                (user_id, self.starting_balance)
+            ).rowcount
+        
+        # Débit conditionnel : aucune ligne modifiée si le solde est insuffisant
+        debited = conn.execute('''
+            UPDATE banque SET balance = balance - ? WHERE user_id = ? AND balance >= ? RETURNING balance
+        ''', (amount, payer_id, amount)).fetchone()
+        if debited is None:
+            return None, created
+        
+        credited = conn.execute('''
+            UPDATE banque SET balance = balance + ? WHERE user_id = ? RETURNING balance
+        ''', (amount, payee_id)).fetchone()
+        
+        # Écritures en partie double : débit du payeur, crédit du bénéficiaire
+        TransactionLedger.write(conn, [
+            TransactionLedger.entry("pay_out", payer_id, payee_id, -amount),
+            TransactionLedger.entry("pay_in", payee_id, payer_id, amount)
+        ])
+        return (debited[0], credited[0]), created
 
     # -- COMMANDS --
 
@@ -106,7 +188,7 @@ class Banque(commands.Cog):
         if member is None:
             member = ctx.author
         
-        balance = self.get_balance(member.id)
+        balance = await self.get_balance(member.id)
         
         embed = discord.Embed(
             title="🏦 Banque Rubix",
@@ -132,12 +214,9 @@ class Banque(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        old_balance = self.get_balance(member.id)
-        self.update_balance(member.id, amount)
-        new_balance = self.get_balance(member.id)
-        
-        # Log de la transaction
-        self.log_transaction("give", ctx.author.id, member.id, amount, True)
+        # Crédit et écriture du journal dans la même transaction
+        new_balance = await self.update_balance(member.id, amount, TransactionLedger.entry("give", ctx.author.id, member.id, amount))
+        old_balance = new_balance - amount
         
         embed = discord.Embed(
             title="💰 Don effectué",
@@ -160,15 +239,57 @@ class Banque(commands.Cog):
             )
             await ctx.send(embed=embed)
 
+    @commands.command(name='pay', aliases=['payer'], brief="Envoie de l'argent à un membre", usage="+pay <@membre> <montant>")
+    async def pay(self, ctx, member: discord.Member, amount: int):
+        """Envoie de l'argent de son compte à celui d'un membre"""
+        if amount <= 0 or member.id == ctx.author.id or member.bot:
+            embed = discord.Embed(
+                title="❌ Erreur",
+                description="Le montant doit être positif et le destinataire un autre membre !",
+                color=0xff0000
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        balances = await self.transfer(ctx.author.id, member.id, amount)
+        
+        if balances is None:
+            self.log_transaction("pay", ctx.author.id, member.id, amount, False)
+            balance = await self.get_balance(ctx.author.id)
+            embed = discord.Embed(
+                title="❌ Solde insuffisant",
+                description=f"Vous n'avez que **{balance:,}** coins.",
+                color=0xff0000
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        payer_balance, payee_balance = balances
+        embed = discord.Embed(
+            title="💸 Paiement effectué",
+            description=f"**{ctx.author.mention}** a envoyé **{amount:,}** coins à **{member.mention}**",
+            color=0x00ff00
+        )
+        embed.add_field(name="Votre solde", value=f"{payer_balance:,} coins", inline=True)
+        embed.add_field(name=f"Solde de {member.display_name}", value=f"{payee_balance:,} coins", inline=True)
+        embed.set_footer(text=f"Transaction effectuée par {ctx.author.name}")
+        
+        await ctx.send(embed=embed)
+
+    @pay.error
+    async def pay_error(self, ctx, error):
+        if isinstance(error, (commands.MissingRequiredArgument, commands.BadArgument)):
+            embed = discord.Embed(
+                title="❌ Argument invalide",
+                description="Usage: `+pay <@membre> <montant>`",
+                color=0xff0000
+            )
+            await ctx.send(embed=embed)
+
     @commands.command(name='classement', aliases=['tableau'], brief="Affiche le classement des plus riches", usage="+classement")
     async def top(self, ctx):
         """Affiche le classement des plus riches"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT user_id, balance FROM banque ORDER BY balance DESC LIMIT 10')
-        results = cursor.fetchall()
-        conn.close()
+        results = await self.bot.db.query('SELECT user_id, balance FROM banque ORDER BY balance DESC LIMIT 10')
         
         if not results:
             embed = discord.Embed(
@@ -204,6 +325,47 @@ class Banque(commands.Cog):
         embed.set_footer(text=f"Demandé par {ctx.author.name}")
         await ctx.send(embed=embed)
 
+    @commands.command(name='econstats', aliases=['eco'], brief="Affiche les statistiques de l'économie", usage="+econstats")
+    async def econstats(self, ctx):
+        """Affiche l'état de l'économie : masse monétaire, médiane, Gini, part du top 1 %"""
+        stats = self.economy.snapshot()
+        
+        if not stats['accounts']:
+            embed = discord.Embed(
+                title="📊 Économie",
+                description="Aucun compte bancaire pour le moment.",
+                color=0x808080
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        def coins(value):
+            return f"{value:,.0f}" if value is not None else "-"
+        
+        embed = discord.Embed(
+            title="📊 Économie",
+            description=f"**{stats['accounts']:,}** comptes",
+            color=0xffd700
+        )
+        embed.add_field(
+            name="💰 Masse monétaire",
+            value=f"**Total:** {coins(stats['total'])} coins\n**Moyenne:** {coins(stats['mean'])} coins",
+            inline=True
+        )
+        embed.add_field(
+            name="📈 Répartition des soldes",
+            value=f"**10 %:** {coins(stats['p10'])}\n**Médiane:** {coins(stats['median'])}\n**90 %:** {coins(stats['p90'])}\n**99 %:** {coins(stats['p99'])}",
+            inline=True
+        )
+        embed.add_field(
+            name="⚖️ Inégalités",
+            value=f"**Gini:** {stats['gini']:.3f}\n**Top 1 %:** {stats['top_share']:.1%} de la masse" if stats['gini'] is not None else "Masse monétaire nulle ou négative",
+            inline=True
+        )
+        embed.set_footer(text=f"Quantiles à ±{self.economy.sketch.relative_accuracy:.0%} près · Demandé par {ctx.author.name}")
+        
+        await ctx.send(embed=embed)
+
     @commands.command(name='casino', aliases=['cas'], brief="Joue au casino pour gagner de l'argent (cooldown 5 minutes)", usage="+casino")
     async def casino(self, ctx):
         """Joue au casino pour gagner de l'argent (cooldown 5 minutes)"""
@@ -229,83 +391,177 @@ class Banque(commands.Cog):
         # Mettre à jour le cooldown
         self.casino_cooldown[user_id] = current_time
         
-        # Logique du casino
-        import random
-        chance = random.random()
-        
-        if chance < 0.4:  # 40% de chance de gagner
-            win_amount = random.randint(50, 200)
-            self.update_balance(user_id, win_amount)
-            result = "gagné"
-            color = 0x00ff00
-            emoji = "🎉"
-        elif chance < 0.7:  # 30% de chance de perdre peu
-            lose_amount = random.randint(10, 50)
-            self.update_balance(user_id, -lose_amount)
-            result = "perdu"
-            color = 0xffa500
-            emoji = "😐"
-        else:  # 30% de chance de perdre beaucoup
-            lose_amount = random.randint(50, 150)
-            self.update_balance(user_id, -lose_amount)
-            result = "perdu"
-            color = 0xff0000
-            emoji = "💸"
-        
-        new_balance = self.get_balance(user_id)
-        
-        # Log de la transaction
-        if result == "gagné":
-            self.log_transaction("casino_win", user_id, None, win_amount, True)
+        # Logique du casino (table des gains)
+        payout, amount = self.casino_spec.draw()
+        result = "gagné" if amount > 0 else "perdu"
+        
+        # Gain ou perte et écriture du journal dans la même transaction
+        if amount > 0:
+            entry = TransactionLedger.entry("casino_win", user_id, None, amount)
         else:
-            self.log_transaction("casino_loss", user_id, None, lose_amount, True)
+            entry = TransactionLedger.entry("casino_loss", user_id, None, -amount)
+        new_balance = await self.update_balance(user_id, amount, entry)
         
         embed = discord.Embed(
-            title=f"{emoji} Casino Rubix",
+            title=f"{payout['emoji']} Casino Rubix",
             description=f"**{ctx.author.mention}** a **{result}** !",
-            color=color
+            color=payout['color']
         )
         
-        if result == "gagné":
-            embed.add_field(name="💰 Gains", value=f"+{win_amount:,} coins", inline=True)
+        if amount > 0:
+            embed.add_field(name="💰 Gains", value=f"+{amount:,} coins", inline=True)
         else:
-            embed.add_field(name="💸 Pertes", value=f"-{lose_amount:,} coins", inline=True)
+            embed.add_field(name="💸 Pertes", value=f"-{-amount:,} coins", inline=True)
         
         embed.add_field(name="🏦 Nouveau solde", value=f"{new_balance:,} coins", inline=True)
         embed.set_footer(text=f"Prochain jeu disponible dans 5 minutes")
         
         await ctx.send(embed=embed)
 
-    @commands.command(name='logs', aliases=['lg'], brief="Affiche les derniers logs de transactions (Admin uniquement)", usage="+logs <limite>")
+    @commands.command(name='casinosim', aliases=['csim'], brief="Simule le casino sur de nombreuses parties (Admin uniquement)", usage="+casinosim [joueurs] [parties]")
     @commands.has_permissions(administrator=True)
-    async def logs(self, ctx, limit: int = 10):
-        """Affiche les derniers logs de transactions (Admin uniquement)"""
-        try:
-            with open(self.logs_file, 'r', encoding='utf-8') as f:
-                logs = json.load(f)
-        except:
-            logs = []
-        
-        if not logs:
+    async def casinosim(self, ctx, users: int = 1000, rounds: int = 8640):
+        """Simule la table des gains du casino : espérance, variance et soldes après `rounds` parties (Admin uniquement)"""
+        if users <= 0 or rounds <= 0 or users * rounds > self.casino_sim_max_rounds:
+            embed = discord.Embed(
+                title="❌ Erreur",
+                description=f"Joueurs et parties doivent être positifs, pour {self.casino_sim_max_rounds:,} parties au total au maximum.",
+                color=0xff0000
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        # Simulation vectorisée hors de la boucle d'événements
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        result = await loop.run_in_executor(None, self.casino_spec.simulate, users, rounds, self.starting_balance)
+        elapsed = loop.time() - start
+        
+        embed = discord.Embed(
+            title="🎰 Simulation du casino",
+            description=f"**{users:,}** joueurs × **{rounds:,}** parties ({users * rounds:,} parties en {elapsed:.2f}s)",
+            color=0xffd700
+        )
+        
+        odds = "\n".join(
+            f"{payout['emoji']} {payout['probability']:.0%} : {payout['min']:+,} à {payout['max']:+,}"
+            for payout in self.casino_spec.payouts
+        )
+        embed.add_field(name="📜 Table des gains", value=odds, inline=False)
+        embed.add_field(
+            name="📐 Par partie",
+            value=f"**Espérance:** {self.casino_spec.expected_value():+.2f} (observée {result['mean']:+.2f})\n**Variance:** {self.casino_spec.variance():,.0f} (observée {result['variance']:,.0f})\n**Avantage maison:** {-self.casino_spec.expected_value():+.2f} coins",
+            inline=True
+        )
+        percentiles = result['percentiles']
+        embed.add_field(
+            name="🏦 Soldes finaux",
+            value=f"**Moyenne:** {result['balance_mean']:,.0f} ± {result['balance_std']:,.0f}\n**p10 / p50 / p90:** {percentiles[10]:,.0f} / {percentiles[50]:,.0f} / {percentiles[90]:,.0f}\n**Sous le départ:** {result['below_start']:.1%}\n**Passés en négatif:** {result['ever_negative']:.1%}",
+            inline=True
+        )
+        embed.set_footer(text=f"Départ : {self.starting_balance:,} coins · Demandé par {ctx.author.name}")
+        
+        await ctx.send(embed=embed)
+
+    @casinosim.error
+    async def casinosim_error(self, ctx, error):
+        if isinstance(error, commands.MissingPermissions):
+            embed = discord.Embed(
+                title="❌ Permission refusée",
+                description="Vous devez être administrateur pour utiliser cette commande !",
+                color=0xff0000
+            )
+            await ctx.send(embed=embed)
+
+    def parse_date(self, text, end=False):
+        """Date d'un filtre de +logs (JJ/MM/AAAA, JJ/MM, AAAA-MM-JJ ou durée relative 7j, 12h, 30m), ou None"""
+        now = datetime.now()
+        relative = RELATIVE_DURATION.match(text.lower())
+        if relative:
+            value, unit = int(relative.group(1)), relative.group(2)
+            return now - (timedelta(minutes=value) if unit == 'm' else timedelta(hours=value) if unit == 'h' else timedelta(days=value))
+        
+        for date_format in ('%d/%m/%Y', '%Y-%m-%d', '%d/%m'):
+            try:
+                date = datetime.strptime(text, date_format)
+            except ValueError:
+                continue
+            if date_format == '%d/%m':
+                date = date.replace(year=now.year)
+            # Une date seule couvre toute la journée
+            return date + timedelta(days=1, microseconds=-1) if end else date
+        return None
+
+    @commands.command(name='logs', aliases=['lg'], brief="Affiche les logs de transactions (Admin uniquement)", usage="+logs [@membre] [depuis] [jusqu'à] [action] [limite]")
+    @commands.has_permissions(administrator=True)
+    async def logs(self, ctx, member: Optional[discord.Member] = None, *filters: str):
+        """Affiche les logs de transactions, filtrés par membre, période et action (Admin uniquement)"""
+        since = until = action = error = None
+        limit = 10
+        for value in filters:
+            if value.isdigit():
+                limit = int(value)
+                continue
+            date = self.parse_date(value, end=since is not None)
+            if date is None and DATE_LIKE.match(value.lower()):
+                error = f"Date invalide : `{value}`\nFormats acceptés : JJ/MM/AAAA, JJ/MM, AAAA-MM-JJ ou durée (7j, 12h, 30m)"
+            elif date is not None and since is None:
+                since = date
+            elif date is not None and until is None:
+                until = date
+            elif date is not None:
+                error = f"Trop de dates : `{value}` (une date de début et une date de fin au maximum)"
+            elif value.lower() in LEDGER_ACTIONS:
+                action = value.lower()
+            else:
+                error = f"Action inconnue : `{value}`\nActions : {', '.join(f'`{name}`' for name in LEDGER_ACTIONS)}"
+            
+            if error:
+                embed = discord.Embed(title="❌ Erreur", description=error, color=0xff0000)
+                await ctx.send(embed=embed)
+                return
+        
+        # Lecture par index (membre, action, période) ; archives ouvertes seulement si besoin
+        limit = max(1, min(limit, self.max_logs))
+        columns = TransactionLedger.COLUMNS
+        recent_logs = [
+            dict(zip(columns, row))
+            for row in await self.ledger.search(
+                user_id=member.id if member else None,
+                since=since.isoformat() if since else None,
+                until=until.isoformat() if until else None,
+                action=action,
+                limit=limit
+            )
+        ]
+        
+        criteria = []
+        if member:
+            criteria.append(member.mention)
+        if since:
+            criteria.append(f"depuis le {since.strftime('%d/%m/%Y %H:%M')}")
+        if until:
+            criteria.append(f"jusqu'au {until.strftime('%d/%m/%Y %H:%M')}")
+        if action:
+            criteria.append(f"action `{action}`")
+        
+        if not recent_logs:
             embed = discord.Embed(
                 title="📋 Logs de transactions",
-                description="Aucun log trouvé.",
+                description="Aucun log trouvé." + (f"\n**Filtres:** {', '.join(criteria)}" if criteria else ""),
                 color=0x808080
             )
             await ctx.send(embed=embed)
             return
         
-        # Prendre les derniers logs
-        recent_logs = logs[-limit:] if limit > 0 else logs
-        
         embed = discord.Embed(
             title="📋 Logs de transactions",
-            description=f"Dernières {len(recent_logs)} transactions",
+            description=f"Dernières {len(recent_logs)} transactions" + (f"\n**Filtres:** {', '.join(criteria)}" if criteria else ""),
             color=0x808080
         )
         
         for log in recent_logs:
-            timestamp = datetime.fromisoformat(log['timestamp']).strftime("%d/%m %H:%M")
+            timestamp = datetime.fromisoformat(log['timestamp']).strftime("%d/%m/%y %H:%M")
             action = log['action']
             user_id = log['user_id']
             amount = log.get('amount', 0)
@@ -324,6 +580,14 @@ class Banque(commands.Cog):
                 except:
                     target_name = f"User {target_id}"
                 description = f"**{username}** → **{target_name}** (+{amount:,})"
+            elif action in ("pay_out", "pay_in"):
+                target_id = log.get('target_id')
+                try:
+                    target = await self.bot.fetch_user(target_id)
+                    target_name = target.name
+                except:
+                    target_name = f"User {target_id}"
+                description = f"**{username}** 💸 {'→' if action == 'pay_out' else '←'} **{target_name}** ({amount:+,})"
             elif action == "casino_win":
                 description = f"**{username}** 🎰 (+{amount:,})"
             elif action == "casino_loss":
@@ -362,6 +626,30 @@ class Banque(commands.Cog):
             )
             await ctx.send(embed=embed)
 
+    # -- TASKS --
+
+    async def ledger_rotation_task(self):
+        """Archive chaque jour les transactions de plus de `ledger_archive_after` jours et resynchronise les statistiques si besoin"""
+        await self.bot.wait_until_ready()
+        
+        while not self.bot.is_closed():
+            try:
+                cutoff = datetime.now() - timedelta(days=self.ledger_archive_after)
+                archived = await self.ledger.rotate(cutoff.isoformat())
+                if archived:
+                    print(f"{archived} transactions archivées dans {self.ledger_archive_dir}")
+                
+                # Statistiques désynchronisées de la table : les reconstruire
+                if self.economy.drift:
+                    rows = await self.bot.db.query('SELECT balance FROM banque')
+                    self.economy.build(row[0] for row in rows)
+                
+                await asyncio.sleep(86400)
+                
+            except Exception as e:
+                print(f"Erreur dans ledger_rotation_task: {e}")
+                await asyncio.sleep(3600)
+
 def setup(bot):
     bot.add_cog(Banque(bot))
 
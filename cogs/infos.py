@@ -40,5 +40,25 @@ class Infos(commands.Cog):
         embed.set_footer(text=f"Demandé par {ctx.author.name}")
         await ctx.send(embed=embed)
 
+    @commands.command(name='pipeline', aliases=['pl'], brief='Affiche le temps passé dans chaque étape du traitement des messages', usage='+pipeline')
+    @commands.has_permissions(administrator=True)
+    async def pipeline(self, ctx):
+        """Temps moyen et maximal de chaque étape du traitement des messages (Admin uniquement)"""
+        embed = discord.Embed(
+            title="⚙️ Traitement des messages",
+            description="Étapes exécutées dans l'ordre, pour chaque message hors commandes et bots",
+            color=discord.Color.blue()
+        )
+        for name, priority, stats in self.bot.pipeline.report():
+            embed.add_field(
+                name=f"{priority} · {name}",
+                value=f"**Messages:** {stats.calls}\n**Moyenne:** {stats.mean * 1000:.2f} ms\n**Max:** {stats.slowest * 1000:.1f} ms\n**Arrêts:** {stats.stops}\n**Erreurs:** {stats.errors}",
+                inline=True
+            )
+        if not embed.fields:
+            embed.description = "Aucune étape enregistrée."
+        embed.set_footer(text=f"Demandé par {ctx.author.name}")
+        await ctx.send(embed=embed)
+
 def setup(bot):
     bot.add_cog(Infos(bot))
\ No newline at end of file
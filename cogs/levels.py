@@ -1,16 +1,16 @@
 import discord
 from discord.ext import commands
-import sqlite3
 import asyncio
-from datetime import datetime
+from datetime import datetime, timedelta
+from core.xp import XPAggregator
+from core.ranking import Leaderboard
 
 class Levels(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db_path = 'server.db'
-        self.voice_tracking = {}  # {user_id: {'joined_at': timestamp, 'last_check': timestamp}}
-        self.last_messages = {}  # {user_id: last_message_content}
-        self.xp_cooldown = {}  # {user_id: last_xp_gain_time}
+        self.voice_tracking = {}  # {user_id: {'guild_id': int, 'joined_at': timestamp, 'last_check': timestamp, 'active': bool}}
+        self.last_messages = {}  # {user_id: last_message_content (normalisé)}
+        self.xp_cooldown = {}  # {user_id: last_xp_gain_time (horloge monotone)}
         self.voice_cooldown = {}  # {user_id: last_voice_xp_time}
         
         # Configuration
@@ -19,23 +19,48 @@ class Levels(commands.Cog):
         self.voice_xp_per_minute = 10  # XP gagné par minute en vocal
         self.min_message_length = 20  # Longueur minimale pour gagner de l'XP
         self.message_cooldown = 60  # Cooldown entre gains d'XP (secondes)
-        self.voice_check_interval = 60  # Intervalle de vérification vocal (secondes)
+        self.voice_check_interval = 60  # Intervalle du balayage vocal (secondes)
+        self.xp_flush_interval = 30  # Intervalle d'écriture de l'XP en base (secondes)
+        self.xp_flush_max_pending = 100  # Écriture anticipée au-delà de ce nombre d'utilisateurs
+        self.top_page_size = 10  # Membres par page du classement
         
         # Initialiser la base de données
         self.init_database()
         
-        # Démarrer le tracking vocal
-        self.bot.loop.create_task(self.voice_xp_tracker())
+        # Index du classement, construit une fois depuis la table levels
+        self.leaderboard = Leaderboard()
+        self.load_leaderboard()
+        
+        # Accumulateur d'XP (écriture différée par lots)
+        self.xp_aggregator = XPAggregator(
+            self.bot.db,
+            self.calculate_level,
+            self.xp_flush_interval,
+            self.xp_flush_max_pending
+        )
+        
+        # Étape du traitement partagé des messages, après la sécurité
+        self.bot.pipeline.register('levels', self.process_message, priority=100)
+        
+        # Démarrer le tracking vocal et l'écriture périodique de l'XP
+        self.tasks = [
+            self.bot.loop.create_task(self.voice_xp_tracker()),
+            self.bot.loop.create_task(self.xp_flush_task())
+        ]
+
+    def cog_unload(self):
+        """Arrête les tâches et écrit l'XP en attente"""
+        self.bot.pipeline.unregister('levels')
+        for task in self.tasks:
+            task.cancel()
+        self.xp_aggregator.flush_nowait()
 
     # -- DATABASE --
 
     def init_database(self):
         """Initialise la base de données SQLite pour les niveaux"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Créer la table des niveaux
-        cursor.execute('''
+        self.bot.db.setup('''
             CREATE TABLE IF NOT EXISTS levels (
                 user_id INTEGER PRIMARY KEY,
                 xp INTEGER DEFAULT 0,
@@ -46,81 +71,21 @@ class Levels(commands.Cog):
                 last_voice_xp_time TIMESTAMP
             )
         ''')
-        
-        conn.commit()
-        conn.close()
 
-    def get_user_data(self, user_id):
-        """Récupère les données d'un utilisateur"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT xp, level, total_messages, total_voice_time 
-            FROM levels 
-            WHERE user_id = ?
-        ''', (user_id,))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result is None:
-            # Créer un nouveau profil
-            self.create_user_profile(user_id)
-            return (0, 1, 0, 0)
-        
-        return result
+    def load_leaderboard(self):
+        """Charge le classement depuis la base (bloquant, au chargement du cog)"""
+        rows = self.bot.db.submit(lambda conn: conn.execute('SELECT user_id, xp FROM levels').fetchall()).result()
+        self.leaderboard.build(rows)
 
-    def create_user_profile(self, user_id):
-        """Crée un nouveau profil utilisateur"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO levels (user_id, xp, level, total_messages, total_voice_time)
-            VALUES (?, 0, 1, 0, 0)
-        ''', (user_id,))
-        
-        conn.commit()
-        conn.close()
+    async def get_user_data(self, user_id):
+        """Récupère les données d'un utilisateur"""
+        return await self.xp_aggregator.get(user_id)
 
-    def update_user_xp(self, user_id, xp_gained, message_count=0, voice_time=0):
-        """Met à jour l'XP d'un utilisateur"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Récupérer les données actuelles
-        cursor.execute('''
-            SELECT xp, level, total_messages, total_voice_time 
-            FROM levels 
-            WHERE user_id = ?
-        ''', (user_id,))
-        
-        result = cursor.fetchone()
-        
-        if result is None:
-            # Créer un nouveau profil
-            cursor.execute('''
-                INSERT INTO levels (user_id, xp, level, total_messages, total_voice_time, last_message_time)
-                VALUES (?, ?, 1, ?, ?, ?)
-            ''', (user_id, xp_gained, message_count, voice_time, datetime.now()))
-        else:
-            current_xp, current_level, current_messages, current_voice = result
-            new_xp = current_xp + xp_gained
-            new_level = self.calculate_level(new_xp)
-            new_messages = current_messages + message_count
-            new_voice = current_voice + voice_time
-            
-            cursor.execute('''
-                UPDATE levels 
-                SET xp = ?, level = ?, total_messages = ?, total_voice_time = ?, last_message_time = ?
-                WHERE user_id = ?
-            ''', (new_xp, new_level, new_messages, new_voice, datetime.now(), user_id))
-        
-        conn.commit()
-        conn.close()
-        
-        return new_level if result else 1
+    async def update_user_xp(self, user_id, xp_gained, message_count=0, voice_time=0):
+        """Met à jour l'XP d'un utilisateur, retourne (ancien niveau, nouveau niveau)"""
+        old_level, new_level = await self.xp_aggregator.add(user_id, xp_gained, message_count, voice_time)
+        self.leaderboard.update(user_id, self.xp_aggregator.totals[user_id][0])
+        return old_level, new_level
 
     def calculate_level(self, xp):
         """Calcule le niveau basé sur l'XP"""
@@ -133,45 +98,45 @@ class Levels(commands.Cog):
 
     # -- MESSAGE XP SYSTEM --
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """Gère le gain d'XP par messages"""
-        # Ignorer les messages du bot et les commandes
-        if message.author.bot or message.content.startswith('+'):
-            return
+    async def process_message(self, record):
+        """Étape du pipeline de messages : gain d'XP"""
+        # Pas d'XP pour un message signalé par la sécurité
+        if record.flagged:
+            return False
         
+        message = record.message
         user_id = message.author.id
-        current_time = datetime.now()
+        current_time = record.timestamp
+        content = record.content
         
         # Vérifier le cooldown
         if user_id in self.xp_cooldown:
-            time_diff = (current_time - self.xp_cooldown[user_id]).total_seconds()
+            time_diff = current_time - self.xp_cooldown[user_id]
             if time_diff < self.message_cooldown:
-                return
+                return False
         
         # Vérifier la longueur du message
-        if len(message.content) < self.min_message_length:
-            return
+        if record.length < self.min_message_length:
+            return False
         
         # Vérifier si le message n'est pas répété
         if user_id in self.last_messages:
-            if message.content.lower().strip() == self.last_messages[user_id].lower().strip():
-                return
+            if content == self.last_messages[user_id]:
+                return False
         
         # Calculer l'XP gagné
         import random
         base_xp = random.randint(*self.message_xp_range)
         
         # Bonus pour messages longs
-        if len(message.content) > 4000:
+        if record.length > 4000:
             base_xp *= self.long_message_bonus
         
         # Mettre à jour les données
-        old_level = self.get_user_data(user_id)[1]
-        new_level = self.update_user_xp(user_id, base_xp, 1)
+        old_level, new_level = await self.update_user_xp(user_id, base_xp, 1)
         
         # Mettre à jour les trackers
-        self.last_messages[user_id] = message.content
+        self.last_messages[user_id] = content
         self.xp_cooldown[user_id] = current_time
         
         # Notification de niveau supérieur
@@ -184,119 +149,131 @@ class Levels(commands.Cog):
             embed.add_field(name="XP gagné", value=f"+{base_xp} XP", inline=True)
             embed.add_field(name="Niveau", value=f"{old_level} → {new_level}", inline=True)
             embed.set_thumbnail(url=message.author.avatar.url if message.author.avatar else message.author.default_avatar.url)
-            embed.set_footer(text=f"Message #{self.get_user_data(user_id)[2]}")
+            embed.set_footer(text=f"Message #{(await self.get_user_data(user_id))[2]}")
             
             await message.channel.send(embed=embed)
+        
+        return False
 
     # -- VOICE XP SYSTEM --
 
-    @commands.Cog.listener()
-    async def on_voice_state_update(self, member, before, after):
-        """Gère le tracking vocal"""
-        if member.bot:
+    def is_voice_active(self, voice):
+        """Vérifie si un état vocal rapporte de l'XP (hors AFK et sourdine casque)"""
+        if voice is None or voice.channel is None:
+            return False
+        if voice.afk or voice.self_deaf or voice.deaf:
+            return False
+        return True
+
+    def track_voice(self, member, voice, now):
+        """Met à jour le suivi vocal d'un membre à partir de son état actuel"""
+        user_id = member.id
+        
+        if voice is None or voice.channel is None:
+            self.voice_tracking.pop(user_id, None)
             return
         
-        user_id = member.id
+        active = self.is_voice_active(voice)
+        data = self.voice_tracking.get(user_id)
         
-        # Membre rejoint un canal vocal
-        if before.channel is None and after.channel is not None:
+        if data is None:
             self.voice_tracking[user_id] = {
-                'joined_at': datetime.now(),
-                'last_check': datetime.now()
+                'guild_id': member.guild.id,
+                'joined_at': now,
+                'last_check': now,
+                'active': active
             }
+            return
         
-        # Membre quitte un canal vocal
-        elif before.channel is not None and after.channel is None:
-            if user_id in self.voice_tracking:
-                # Calculer le temps passé en vocal
-                joined_time = self.voice_tracking[user_id]['joined_at']
-                time_spent = (datetime.now() - joined_time).total_seconds()
-                
-                # Donner de l'XP pour le temps passé
-                if time_spent >= 60:  # Au moins 1 minute
-                    xp_gained = int(time_spent / 60) * self.voice_xp_per_minute
-                    old_level = self.get_user_data(user_id)[1]
-                    new_level = self.update_user_xp(user_id, xp_gained, 0, int(time_spent))
-                    
-                    # Notification de niveau supérieur
-                    if new_level > old_level:
-                        embed = discord.Embed(
-                            title="🎉 Niveau supérieur !",
-                            description=f"Félicitations {member.mention} ! Tu as atteint le niveau **{new_level}** en vocal !",
-                            color=discord.Color.gold()
-                        )
-                        embed.add_field(name="Temps en vocal", value=f"{int(time_spent/60)} minutes", inline=True)
-                        embed.add_field(name="XP gagné", value=f"+{xp_gained} XP", inline=True)
-                        embed.add_field(name="Niveau", value=f"{old_level} → {new_level}", inline=True)
-                        embed.set_thumbnail(url=member.avatar.url if member.avatar else member.default_avatar.url)
-                        
-                        # Envoyer dans le canal système ou le premier canal textuel
-                        for channel in member.guild.text_channels:
-                            if channel.permissions_for(member.guild.me).send_messages:
-                                await channel.send(embed=embed)
-                                break
-                
-                del self.voice_tracking[user_id]
+        # Le temps écoulé pendant une période inactive ne compte pas
+        if active and not data['active']:
+            data['last_check'] = now
+        data['guild_id'] = member.guild.id
+        data['active'] = active
+
+    async def settle_voice(self, user_id, now=None):
+        """Crédite l'XP vocal accumulé depuis le dernier règlement"""
+        data = self.voice_tracking.get(user_id)
+        if data is None or not data['active']:
+            return
+        
+        now = now or datetime.now()
+        minutes = int((now - data['last_check']).total_seconds() // 60)
+        if minutes <= 0:
+            return
+        
+        # Conserver les secondes restantes pour le prochain règlement
+        data['last_check'] += timedelta(minutes=minutes)
+        
+        xp_gained = minutes * self.voice_xp_per_minute
+        old_level, new_level = await self.update_user_xp(user_id, xp_gained, 0, minutes * 60)
+        
+        if new_level > old_level:
+            guild = self.bot.get_guild(data['guild_id'])
+            member = guild.get_member(user_id) if guild else None
+            if member:
+                await self.announce_voice_level(member, old_level, new_level, xp_gained, minutes)
+
+    async def settle_all_voice(self):
+        """Règle l'XP vocal de tous les membres suivis"""
+        now = datetime.now()
+        for user_id in list(self.voice_tracking):
+            await self.settle_voice(user_id, now)
+
+    async def announce_voice_level(self, member, old_level, new_level, xp_gained, minutes):
+        """Annonce un passage de niveau obtenu en vocal"""
+        embed = discord.Embed(
+            title="🎉 Niveau supérieur !",
+            description=f"Félicitations {member.mention} ! Tu as atteint le niveau **{new_level}** en vocal !",
+            color=discord.Color.gold()
+        )
+        embed.add_field(name="Temps en vocal", value=f"{minutes} minutes", inline=True)
+        embed.add_field(name="XP gagné", value=f"+{xp_gained} XP", inline=True)
+        embed.add_field(name="Niveau", value=f"{old_level} → {new_level}", inline=True)
+        embed.set_thumbnail(url=member.avatar.url if member.avatar else member.default_avatar.url)
+        
+        self.bot.notifier.notify(member.guild, embed)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Reprend le suivi des membres déjà en vocal (cache de la gateway)"""
+        now = datetime.now()
+        for guild in self.bot.guilds:
+            for channel in guild.voice_channels:
+                for member in channel.members:
+                    if not member.bot and member.id not in self.voice_tracking:
+                        self.track_voice(member, member.voice, now)
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        """Règle l'XP vocal à chaque transition (arrivée, départ, AFK, sourdine, déplacement)"""
+        if member.bot:
+            return
+        
+        now = datetime.now()
+        await self.settle_voice(member.id, now)
+        self.track_voice(member, after, now)
 
     async def voice_xp_tracker(self):
-        """Tracker vocal en arrière-plan"""
+        """Balayage vocal périodique, sans appel REST"""
         await self.bot.wait_until_ready()
         
         while not self.bot.is_closed():
             try:
-                current_time = datetime.now()
+                now = datetime.now()
                 
                 for user_id, data in list(self.voice_tracking.items()):
-                    # Vérifier si l'utilisateur est toujours en vocal
-                    try:
-                        user = await self.bot.fetch_user(user_id)
-                        guild = None
-                        
-                        # Trouver le serveur où l'utilisateur est en vocal
-                        for g in self.bot.guilds:
-                            member = g.get_member(user_id)
-                            if member and member.voice and not member.voice.afk:
-                                guild = g
-                                break
-                        
-                        if guild and guild.get_member(user_id).voice and not guild.get_member(user_id).voice.afk:
-                            # Utilisateur toujours en vocal et actif
-                            time_diff = (current_time - data['last_check']).total_seconds()
-                            
-                            if time_diff >= self.voice_check_interval:
-                                # Donner de l'XP pour le temps passé
-                                xp_gained = int(self.voice_check_interval / 60) * self.voice_xp_per_minute
-                                old_level = self.get_user_data(user_id)[1]
-                                new_level = self.update_user_xp(user_id, xp_gained, 0, self.voice_check_interval)
-                                
-                                # Mettre à jour le dernier check
-                                self.voice_tracking[user_id]['last_check'] = current_time
-                                
-                                # Notification de niveau supérieur
-                                if new_level > old_level:
-                                    member = guild.get_member(user_id)
-                                    embed = discord.Embed(
-                                        title="🎉 Niveau supérieur !",
-                                        description=f"Félicitations {member.mention} ! Tu as atteint le niveau **{new_level}** en vocal !",
-                                        color=discord.Color.gold()
-                                    )
-                                    embed.add_field(name="XP gagné", value=f"+{xp_gained} XP", inline=True)
-                                    embed.add_field(name="Niveau", value=f"{old_level} → {new_level}", inline=True)
-                                    embed.set_thumbnail(url=member.avatar.url if member.avatar else member.default_avatar.url)
-                                    
-                                    # Envoyer dans le premier canal textuel disponible
-                                    for channel in guild.text_channels:
-                                        if channel.permissions_for(guild.me).send_messages:
-                                            await channel.send(embed=embed)
-                                            break
-                        else:
-                            # Utilisateur n'est plus en vocal, le retirer du tracking
-                            del self.voice_tracking[user_id]
+                    # Vérifier l'état vocal dans le cache de la gateway
+                    guild = self.bot.get_guild(data['guild_id'])
+                    member = guild.get_member(user_id) if guild else None
                     
-                    except:
-                        # Utilisateur introuvable, le retirer du tracking
-                        if user_id in self.voice_tracking:
-                            del self.voice_tracking[user_id]
+                    if member is None or member.voice is None or member.voice.channel is None:
+                        # Événement de départ manqué : le retirer du tracking
+                        del self.voice_tracking[user_id]
+                        continue
+                    
+                    await self.settle_voice(user_id, now)
+                    self.track_voice(member, member.voice, now)
                 
                 await asyncio.sleep(self.voice_check_interval)
                 
@@ -304,6 +281,14 @@ class Levels(commands.Cog):
                 print(f"Erreur dans voice_xp_tracker: {e}")
                 await asyncio.sleep(10)
 
+    async def xp_flush_task(self):
+        """Écriture périodique de l'XP accumulé"""
+        await self.bot.wait_until_ready()
+        
+        while not self.bot.is_closed():
+            await asyncio.sleep(self.xp_flush_interval)
+            await self.xp_aggregator.flush()
+
     # -- COMMANDS --
 
     @commands.command(name='rank', aliases=['r'], brief="Affiche ton niveau et ton XP")
@@ -312,7 +297,10 @@ class Levels(commands.Cog):
         if member is None:
             member = ctx.author
         
-        xp, level, total_messages, total_voice_time = self.get_user_data(member.id)
+        # Créditer le temps vocal en cours avant l'affichage
+        await self.settle_voice(member.id)
+        
+        xp, level, total_messages, total_voice_time = await self.get_user_data(member.id)
         xp_for_next = self.calculate_xp_for_next_level(level)
         progress = xp - self.calculate_xp_for_next_level(level - 1)
         needed = xp_for_next - self.calculate_xp_for_next_level(level - 1)
@@ -334,6 +322,13 @@ class Levels(commands.Cog):
             inline=True
         )
         
+        position = self.leaderboard.rank(member.id)
+        embed.add_field(
+            name="🏅 Classement",
+            value=f"**#{position:,}** sur {len(self.leaderboard):,}" if position else "Non classé",
+            inline=True
+        )
+        
         embed.add_field(
             name="📈 Progression",
             value=f"`{bar}` {percentage:.1f}%",
@@ -351,21 +346,20 @@ class Levels(commands.Cog):
         
         await ctx.send(embed=embed)
 
-    @commands.command(name='top', aliases=['leaderboard'], brief="Affiche le classement des niveaux")
-    async def top(self, ctx):
+    @commands.command(name='top', aliases=['leaderboard'], brief="Affiche le classement des niveaux", usage="+top [page]")
+    async def top(self, ctx, page: int = 1):
         """Affiche le classement des niveaux"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT user_id, xp, level, total_messages, total_voice_time 
-            FROM levels 
-            ORDER BY xp DESC 
-            LIMIT 10
-        ''')
+        # Créditer le temps vocal en cours avant l'affichage
+        await self.settle_all_voice()
+        
+        total_pages = max(1, -(-len(self.leaderboard) // self.top_page_size))
+        page = min(max(1, page), total_pages)
+        start = (page - 1) * self.top_page_size
         
-        results = cursor.fetchall()
-        conn.close()
+        results = []
+        for user_id, xp in self.leaderboard.page(start, self.top_page_size):
+            _, level, messages, voice_time = await self.get_user_data(user_id)
+            results.append((user_id, xp, level, messages, voice_time))
         
         if not results:
             embed = discord.Embed(
@@ -378,11 +372,11 @@ class Levels(commands.Cog):
         
         embed = discord.Embed(
             title="🏆 Classement des niveaux",
-            description="Les 10 membres avec le plus d'XP",
+            description=f"Les membres avec le plus d'XP (page {page}/{total_pages})",
             color=discord.Color.gold()
         )
         
-        for i, (user_id, xp, level, messages, voice_time) in enumerate(results, 1):
+        for i, (user_id, xp, level, messages, voice_time) in enumerate(results, start + 1):
             try:
                 member = await ctx.guild.fetch_member(user_id)
                 username = member.display_name
@@ -419,7 +413,7 @@ class Levels(commands.Cog):
         
         embed.add_field(
             name="🎤 Vocal",
-            value=f"**XP par minute:** {self.voice_xp_per_minute}\n**Vérification:** {self.voice_check_interval} secondes\n**AFK:** Pas de gain d'XP",
+            value=f"**XP par minute:** {self.voice_xp_per_minute}\n**Balayage:** {self.voice_check_interval} secondes\n**AFK / sourdine casque:** Pas de gain d'XP",
             inline=False
         )
         
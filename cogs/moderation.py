@@ -1,12 +1,10 @@
 import discord
 from discord.ext import commands
-import sqlite3
 from datetime import datetime
 
 class Moderation(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db_path = 'server.db'
         # Initialiser la base de données
         self.init_database()
 
@@ -14,11 +12,8 @@ class Moderation(commands.Cog):
 
     def init_database(self):
         """Initialise la base de données SQLite pour la whitelist"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Créer la table de whitelist
-        cursor.execute('''
+        self.bot.db.setup('''
             CREATE TABLE IF NOT EXISTS whitelist (
                 user_id INTEGER PRIMARY KEY,
                 added_by INTEGER NOT NULL,
@@ -26,60 +21,31 @@ class Moderation(commands.Cog):
                 reason TEXT
             )
         ''')
-        
-        conn.commit()
-        conn.close()
 
-    def is_whitelisted(self, user_id):
+    async def is_whitelisted(self, user_id):
         """Vérifie si un utilisateur est whitelisté"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT user_id FROM whitelist WHERE user_id = ?', (user_id,))
-        result = cursor.fetchone()
-        
-        conn.close()
+        result = await self.bot.db.query_one('SELECT user_id FROM whitelist WHERE user_id = ?', (user_id,))
         return result is not None
 
-    def add_to_whitelist(self, user_id, added_by, reason="Aucune raison fournie"):
+    async def add_to_whitelist(self, user_id, added_by, reason="Aucune raison fournie"):
         """Ajoute un utilisateur à la whitelist"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        await self.bot.db.execute('''
             INSERT OR REPLACE INTO whitelist (user_id, added_by, added_at, reason) 
             VALUES (?, ?, ?, ?)
         ''', (user_id, added_by, datetime.now(), reason))
-        
-        conn.commit()
-        conn.close()
 
-    def remove_from_whitelist(self, user_id):
+    async def remove_from_whitelist(self, user_id):
         """Retire un utilisateur de la whitelist"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM whitelist WHERE user_id = ?', (user_id,))
-        result = cursor.rowcount > 0
-        
-        conn.commit()
-        conn.close()
-        return result
+        deleted = await self.bot.db.execute('DELETE FROM whitelist WHERE user_id = ?', (user_id,))
+        return deleted > 0
 
-    def get_whitelist(self):
+    async def get_whitelist(self):
         """Récupère la liste complète des utilisateurs whitelistés"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        return await self.bot.db.query('''
             SELECT user_id, added_by, added_at, reason 
             FROM whitelist 
             ORDER BY added_at DESC
         ''')
-        results = cursor.fetchall()
-        
-        conn.close()
-        return results
 
     # -- BAN RELATED --
 
@@ -87,7 +53,7 @@ class Moderation(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def ban(self, ctx, member: discord.Member, reason: str = "Aucune raison fournie"):
         # Vérifier si le membre est whitelisté
-        if self.is_whitelisted(member.id):
+        if await self.is_whitelisted(member.id):
             embed = discord.Embed(
                 title="❌ Action impossible",
                 description=f"{member.mention} est protégé par la whitelist et ne peut pas être banni !",
@@ -108,8 +74,8 @@ class Moderation(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        try:
-            await member.ban(reason=reason)
+        status, error = await self.bot.bans.ban(ctx.guild, member.id, reason, source='command')
+        if status == 'banned':
             embed = discord.Embed(
                 title="🔨 Membre banni",
                 description=f"{member.mention} a été banni du serveur",
@@ -119,17 +85,17 @@ class Moderation(commands.Cog):
             embed.add_field(name="Banni par", value=ctx.author.mention, inline=False)
             embed.set_footer(text=f"ID: {member.id}")
             await ctx.send(embed=embed)
-        except discord.Forbidden:
+        elif status == 'forbidden':
             embed = discord.Embed(
                 title="❌ Permission insuffisante",
                 description="Je n'ai pas les permissions nécessaires pour bannir ce membre.",
                 color=discord.Color.red()
             )
             await ctx.send(embed=embed)
-        except Exception as e:
+        else:
             embed = discord.Embed(
                 title="❌ Erreur",
-                description=f"Une erreur s'est produite lors du bannissement : {str(e)}",
+                description=f"Une erreur s'est produite lors du bannissement : {error}",
                 color=discord.Color.red()
             )
             await ctx.send(embed=embed)
@@ -213,7 +179,7 @@ class Moderation(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def whitelist(self, ctx, member: discord.Member, reason: str = "Aucune raison fournie"):
         """Ajoute un membre à la whitelist (Admin uniquement)"""
-        if self.is_whitelisted(member.id):
+        if await self.is_whitelisted(member.id):
             embed = discord.Embed(
                 title="⚠️ Déjà whitelisté",
                 description=f"{member.mention} est déjà dans la whitelist !",
@@ -222,7 +188,7 @@ class Moderation(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        self.add_to_whitelist(member.id, ctx.author.id, reason)
+        await self.add_to_whitelist(member.id, ctx.author.id, reason)
         
         embed = discord.Embed(
             title="✅ Membre whitelisté",
@@ -238,7 +204,7 @@ class Moderation(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def unwhitelist(self, ctx, member: discord.Member):
         """Retire un membre de la whitelist (Admin uniquement)"""
-        if not self.is_whitelisted(member.id):
+        if not await self.is_whitelisted(member.id):
             embed = discord.Embed(
                 title="⚠️ Pas dans la whitelist",
                 description=f"{member.mention} n'est pas dans la whitelist !",
@@ -247,7 +213,7 @@ class Moderation(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        self.remove_from_whitelist(member.id)
+        await self.remove_from_whitelist(member.id)
         
         embed = discord.Embed(
             title="✅ Membre retiré de la whitelist",
@@ -262,7 +228,7 @@ class Moderation(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def whitelistlist(self, ctx):
         """Affiche la liste des membres whitelistés (Admin uniquement)"""
-        whitelisted_users = self.get_whitelist()
+        whitelisted_users = await self.get_whitelist()
         
         if not whitelisted_users:
             embed = discord.Embed(
@@ -311,7 +277,7 @@ class Moderation(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def whitelistinfo(self, ctx, member: discord.Member):
         """Affiche les informations d'un membre whitelisté (Admin uniquement)"""
-        if not self.is_whitelisted(member.id):
+        if not await self.is_whitelisted(member.id):
             embed = discord.Embed(
                 title="❌ Membre non whitelisté",
                 description=f"{member.mention} n'est pas dans la whitelist !",
@@ -320,18 +286,12 @@ class Moderation(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        result = await self.bot.db.query_one('''
             SELECT added_by, added_at, reason 
             FROM whitelist 
             WHERE user_id = ?
         ''', (member.id,))
         
-        result = cursor.fetchone()
-        conn.close()
-        
         if result:
             added_by, added_at, reason = result
             
@@ -364,7 +324,7 @@ class Moderation(commands.Cog):
         if member is None:
             member = ctx.author
         
-        is_whitelisted = self.is_whitelisted(member.id)
+        is_whitelisted = await self.is_whitelisted(member.id)
         
         if is_whitelisted:
             embed = discord.Embed(
@@ -1,23 +1,23 @@
 import discord
 from discord.ext import commands
-import sqlite3
 import asyncio
+import time
+from collections import deque
 from datetime import datetime, timedelta
+from core.spam import CoordinatedSpamIndex, TokenBucketStore
+from core.security_state import GuildStateStore
+from core.similarity import Fingerprinter, NearDuplicateDetector
+from core.raid import JoinRateMonitor, bin_upper_age, AGE_BINS
+from core.deletions import DeletionCollector
+from core.warning_scores import WarningScoreStore
+from core.antinuke import ExecutorCounters, AuditLogAttributor, index_snapshot
+from core.restore import rebuild
+from core.automod import RuleEngine, RuleSyntaxError, MessageFacts
+from core.blocklist import Blocklist, KINDS as BLOCKLIST_KINDS, parse_import
 
 class Security(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db_path = 'server.db'
-        
-        # Anti-spam tracking
-        self.message_history = {}  # {user_id: [{'content': str, 'timestamp': datetime}, ...]}
-        self.spam_warnings = {}  # {user_id: warning_count}
-        self.muted_users = {}  # {user_id: {'until': datetime, 'reason': str}}
-        
-        # Anti-raid tracking
-        self.recent_joins = []  # [{'user_id': int, 'join_time': datetime, 'account_age': int}, ...]
-        self.raid_detected = False
-        self.raid_lockdown = False
         
         # Configuration
         self.spam_config = {
@@ -25,44 +25,179 @@ class Security(commands.Cog):
             'spam_time_window': 10,  # Fenêtre de temps en secondes
             'warn_threshold': 2,  # Nombre d'avertissements avant mute
             'mute_duration': 300,  # Durée du mute en secondes (5 minutes)
-            'max_warnings': 3  # Nombre max d'avertissements avant ban
+            'max_warnings': 3,  # Nombre max d'avertissements avant ban
+            'max_history': 20,  # Messages gardés par utilisateur dans la fenêtre
+            'coordinated_accounts': 5,  # Comptes distincts envoyant le même message
+            'coordinated_time_window': 30,  # Fenêtre de temps en secondes
+            'coordinated_min_length': 10,  # Longueur minimale (ignore "gg", "lol"...)
+            'coordinated_max_entries': 5000,  # Messages gardés par serveur dans la fenêtre
+            'similarity_threshold': 0.9,  # Similarité (SimHash) à partir de laquelle deux messages sont identiques
+            'near_duplicate_min_length': 20,  # Longueur minimale pour la détection de quasi-doublons
+            'fingerprint_offload_batch': 64,  # Taille de lot à partir de laquelle les empreintes partent dans un processus
+            'state_idle_timeout': 3600,  # Inactivité (secondes) avant libération de l'état d'un serveur
+            'deletion_flush_delay': 1.0,  # Délai (secondes) avant la suppression groupée des messages signalés
+            'warning_half_life': 21600,  # Demi-vie (secondes) d'un avertissement
+            'max_warning_entries': 10000,  # Membres gardés en cache pour les scores d'avertissements
+            'filter_import_max_size': 2000000  # Taille max (octets) d'un fichier de liste noire importé
+        }
+        
+        self.rate_config = {
+            'user_burst': 8,  # Messages d'affilée autorisés par membre
+            'user_refill_rate': 1.0,  # Messages par seconde regagnés par membre
+            'channel_burst': 40,  # Messages d'affilée autorisés par salon
+            'channel_refill_rate': 10.0,  # Messages par seconde regagnés par salon
+            'max_buckets': 50000  # Nombre max de seaux gardés en mémoire
         }
         
+        self.coordinated_index = CoordinatedSpamIndex(
+            self.spam_config['coordinated_accounts'],
+            self.spam_config['coordinated_time_window'],
+            self.spam_config['coordinated_max_entries']
+        )
+        
+        # Limiteurs de débit par (serveur, membre) et (serveur, salon)
+        self.user_buckets = TokenBucketStore(
+            self.rate_config['user_burst'],
+            self.rate_config['user_refill_rate'],
+            self.rate_config['max_buckets']
+        )
+        self.channel_buckets = TokenBucketStore(
+            self.rate_config['channel_burst'],
+            self.rate_config['channel_refill_rate'],
+            self.rate_config['max_buckets']
+        )
+        
+        # Suppression groupée des messages signalés (par salon)
+        self.deletions = DeletionCollector(flush_delay=self.spam_config['deletion_flush_delay'])
+        
+        # Détection des quasi-doublons (un caractère ou un emoji ajouté)
+        self.fingerprinter = Fingerprinter(self.spam_config['fingerprint_offload_batch'])
+        self.near_duplicates = NearDuplicateDetector(
+            self.spam_config['similarity_threshold'],
+            self.spam_config['spam_time_window'],
+            self.spam_config['max_history'],
+            self.spam_config['coordinated_accounts'],
+            self.spam_config['coordinated_time_window'],
+            self.spam_config['coordinated_max_entries']
+        )
+        
         self.raid_config = {
             'max_recent_accounts': 5,  # Nombre max de comptes récents
             'account_age_threshold': 2,  # Âge max du compte en jours
             'join_time_window': 60,  # Fenêtre de temps en secondes
             'auto_ban': True,  # Bannir automatiquement
-            'lockdown_duration': 300  # Durée du lockdown en secondes
+            'lockdown_duration': 300,  # Durée du lockdown en secondes
+            'suspect_window': 1800,  # Fenêtre (secondes) des arrivées examinées lors d'un raid
+            'rate_z_threshold': 6.0,  # Écart (z-score) du débit d'arrivées face à la référence
+            'age_z_threshold': 4.0,  # Écart (z-score) de la part de comptes jeunes
+            'age_quantile': 0.05,  # Quantile bas de l'âge des comptes considéré comme jeune
+            'max_suspect_age': 30,  # Âge max (jours) d'un compte jugé suspect
+            'min_raid_joins': 3,  # Arrivées minimales pour une alerte statistique
+            'warmup_minutes': 60  # Apprentissage avant de remplacer le seuil fixe
         }
         
+        # État par serveur (historique des messages, avertissements, mutes, arrivées, lockdown)
+        self.guild_states = GuildStateStore(
+            self.spam_config['spam_time_window'],
+            self.spam_config['max_history'],
+            self.spam_config['state_idle_timeout'],
+            self.raid_config['suspect_window']
+        )
+        
+        # Référence statistique des arrivées par serveur (débit et âge des comptes)
+        self.join_monitor = JoinRateMonitor(
+            bucket_seconds=self.raid_config['join_time_window'],
+            short_half_life=self.raid_config['suspect_window'],
+            warmup_buckets=self.raid_config['warmup_minutes'] * 60 // self.raid_config['join_time_window'],
+            rate_threshold=self.raid_config['rate_z_threshold'],
+            age_threshold=self.raid_config['age_z_threshold'],
+            age_quantile=self.raid_config['age_quantile'],
+            max_suspect_age=self.raid_config['max_suspect_age'],
+            min_joins=self.raid_config['min_raid_joins']
+        )
+        
+        self.nuke_config = {
+            'time_window': 10,  # Fenêtre (secondes) des compteurs par auteur
+            'max_channel_deletes': 3,  # Salons supprimés dans la fenêtre
+            'max_role_deletes': 3,  # Rôles supprimés dans la fenêtre
+            'max_bans': 5,  # Bannissements dans la fenêtre
+            'max_webhook_creates': 3,  # Webhooks créés dans la fenêtre
+            'revert_window': 600,  # Actions de l'auteur annulées rétroactivement (secondes)
+            'snapshot_delay': 5,  # Délai (secondes) avant de rafraîchir l'instantané après une modification
+            'audit_batch_delay': 0.25  # Regroupement des lectures du journal d'audit (secondes)
+        }
+        self.nuke_thresholds = {
+            'channel_delete': self.nuke_config['max_channel_deletes'],
+            'role_delete': self.nuke_config['max_role_deletes'],
+            'ban': self.nuke_config['max_bans'],
+            'webhook_create': self.nuke_config['max_webhook_creates']
+        }
+        
+        # Anti-nuke : attribution des actions, compteurs par auteur, instantanés de structure
+        self.audit_logs = AuditLogAttributor(self.nuke_config['audit_batch_delay'])
+        self.nuke_counters = ExecutorCounters(self.nuke_config['time_window'])
+        self.nuke_actions = {}  # {guild_id: deque([(timestamp, executor_id, kind, données), ...])}
+        self.nuke_handling = set()  # {(guild_id, executor_id)} en cours de traitement
+        self.snapshots = {}  # {guild_id: {'roles': {id: données}, 'channels': {id: données}}}
+        self.snapshot_refreshes = set()  # {guild_id} rafraîchissement programmé
+        self.webhook_ids = {}  # {channel_id: {webhook_id, ...}} webhooks déjà vus par salon
+        
         # Initialiser la base de données
         self.init_database()
         
-        # Démarrer les tâches de nettoyage
-        self.bot.loop.create_task(self.cleanup_task())
+        # Scores d'avertissements décroissants (chargés depuis security_warnings)
+        self.warning_scores = WarningScoreStore(
+            self.bot.db,
+            self.spam_config['warning_half_life'],
+            self.spam_config['max_warning_entries']
+        )
+        
+        # Règles automod par serveur (compilées au chargement, recompilées à chaque modification)
+        self.automod = RuleEngine(self.bot.db, self.spam_config['spam_time_window'])
+        
+        # Liste noire (mots, domaines, invitations) par serveur
+        self.blocklist = Blocklist(self.bot.db)
+        
+        # Étape du traitement partagé des messages, avant les niveaux
+        self.bot.pipeline.register('security', self.process_message, priority=10)
+        
+        # Démarrer les tâches de nettoyage et la construction des listes noires
+        self.tasks = [
+            self.bot.loop.create_task(self.cleanup_task()),
+            self.bot.loop.create_task(self.blocklist.start())
+        ]
+        
+        # Actions différées persistantes (fin de mute, fin de lockdown)
+        self.bot.scheduler.register('unmute', self.expire_mute)
+        self.bot.scheduler.register('end_lockdown', self.end_lockdown)
+
+    def cog_unload(self):
+        """Arrête les tâches et le pool d'empreintes"""
+        self.bot.pipeline.unregister('security')
+        for task in self.tasks:
+            task.cancel()
+        self.fingerprinter.close()
+        self.blocklist.close()
 
     # -- DATABASE --
 
     def init_database(self):
         """Initialise la base de données SQLite pour la sécurité"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Créer la table des avertissements
-        cursor.execute('''
+        self.bot.db.setup(
+            # Créer la table des avertissements
+            '''
             CREATE TABLE IF NOT EXISTS security_warnings (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER,
                 user_id INTEGER NOT NULL,
                 reason TEXT NOT NULL,
                 moderator_id INTEGER,
                 timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 action_type TEXT DEFAULT 'warn'
             )
-        ''')
-        
-        # Créer la table des raids détectés
-        cursor.execute('''
+            ''',
+            # Créer la table des raids détectés
+            '''
             CREATE TABLE IF NOT EXISTS raid_logs (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 raid_type TEXT NOT NULL,
@@ -71,113 +206,260 @@ class Security(commands.Cog):
                 action_taken TEXT,
                 details TEXT
             )
-        ''')
-        
-        conn.commit()
-        conn.close()
-
-    def log_warning(self, user_id, reason, moderator_id=None, action_type='warn'):
-        """Enregistre un avertissement dans la base de données"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+            '''
+        )
         
-        cursor.execute('''
-            INSERT INTO security_warnings (user_id, reason, moderator_id, action_type)
-            VALUES (?, ?, ?, ?)
-        ''', (user_id, reason, moderator_id, action_type))
+        # Ajouter le serveur aux avertissements des anciennes bases
+        def migrate(conn):
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(security_warnings)')]
+            if 'guild_id' not in columns:
+                conn.execute('ALTER TABLE security_warnings ADD COLUMN guild_id INTEGER')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_security_warnings_user ON security_warnings (user_id, timestamp)')
         
-        conn.commit()
-        conn.close()
+        self.bot.db.submit(migrate).result()
 
-    def log_raid(self, raid_type, accounts_involved, action_taken, details):
+    async def log_raid(self, raid_type, accounts_involved, action_taken, details):
         """Enregistre un raid détecté"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        await self.bot.db.execute('''
             INSERT INTO raid_logs (raid_type, accounts_involved, action_taken, details)
             VALUES (?, ?, ?, ?)
         ''', (raid_type, accounts_involved, action_taken, details))
-        
-        conn.commit()
-        conn.close()
 
-    def get_user_warnings(self, user_id):
-        """Récupère les avertissements d'un utilisateur"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+    async def get_user_warnings(self, guild_id, user_id):
+        """Récupère les avertissements d'un membre dans un serveur"""
+        return await self.bot.db.query('''
             SELECT reason, moderator_id, timestamp, action_type 
             FROM security_warnings 
-            WHERE user_id = ? 
+            WHERE user_id = ? AND (guild_id = ? OR guild_id IS NULL)
             ORDER BY timestamp DESC
-        ''', (user_id,))
-        
-        results = cursor.fetchall()
-        conn.close()
-        return results
+        ''', (user_id, guild_id))
 
     # -- ANTI-SPAM SYSTEM --
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """Gère la détection de spam"""
-        if message.author.bot or message.content.startswith('+'):
-            return
+    async def process_message(self, record):
+        """Étape du pipeline de messages : détection de spam, retourne True si le message est supprimé"""
+        if record.guild_id is None:
+            return False
+        message = record.message
         
-        user_id = message.author.id
-        current_time = datetime.now()
+        # Vérifier le débit, la liste noire, les règles automod puis le spam
+        if await self.check_rate(message):
+            record.flag('rate')
+        if await self.check_blocklist(message, record.content):
+            record.flag('blocklist')
+            return True
+        if await self.check_automod(message, record):
+            return True
+        if await self.check_spam(message, record):
+            record.flag('spam')
+            return True
+        return 'rate' in record.flags
+
+    async def check_rate(self, message):
+        """Vérifie le débit de messages du membre et du salon, retourne True si le message est supprimé"""
+        guild_id = message.guild.id
+        user_allowed, user_first = self.user_buckets.consume((guild_id, message.author.id))
+        channel_allowed, channel_first = self.channel_buckets.consume((guild_id, message.channel.id))
         
-        # Initialiser l'historique si nécessaire
-        if user_id not in self.message_history:
-            self.message_history[user_id] = []
+        if user_allowed and channel_allowed:
+            return False
         
-        # Ajouter le message à l'historique
-        self.message_history[user_id].append({
-            'content': message.content.lower().strip(),
-            'timestamp': current_time
-        })
+        # Salon saturé : seuls les membres qui y contribuent fortement sont sanctionnés
+        if not user_allowed:
+            escalate = user_first
+        else:
+            escalate = channel_first or self.user_buckets.fill_ratio((guild_id, message.author.id)) < 0.5
         
-        # Nettoyer l'historique (garder seulement les messages récents)
-        cutoff_time = current_time - timedelta(seconds=self.spam_config['spam_time_window'])
-        self.message_history[user_id] = [
-            msg for msg in self.message_history[user_id] 
-            if msg['timestamp'] > cutoff_time
-        ]
+        if escalate:
+            await self.handle_rate_limit(message, user_allowed)
         
-        # Vérifier le spam
-        await self.check_spam(message)
+        # Supprimer le message excédentaire
+        self.deletions.add(message.channel, [message.id])
+        return True
 
-    async def check_spam(self, message):
-        """Vérifie si un message est du spam"""
-        user_id = message.author.id
-        current_time = datetime.now()
+    async def handle_rate_limit(self, message, channel_only):
+        """Gère un débit de messages excessif"""
+        member = message.author
+        
+        warning_count = await self.warn_for_spam(member, "Débit de messages excessif")
+        
+        embed = discord.Embed(
+            title="⏱️ Débit excessif",
+            description=f"{member.mention} envoie trop de messages{' dans un salon saturé' if channel_only else ''} !",
+            color=discord.Color.red()
+        )
+        embed.add_field(name="Avertissement", value=f"{warning_count}/{self.spam_config['max_warnings']}", inline=True)
+        embed.add_field(name="Action", value=self.get_action_for_warning(warning_count), inline=True)
+        embed.set_footer(text=f"ID: {member.id}")
         
-        # Compter les messages identiques
-        content = message.content.lower().strip()
-        repeated_count = sum(1 for msg in self.message_history[user_id] if msg['content'] == content)
+        self.bot.notifier.notify(message.guild, embed, message.channel)
+
+    async def check_spam(self, message, record):
+        """Vérifie si un message est du spam, retourne True si c'est le cas"""
+        digest = record.digest
+        guild_id = message.guild.id
+        state = self.guild_states.get(guild_id)
+        ref = (message.channel.id, message.id)
+        
+        # Compter les messages identiques dans la fenêtre
+        repeated_count = state.spam_tracker.add(message.author.id, digest, now=record.timestamp, ref=ref)
+        
+        # Même message envoyé par plusieurs comptes du serveur
+        author_ids = []
+        if record.length >= self.spam_config['coordinated_min_length']:
+            author_ids = self.coordinated_index.add(guild_id, message.author.id, digest, now=record.timestamp, ref=ref)
+        
+        # Messages quasi identiques (SimHash)
+        fingerprint = None
+        if record.length >= self.spam_config['near_duplicate_min_length']:
+            fingerprint = await self.fingerprinter.fingerprint(record.content)
+            near_count, near_author_ids = self.near_duplicates.add(guild_id, message.author.id, fingerprint, now=record.timestamp, ref=ref)
+            repeated_count = max(repeated_count, near_count)
+            author_ids = author_ids + [author_id for author_id in near_author_ids if author_id not in author_ids]
         
         if repeated_count >= self.spam_config['max_repeated_messages']:
             # Spam détecté
-            await self.handle_spam(message, repeated_count)
+            await self.handle_spam(message, repeated_count, digest, fingerprint)
+            return True
+        elif author_ids:
+            await self.handle_coordinated_spam(message, author_ids, digest, fingerprint)
+            return True
+        return False
+
+    async def check_blocklist(self, message, content):
+        """Supprime un message contenant un terme interdit, retourne True si c'est le cas"""
+        match = self.blocklist.match(message.guild.id, content)
+        if match is None:
+            return False
+        
+        kind, term = match
+        member = message.author
+        self.deletions.add(message.channel, [message.id])
+        
+        labels = {'word': "Mot interdit", 'domain': "Domaine interdit", 'invite': "Invitation interdite"}
+        warning_count = await self.warn_for_spam(member, f"{labels[kind]}: {term}")
+        
+        embed = discord.Embed(
+            title="🚫 Contenu interdit",
+            description=f"Le message de {member.mention} a été supprimé ({labels[kind].lower()}).",
+            color=discord.Color.red()
+        )
+        embed.add_field(name="Avertissement", value=f"{warning_count}/{self.spam_config['max_warnings']}", inline=True)
+        embed.add_field(name="Action", value=self.get_action_for_warning(warning_count), inline=True)
+        embed.set_footer(text=f"ID: {member.id}")
+        
+        self.bot.notifier.notify(message.guild, embed, message.channel)
+        return True
+
+    async def check_automod(self, message, record):
+        """Évalue les règles automod du serveur, retourne True si le message a été supprimé"""
+        ruleset = self.automod.get(message.guild.id)
+        if ruleset is None:
+            return False
+        
+        member = message.author
+        facts = MessageFacts(
+            record.content,
+            mentions=record.mentions,
+            links=record.links,
+            attachments=len(message.attachments),
+            rate=self.automod.rate(message.guild.id, member.id, record.timestamp) if ruleset.uses_rate else 0,
+            account_age=(discord.utils.utcnow() - member.created_at).total_seconds() / 86400
+        )
+        
+        try:
+            matched = ruleset.evaluate(facts)
+        except Exception as e:
+            print(f"Erreur lors de l'évaluation des règles automod: {e}")
+            return False
+        
+        if matched:
+            record.flag('automod')
+            await self.handle_automod(message, matched)
+        return any(action in ('delete', 'ban') for rule in matched for action, _ in rule.actions)
 
-    async def handle_spam(self, message, repeated_count):
+    async def handle_automod(self, message, rules):
+        """Applique les actions des règles automod déclenchées"""
+        member = message.author
+        actions = {}
+        for rule in rules:
+            for action, value in rule.actions:
+                if action == 'mute':
+                    # Plusieurs mutes : garder la durée la plus longue
+                    actions['mute'] = max(actions.get('mute') or 0, value or 0)
+                else:
+                    actions[action] = value
+        
+        names = ", ".join(f"`{rule.name}`" for rule in rules)
+        summary = []
+        
+        if 'delete' in actions:
+            self.deletions.add(message.channel, [message.id])
+            summary.append("🗑️ Message supprimé")
+        
+        if 'ban' in actions:
+            await self.ban_user(member, f"Règle automod: {names}")
+            summary.append("🚫 Banni")
+        else:
+            if 'warn' in actions:
+                warning_count = await self.warn_for_spam(member, f"Règle automod: {names}")
+                summary.append(f"⚠️ Avertissement {warning_count}/{self.spam_config['max_warnings']}")
+            if 'mute' in actions:
+                duration = actions['mute'] or self.spam_config['mute_duration']
+                await self.mute_user(member, duration)
+                summary.append(f"🔇 Muté {duration}s")
+        
+        embed = discord.Embed(
+            title="🤖 Règle automod déclenchée",
+            description=f"{member.mention} a déclenché {names}",
+            color=discord.Color.red()
+        )
+        embed.add_field(name="Actions", value="\n".join(summary) or "Aucune", inline=False)
+        embed.set_footer(text=f"ID: {member.id}")
+        
+        self.bot.notifier.notify(message.guild, embed, message.channel)
+
+    def delete_flagged(self, message, refs):
+        """Programme la suppression d'un message signalé et de ses copies"""
+        by_channel = {message.channel.id: (message.channel, {message.id})}
+        for channel_id, message_id in refs:
+            if channel_id not in by_channel:
+                channel = message.guild.get_channel_or_thread(channel_id)
+                if channel is None:
+                    continue
+                by_channel[channel_id] = (channel, set())
+            by_channel[channel_id][1].add(message_id)
+        
+        for channel, message_ids in by_channel.values():
+            self.deletions.add(channel, message_ids)
+
+    async def warn_for_spam(self, member, reason):
+        """Ajoute un avertissement et applique l'escalade, retourne le nombre d'avertissements"""
+        # Enregistrer l'avertissement (score décroissant, écrit en base)
+        score = await self.warning_scores.add(member.guild.id, member.id, reason)
+        warning_count = self.warning_scores.count(score)
+        
+        # Appliquer les actions selon le nombre d'avertissements
+        if warning_count >= self.spam_config['max_warnings']:
+            # Bannir l'utilisateur
+            await self.ban_user(member, "Spam répété - Trop d'avertissements")
+        elif warning_count >= self.spam_config['warn_threshold']:
+            # Muter l'utilisateur
+            await self.mute_user(member, self.spam_config['mute_duration'])
+        
+        return warning_count
+
+    async def handle_spam(self, message, repeated_count, digest, fingerprint=None):
         """Gère le spam détecté"""
         user_id = message.author.id
         member = message.author
         
-        # Initialiser le compteur d'avertissements
-        if user_id not in self.spam_warnings:
-            self.spam_warnings[user_id] = 0
-        
-        self.spam_warnings[user_id] += 1
-        warning_count = self.spam_warnings[user_id]
+        warning_count = await self.warn_for_spam(member, f"Spam: {repeated_count} messages identiques")
         
         # Créer l'embed d'avertissement
         embed = discord.Embed(
             title="🚨 Spam détecté",
-            description=f"{member.mention} a envoyé le même message **{repeated_count}** fois !",
+            description=f"{member.mention} a envoyé le même message (ou presque) **{repeated_count}** fois !",
             color=discord.Color.red()
         )
         embed.add_field(name="Avertissement", value=f"{warning_count}/{self.spam_config['max_warnings']}", inline=True)
@@ -185,27 +467,49 @@ class Security(commands.Cog):
         embed.set_thumbnail(url=member.avatar.url if member.avatar else member.default_avatar.url)
         embed.set_footer(text=f"ID: {user_id}")
         
-        # Enregistrer l'avertissement
-        self.log_warning(user_id, f"Spam: {repeated_count} messages identiques", action_type='spam_warning')
-        
-        # Appliquer les actions selon le nombre d'avertissements
         if warning_count >= self.spam_config['max_warnings']:
-            # Bannir l'utilisateur
-            await self.ban_user(member, "Spam répété - Trop d'avertissements")
             embed.add_field(name="🚫 Action", value="**BANNI** - Trop d'avertissements", inline=False)
         elif warning_count >= self.spam_config['warn_threshold']:
-            # Muter l'utilisateur
-            await self.mute_user(member, self.spam_config['mute_duration'])
             embed.add_field(name="🔇 Action", value=f"**MUTÉ** pour {self.spam_config['mute_duration']} secondes", inline=False)
         
-        # Envoyer l'avertissement
-        await message.channel.send(embed=embed)
+        # Envoyer l'avertissement (regroupé avec les alertes rapprochées du salon)
+        self.bot.notifier.notify(message.guild, embed, message.channel)
         
-        # Supprimer le message spam
-        try:
-            await message.delete()
-        except:
-            pass
+        # Supprimer le message spam et ses copies précédentes (exactes et proches)
+        state = self.guild_states.get(message.guild.id)
+        refs = state.spam_tracker.take_messages(user_id, digest)
+        if fingerprint is not None:
+            refs += self.near_duplicates.take_messages(message.guild.id, user_id, fingerprint)
+        self.delete_flagged(message, refs)
+
+    async def handle_coordinated_spam(self, message, author_ids, digest, fingerprint=None):
+        """Gère un même message envoyé par plusieurs comptes"""
+        summary = ""
+        for author_id in author_ids:
+            member = message.guild.get_member(author_id)
+            if member is None:
+                continue
+            
+            warning_count = await self.warn_for_spam(member, "Spam coordonné: message identique à d'autres comptes")
+            summary += f"{member.mention} - {self.get_action_for_warning(warning_count)}\n"
+        
+        if not summary:
+            return
+        
+        embed = discord.Embed(
+            title="🚨 Spam coordonné détecté",
+            description=f"Le même message a été envoyé par **{self.spam_config['coordinated_accounts']}** comptes ou plus en moins de {self.spam_config['coordinated_time_window']} secondes !",
+            color=discord.Color.red()
+        )
+        embed.add_field(name="📋 Comptes sanctionnés", value=summary[:1024], inline=False)
+        
+        self.bot.notifier.notify(message.guild, embed, message.channel)
+        
+        # Supprimer toutes les copies (exactes et proches) envoyées par les différents comptes
+        refs = self.coordinated_index.take_messages(message.guild.id, digest)
+        if fingerprint is not None:
+            refs += self.near_duplicates.take_guild_messages(message.guild.id, fingerprint)
+        self.delete_flagged(message, refs)
 
     def get_action_for_warning(self, warning_count):
         """Retourne l'action pour un nombre d'avertissements donné"""
@@ -238,11 +542,11 @@ class Security(commands.Cog):
             # Appliquer le rôle
             await member.add_roles(muted_role, reason="Spam détecté")
             
-            # Programmer la suppression du rôle
-            self.bot.loop.create_task(self.unmute_user_after(member, muted_role, duration))
+            # Programmer la suppression du rôle (conservée en cas de redémarrage)
+            await self.bot.scheduler.schedule('unmute', member.guild.id, member.id, duration)
             
             # Enregistrer le mute
-            self.muted_users[member.id] = {
+            self.guild_states.get(member.guild.id).muted_users[member.id] = {
                 'until': datetime.now() + timedelta(seconds=duration),
                 'reason': 'Spam détecté'
             }
@@ -250,12 +554,20 @@ class Security(commands.Cog):
         except Exception as e:
             print(f"Erreur lors du mute de {member.name}: {e}")
 
-    async def unmute_user_after(self, member, muted_role, duration):
-        """Retire le rôle Muted après la durée spécifiée"""
-        await asyncio.sleep(duration)
+    async def expire_mute(self, guild_id, user_id, payload):
+        """Retire le rôle Muted à la fin du mute (action planifiée)"""
+        state = self.guild_states.peek(guild_id)
+        if state:
+            state.muted_users.pop(user_id, None)
+        
+        guild = self.bot.get_guild(guild_id)
+        member = guild.get_member(user_id) if guild else None
+        if member is None:
+            return
         
         try:
-            if muted_role in member.roles:
+            muted_role = discord.utils.get(guild.roles, name="Muted")
+            if muted_role and muted_role in member.roles:
                 await member.remove_roles(muted_role, reason="Fin du mute automatique")
                 
                 embed = discord.Embed(
@@ -264,18 +576,17 @@ class Security(commands.Cog):
                     color=discord.Color.green()
                 )
                 
-                # Envoyer dans le premier canal disponible
-                for channel in member.guild.text_channels:
-                    if channel.permissions_for(member.guild.me).send_messages:
-                        await channel.send(embed=embed)
-                        break
+                self.bot.notifier.notify(guild, embed)
         except:
             pass
 
     async def ban_user(self, member, reason):
         """Bannit un utilisateur"""
         try:
-            await member.ban(reason=reason)
+            status, error = await self.bot.bans.ban(member.guild, member.id, reason, source='spam')
+            if status != 'banned':
+                print(f"Erreur lors du ban de {member.name}: {error}")
+                return
             
             embed = discord.Embed(
                 title="🚫 Utilisateur banni",
@@ -284,11 +595,7 @@ class Security(commands.Cog):
             )
             embed.add_field(name="Raison", value=reason, inline=False)
             
-            # Envoyer dans le premier canal disponible
-            for channel in member.guild.text_channels:
-                if channel.permissions_for(member.guild.me).send_messages:
-                    await channel.send(embed=embed)
-                    break
+            self.bot.notifier.notify(member.guild, embed)
         except Exception as e:
             print(f"Erreur lors du ban de {member.name}: {e}")
 
@@ -300,113 +607,136 @@ class Security(commands.Cog):
         if member.bot:
             return
         
+        state = self.guild_states.get(member.guild.id)
         current_time = datetime.now()
-        account_age = (current_time - member.created_at).days
+        account_age = (discord.utils.utcnow() - member.created_at).total_seconds() / 86400
         
-        # Ajouter le membre à la liste des arrivées récentes
-        self.recent_joins.append({
+        # Ajouter le membre à la liste des arrivées récentes du serveur
+        state.recent_joins.append({
             'user_id': member.id,
             'join_time': current_time,
             'account_age': account_age
         })
         
         # Nettoyer les anciennes entrées
-        cutoff_time = current_time - timedelta(seconds=self.raid_config['join_time_window'])
-        self.recent_joins = [
-            join for join in self.recent_joins 
-            if join['join_time'] > cutoff_time
-        ]
+        state.expire_joins(current_time - timedelta(seconds=self.raid_config['suspect_window']))
         
-        # Vérifier le raid
-        await self.check_raid(member, account_age)
+        # Mettre à jour la référence (O(1)) et vérifier le raid
+        signal = self.join_monitor.observe(member.guild.id, account_age)
+        await self.check_raid(member, signal)
 
-    async def check_raid(self, member, account_age):
+    async def check_raid(self, member, signal):
         """Vérifie si un raid est en cours"""
-        if self.raid_lockdown:
+        state = self.guild_states.get(member.guild.id)
+        if state.raid_lockdown:
+            return
+        
+        baseline = self.join_monitor.get(member.guild.id)
+        if baseline.buckets_seen < self.join_monitor.warmup_buckets:
+            # Référence en apprentissage : seuil fixe
+            cutoff_time = datetime.now() - timedelta(seconds=self.raid_config['join_time_window'])
+            recent_accounts = [
+                join for join in state.recent_joins 
+                if join['join_time'] > cutoff_time and join['account_age'] <= self.raid_config['account_age_threshold']
+            ]
+            
+            if len(recent_accounts) >= self.raid_config['max_recent_accounts']:
+                reason = f"**{len(recent_accounts)}** comptes de moins de {self.raid_config['account_age_threshold']} jours ont rejoint en moins de {self.raid_config['join_time_window']} secondes !"
+                await self.handle_raid(member.guild, recent_accounts, reason)
             return
         
-        # Compter les comptes récents
+        if signal is None:
+            return
+        
+        # Comptes suspects : arrivés pendant l'intervalle anormal et jeunes au regard de la référence
+        # (quantile bas des âges, ou seuil fixe si la référence n'en a pas), quel que soit le signal
+        kind, score = signal
+        max_age = self.join_monitor.suspect_age(baseline, self.raid_config['account_age_threshold'])
+        cutoff_time = datetime.now() - timedelta(seconds=self.raid_config['join_time_window'])
         recent_accounts = [
-            join for join in self.recent_joins 
-            if join['account_age'] <= self.raid_config['account_age_threshold']
+            join for join in state.recent_joins
+            if join['join_time'] > cutoff_time and join['account_age'] < max_age
         ]
         
-        if len(recent_accounts) >= self.raid_config['max_recent_accounts']:
-            # Raid détecté
-            await self.handle_raid(recent_accounts)
+        if kind == 'rate':
+            reason = f"Débit d'arrivées anormal : **{self.join_monitor.live_rate(baseline, time.monotonic()):.0f}**/{self.raid_config['join_time_window']}s (z = {score:.1f}, habituel {baseline.rate[0]:.1f})"
+        else:
+            reason = f"Afflux de comptes récents : **{len(recent_accounts)}** comptes de moins de {max_age} jours en {self.raid_config['join_time_window']}s (z = {score:.1f})"
+        await self.handle_raid(member.guild, recent_accounts, reason)
 
-    async def handle_raid(self, recent_accounts):
-        """Gère un raid détecté"""
-        self.raid_detected = True
-        self.raid_lockdown = True
+    async def handle_raid(self, guild, recent_accounts, reason):
+        """Gère un raid détecté sur un serveur"""
+        state = self.guild_states.get(guild.id)
+        state.raid_detected = True
+        state.raid_lockdown = True
         
         embed = discord.Embed(
             title="🚨 RAID DÉTECTÉ !",
-            description=f"**{len(recent_accounts)}** comptes de moins de {self.raid_config['account_age_threshold']} jours ont rejoint en moins de {self.raid_config['join_time_window']} secondes !",
+            description=reason,
             color=discord.Color.red()
         )
         
         # Lister les comptes suspects
         suspect_list = ""
         for i, account in enumerate(recent_accounts[:5], 1):
-            try:
-                user = await self.bot.fetch_user(account['user_id'])
-                suspect_list += f"{i}. {user.name}#{user.discriminator} (Compte: {account['account_age']}j)\n"
-            except:
-                suspect_list += f"{i}. Utilisateur {account['user_id']} (Compte: {account['account_age']}j)\n"
+            member = guild.get_member(account['user_id'])
+            if member:
+                suspect_list += f"{i}. {member.name}#{member.discriminator} (Compte: {account['account_age']:.0f}j)\n"
+            else:
+                suspect_list += f"{i}. Utilisateur {account['user_id']} (Compte: {account['account_age']:.0f}j)\n"
         
-        embed.add_field(name="📋 Comptes suspects", value=suspect_list, inline=False)
+        embed.add_field(name="📋 Comptes suspects", value=suspect_list or "Aucun compte récent", inline=False)
         
-        # Action automatique
-        if self.raid_config['auto_ban']:
-            banned_count = 0
-            for account in recent_accounts:
-                try:
-                    user = await self.bot.fetch_user(account['user_id'])
-                    guild = None
-                    
-                    # Trouver le serveur
-                    for g in self.bot.guilds:
-                        if g.get_member(account['user_id']):
-                            guild = g
-                            break
-                    
-                    if guild:
-                        member = guild.get_member(account['user_id'])
-                        if member:
-                            await member.ban(reason="Anti-raid: Compte récent suspect")
-                            banned_count += 1
-                except:
-                    pass
+        # Action automatique (avancement affiché en direct)
+        if self.raid_config['auto_ban'] and recent_accounts:
+            embed.add_field(name="🚫 Action", value=f"Bannissement de **{len(recent_accounts)}** comptes en cours...", inline=False)
+        
+        # Envoyer l'alerte immédiatement (le message suit l'avancement des bannissements)
+        alert = await self.bot.notifier.send(guild, embed)
+        
+        # Programmer la fin du lockdown
+        await self.bot.scheduler.schedule('end_lockdown', guild.id, None, self.raid_config['lockdown_duration'])
+        
+        banned_count = 0
+        if self.raid_config['auto_ban'] and recent_accounts:
+            async def report(job):
+                if alert is None:
+                    return
+                state_text = "terminé" if job.finished else "en cours"
+                embed.set_field_at(
+                    len(embed.fields) - 1,
+                    name="🚫 Action",
+                    value=f"**{job.banned}**/{job.total} comptes bannis ({state_text}, {job.elapsed:.1f}s)"
+                          + (f"\n**{job.failed}** échec(s)" if job.failed else ""),
+                    inline=False
+                )
+                await alert.edit(embed=embed)
             
-            embed.add_field(name="🚫 Action", value=f"**{banned_count}** comptes bannis automatiquement", inline=False)
+            job = self.bot.bans.submit(
+                guild,
+                [account['user_id'] for account in recent_accounts],
+                "Anti-raid: Compte récent suspect",
+                source='raid',
+                progress=report
+            )
+            banned_count = (await job.wait()).banned
         
         # Enregistrer le raid
-        self.log_raid(
+        await self.log_raid(
             "recent_accounts",
             len(recent_accounts),
-            f"Auto-ban: {banned_count if self.raid_config['auto_ban'] else 0} comptes",
-            f"Comptes de moins de {self.raid_config['account_age_threshold']} jours"
+            f"Auto-ban: {banned_count} comptes",
+            reason
         )
-        
-        # Envoyer l'alerte
-        for channel in self.bot.get_all_channels():
-            if isinstance(channel, discord.TextChannel) and channel.permissions_for(channel.guild.me).send_messages:
-                try:
-                    await channel.send(embed=embed)
-                    break
-                except:
-                    continue
-        
-        # Programmer la fin du lockdown
-        self.bot.loop.create_task(self.end_lockdown())
 
-    async def end_lockdown(self):
-        """Termine le lockdown anti-raid"""
-        await asyncio.sleep(self.raid_config['lockdown_duration'])
+    async def end_lockdown(self, guild_id, target_id, payload):
+        """Termine le lockdown anti-raid d'un serveur (action planifiée)"""
+        state = self.guild_states.peek(guild_id)
+        if not state or not state.raid_lockdown:
+            return
         
-        self.raid_lockdown = False
-        self.raid_detected = False
+        state.raid_lockdown = False
+        state.raid_detected = False
         
         embed = discord.Embed(
             title="✅ Lockdown terminé",
@@ -415,14 +745,191 @@ class Security(commands.Cog):
         )
         
         # Envoyer la notification
+        guild = self.bot.get_guild(guild_id)
+        if guild is not None:
+            await self.bot.notifier.send(guild, embed)
+
+    # -- ANTI-NUKE SYSTEM --
+
+    async def refresh_snapshot(self, guild, delay=0):
+        """Met à jour l'instantané de structure d'un serveur (format Backup.create_backup_data)"""
+        if delay:
+            if guild.id in self.snapshot_refreshes:
+                return
+            self.snapshot_refreshes.add(guild.id)
+            await asyncio.sleep(delay)
+            self.snapshot_refreshes.discard(guild.id)
+        
+        backup = self.bot.get_cog('Backup')
+        if backup is None:
+            return
+        
+        try:
+            self.snapshots[guild.id] = index_snapshot(await backup.create_backup_data(guild))
+        except Exception as e:
+            print(f"Erreur lors de l'instantané de {guild.name}: {e}")
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Prend l'instantané de structure de chaque serveur"""
         for guild in self.bot.guilds:
-            for channel in guild.text_channels:
-                if channel.permissions_for(guild.me).send_messages:
+            await self.refresh_snapshot(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        await self.refresh_snapshot(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        await self.refresh_snapshot(channel.guild, self.nuke_config['snapshot_delay'])
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        await self.refresh_snapshot(after.guild, self.nuke_config['snapshot_delay'])
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        await self.refresh_snapshot(role.guild, self.nuke_config['snapshot_delay'])
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        await self.refresh_snapshot(after.guild, self.nuke_config['snapshot_delay'])
+
+    @commands.Cog.listener()
+    async def on_audit_log_entry(self, entry):
+        """Entrées du journal d'audit poussées par la gateway (attribution immédiate)"""
+        self.audit_logs.record(entry.guild.id, entry)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.webhook_ids.pop(channel.id, None)
+        data = self.snapshots.get(channel.guild.id, {}).get('channels', {}).get(channel.id)
+        await self.track_nuke_action(channel.guild, discord.AuditLogAction.channel_delete, 'channel_delete', channel.id, data)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        data = self.snapshots.get(role.guild.id, {}).get('roles', {}).get(role.id)
+        await self.track_nuke_action(role.guild, discord.AuditLogAction.role_delete, 'role_delete', role.id, data)
+
+    @commands.Cog.listener()
+    async def on_member_ban(self, guild, user):
+        # Bannissements du pipeline (raid, spam, modération) : inutile de lire le journal d'audit
+        if self.bot.bans.issued(guild.id, user.id):
+            return
+        await self.track_nuke_action(guild, discord.AuditLogAction.ban, 'ban', user.id, user.id)
+
+    @commands.Cog.listener()
+    async def on_webhooks_update(self, channel):
+        # L'événement couvre aussi les modifications et suppressions sans dire lesquelles :
+        # seuls les webhooks récents encore jamais vus dans le salon sont attribués
+        try:
+            webhooks = await channel.webhooks()
+        except discord.HTTPException as e:
+            print(f"Erreur lors de la lecture des webhooks de {channel.id}: {e}")
+            return
+        
+        known = self.webhook_ids.setdefault(channel.id, set())
+        cutoff = discord.utils.utcnow() - timedelta(seconds=self.audit_logs.max_age)
+        created = [webhook for webhook in webhooks if webhook.id not in known and webhook.created_at > cutoff]
+        known.update(webhook.id for webhook in webhooks)
+        
+        await asyncio.gather(*(
+            self.track_nuke_action(channel.guild, discord.AuditLogAction.webhook_create, 'webhook_create', webhook.id)
+            for webhook in created
+        ))
+
+    async def track_nuke_action(self, guild, audit_action, kind, target_id=None, data=None):
+        """Attribue une action destructrice à son auteur et vérifie les seuils"""
+        entry = await self.audit_logs.resolve(guild, audit_action, target_id)
+        if entry is None:
+            return
+        
+        executor_id = entry.executor_id
+        if executor_id in (self.bot.user.id, guild.owner_id):
+            return
+        
+        # Garder de quoi annuler l'action
+        actions = self.nuke_actions.get(guild.id)
+        if actions is None:
+            actions = self.nuke_actions[guild.id] = deque(maxlen=500)
+        actions.append((time.monotonic(), executor_id, kind, data if data is not None else entry.target_id))
+        
+        count = self.nuke_counters.hit(guild.id, executor_id, kind)
+        if count >= self.nuke_thresholds[kind]:
+            await self.handle_nuke(guild, executor_id, kind, count)
+
+    async def handle_nuke(self, guild, executor_id, kind, count):
+        """Neutralise l'auteur d'une attaque et annule ses actions récentes"""
+        key = (guild.id, executor_id)
+        if key in self.nuke_handling:
+            return
+        self.nuke_handling.add(key)
+        reason = f"Anti-nuke: {count} actions {kind} en {self.nuke_config['time_window']}s"
+        
+        try:
+            # Retirer les rôles de l'auteur (un bot, dont le rôle géré ne peut être retiré, est expulsé)
+            stripped = 0
+            member = guild.get_member(executor_id)
+            if member:
+                roles = [role for role in member.roles if not role.is_default() and not role.managed and role < guild.me.top_role]
+                try:
+                    if roles:
+                        await member.remove_roles(*roles, reason=reason)
+                        stripped = len(roles)
+                    if member.bot:
+                        await member.kick(reason=reason)
+                except discord.HTTPException as e:
+                    print(f"Erreur lors de la neutralisation de {executor_id}: {e}")
+            
+            # Actions de l'auteur à annuler
+            cutoff = time.monotonic() - self.nuke_config['revert_window']
+            actions = self.nuke_actions.get(guild.id, deque())
+            reverted = [action for action in actions if action[1] == executor_id and action[0] > cutoff]
+            remaining = [action for action in actions if action[1] != executor_id]
+            actions.clear()
+            actions.extend(remaining)
+            
+            roles_data = [data for _, _, action_kind, data in reverted if action_kind == 'role_delete' and data]
+            channels_data = [data for _, _, action_kind, data in reverted if action_kind == 'channel_delete' and data]
+            rebuilt = await rebuild(guild, roles_data, channels_data, "Anti-nuke: restauration")
+            
+            unbanned = 0
+            for _, _, action_kind, user_id in reverted:
+                if action_kind == 'ban' and user_id:
+                    try:
+                        await guild.unban(discord.Object(id=user_id), reason="Anti-nuke: annulation")
+                        unbanned += 1
+                    except discord.HTTPException:
+                        pass
+            
+            removed_webhooks = 0
+            for _, _, action_kind, webhook_id in reverted:
+                if action_kind == 'webhook_create' and webhook_id:
                     try:
-                        await channel.send(embed=embed)
-                        break
-                    except:
-                        continue
+                        webhook = await self.bot.fetch_webhook(webhook_id)
+                        await webhook.delete(reason="Anti-nuke: annulation")
+                        removed_webhooks += 1
+                    except discord.HTTPException:
+                        pass
+            
+            self.nuke_counters.reset(guild.id, executor_id)
+            
+            embed = discord.Embed(
+                title="☢️ NUKE DÉTECTÉ !",
+                description=f"<@{executor_id}> a effectué **{count}** actions `{kind}` en moins de {self.nuke_config['time_window']} secondes !",
+                color=discord.Color.dark_red()
+            )
+            embed.add_field(name="🔒 Auteur", value=f"**{stripped}** rôle(s) retiré(s)" + (" - bot expulsé" if member and member.bot else ""), inline=False)
+            embed.add_field(
+                name="♻️ Restauration",
+                value=f"**{rebuilt}**/{len(roles_data) + len(channels_data)} rôle(s)/salon(s) recréé(s)\n**{unbanned}** débannissement(s)\n**{removed_webhooks}** webhook(s) supprimé(s)",
+                inline=False
+            )
+            await self.bot.notifier.send(guild, embed)
+            
+            await self.log_raid("nuke", len(reverted), f"Rôles retirés: {stripped}, restaurés: {rebuilt}", reason)
+        finally:
+            self.nuke_handling.discard(key)
 
     # -- COMMANDS --
 
@@ -430,7 +937,7 @@ class Security(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def warnings(self, ctx, member: discord.Member):
         """Affiche les avertissements d'un membre (Admin uniquement)"""
-        warnings = self.get_user_warnings(member.id)
+        warnings = await self.get_user_warnings(ctx.guild.id, member.id)
         
         if not warnings:
             embed = discord.Embed(
@@ -469,18 +976,8 @@ class Security(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def clearwarnings(self, ctx, member: discord.Member):
         """Efface les avertissements d'un membre (Admin uniquement)"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM security_warnings WHERE user_id = ?', (member.id,))
-        deleted_count = cursor.rowcount
-        
-        conn.commit()
-        conn.close()
-        
-        # Réinitialiser les compteurs
-        if member.id in self.spam_warnings:
-            del self.spam_warnings[member.id]
+        # Effacer en base et réinitialiser les scores
+        deleted_count = await self.warning_scores.clear(ctx.guild.id, member.id)
         
         embed = discord.Embed(
             title="✅ Avertissements effacés",
@@ -505,7 +1002,7 @@ class Security(commands.Cog):
         # Anti-spam
         embed.add_field(
             name="🚨 Anti-spam",
-            value=f"**Messages répétés:** {self.spam_config['max_repeated_messages']}\n**Fenêtre:** {self.spam_config['spam_time_window']}s\n**Avertissements:** {self.spam_config['warn_threshold']}\n**Mute:** {self.spam_config['mute_duration']}s\n**Ban:** {self.spam_config['max_warnings']} warns",
+            value=f"**Messages répétés:** {self.spam_config['max_repeated_messages']}\n**Fenêtre:** {self.spam_config['spam_time_window']}s\n**Avertissements:** {self.spam_config['warn_threshold']}\n**Mute:** {self.spam_config['mute_duration']}s\n**Ban:** {self.spam_config['max_warnings']} warns\n**Spam coordonné:** {self.spam_config['coordinated_accounts']} comptes / {self.spam_config['coordinated_time_window']}s\n**Similarité:** {self.spam_config['similarity_threshold']:.0%}",
             inline=True
         )
         
@@ -516,17 +1013,324 @@ class Security(commands.Cog):
             inline=True
         )
         
+        # Anti-nuke
+        snapshot = self.snapshots.get(ctx.guild.id)
+        snapshot_text = f"{len(snapshot['roles'])} rôles, {len(snapshot['channels'])} salons" if snapshot else "Aucun"
+        embed.add_field(
+            name="☢️ Anti-nuke",
+            value=f"**Salons supprimés:** {self.nuke_config['max_channel_deletes']}\n**Rôles supprimés:** {self.nuke_config['max_role_deletes']}\n**Bans:** {self.nuke_config['max_bans']}\n**Webhooks:** {self.nuke_config['max_webhook_creates']}\n**Fenêtre:** {self.nuke_config['time_window']}s\n**Instantané:** {snapshot_text}",
+            inline=True
+        )
+        
+        # Limiteur de débit
+        guild_id = ctx.guild.id
+        pressure = ""
+        for (_, user_id), level in self.user_buckets.pressure(lambda key: key[0] == guild_id, limit=3):
+            pressure += f"<@{user_id}> {level:.0%}\n"
+        for (_, channel_id), level in self.channel_buckets.pressure(lambda key: key[0] == guild_id, limit=3):
+            pressure += f"<#{channel_id}> {level:.0%}\n"
+        embed.add_field(
+            name="⏱️ Débit",
+            value=f"**Membre:** {self.rate_config['user_burst']} msg, +{self.rate_config['user_refill_rate']}/s\n**Salon:** {self.rate_config['channel_burst']} msg, +{self.rate_config['channel_refill_rate']}/s\n**Seaux actifs:** {len(self.user_buckets) + len(self.channel_buckets)}\n**Pression:**\n{pressure or 'Aucune'}",
+            inline=True
+        )
+        
         # Statut
-        status = "🔴 Lockdown actif" if self.raid_lockdown else "🟢 Actif"
+        state = self.guild_states.get(ctx.guild.id)
+        status = "🔴 Lockdown actif" if state.raid_lockdown else "🟢 Actif"
         embed.add_field(
             name="📊 Statut",
-            value=f"**Anti-raid:** {status}\n**Utilisateurs mutés:** {len(self.muted_users)}\n**Avertissements actifs:** {len(self.spam_warnings)}",
+            value=f"**Anti-raid:** {status}\n**Utilisateurs mutés:** {len(state.muted_users)}\n**Démutes programmés:** {self.bot.scheduler.pending('unmute')}\n**Avertissements actifs:** {self.warning_scores.active(ctx.guild.id)}\n**Règles automod:** {len(self.automod.get(ctx.guild.id) or ())}\n**Liste noire:** {sum(self.blocklist.counts(ctx.guild.id).values())} termes",
             inline=False
         )
         
         embed.set_footer(text=f"Demandé par {ctx.author.name}")
         await ctx.send(embed=embed)
 
+    @commands.command(name='raidstats', aliases=['rs'], brief="Compare les arrivées récentes à la référence du serveur")
+    @commands.has_permissions(administrator=True)
+    async def raidstats(self, ctx):
+        """Affiche la référence d'arrivées du serveur face à l'activité en cours (Admin uniquement)"""
+        stats = self.join_monitor.snapshot(ctx.guild.id)
+        if stats is None:
+            embed = discord.Embed(
+                title="📈 Statistiques anti-raid",
+                description="Aucune arrivée enregistrée depuis le démarrage du bot.",
+                color=discord.Color.orange()
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        window = self.raid_config['join_time_window']
+        warmup = self.join_monitor.warmup_buckets
+        embed = discord.Embed(
+            title="📈 Statistiques anti-raid",
+            description="Référence apprise" if stats['warm'] else f"Apprentissage en cours ({stats['buckets_seen']}/{warmup} intervalles), seuil fixe actif",
+            color=discord.Color.blue()
+        )
+        
+        # Débit
+        embed.add_field(
+            name="⏱️ Débit d'arrivées",
+            value=f"**Référence:** {stats['mean']:.2f} ± {stats['std']:.2f} /{window}s\n**Actuel:** {stats['live']:.1f} /{window}s\n**z-score:** {stats['rate_score']:.1f} (seuil {self.raid_config['rate_z_threshold']})",
+            inline=True
+        )
+        
+        # Comptes jeunes
+        young_bins = stats['young_bins']
+        young_limit = f"< {bin_upper_age(young_bins - 1)}j" if young_bins else "aucun"
+        embed.add_field(
+            name="👶 Comptes jeunes",
+            value=f"**Quantile {self.raid_config['age_quantile']:.0%}:** {young_limit}\n**Récents:** {stats['young_recent']:.1f} sur {stats['recent']:.1f}\n**z-score:** {stats['age_score']:.1f} (seuil {self.raid_config['age_z_threshold']})",
+            inline=True
+        )
+        
+        # Distribution des âges (référence / récent)
+        lines = []
+        for index in range(AGE_BINS):
+            reference, recent = stats['long_share'][index], stats['short_share'][index]
+            if reference < 0.005 and recent < 0.005:
+                continue
+            low = bin_upper_age(index - 1) if index else 0
+            label = f"{low}j+" if index == AGE_BINS - 1 else f"{low}-{bin_upper_age(index)}j"
+            lines.append(f"`{label:>11}` {reference:6.1%} | {recent:6.1%}")
+        embed.add_field(
+            name="📊 Âge des comptes (référence | récent)",
+            value="\n".join(lines) or "Aucune donnée",
+            inline=False
+        )
+        
+        state = self.guild_states.peek(ctx.guild.id)
+        embed.add_field(
+            name="📊 Statut",
+            value="🔴 Lockdown actif" if state and state.raid_lockdown else "🟢 Aucun raid en cours",
+            inline=False
+        )
+        
+        embed.set_footer(text=f"Demandé par {ctx.author.name}")
+        await ctx.send(embed=embed)
+
+    @commands.command(name='automod', aliases=['am'], brief="Gère les règles automod du serveur")
+    @commands.has_permissions(administrator=True)
+    async def automod_command(self, ctx, action: str, name: str = None, *, rule: str = None):
+        """Gère les règles automod du serveur (Admin uniquement)"""
+        action = action.lower()
+        
+        if action == "list":
+            rules = await self.automod.list(ctx.guild.id)
+            embed = discord.Embed(
+                title="🤖 Règles automod",
+                description="Aucune règle définie." if not rules else f"{len(rules)} règle(s)",
+                color=discord.Color.blue()
+            )
+            for rule_name, source, enabled in rules[:25]:
+                embed.add_field(
+                    name=f"{'🟢' if enabled else '⚪'} {rule_name}",
+                    value=f"`{source[:1000]}`",
+                    inline=False
+                )
+            await ctx.send(embed=embed)
+            return
+        
+        if action not in ("add", "remove", "toggle"):
+            embed = discord.Embed(
+                title="❌ Action invalide",
+                description="Actions disponibles : `add`, `remove`, `toggle`, `list`",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        if not name or (action == "add" and not rule):
+            usage = "+automod add <nom> <règle>" if action == "add" else f"+automod {action} <nom>"
+            embed = discord.Embed(
+                title="❌ Argument manquant",
+                description=f"Usage: `{usage}`\nExemple: `+automod add invites content ~ /discord\\.gg\\/\\w+/ then delete, warn`",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        if action == "add":
+            try:
+                await self.automod.add(ctx.guild.id, name, rule, ctx.author.id)
+            except RuleSyntaxError as e:
+                embed = discord.Embed(
+                    title="❌ Règle invalide",
+                    description=f"{e}\n\nSyntaxe : `<conditions> then <actions>`\nChamps : `content ~ /regex/`, `content contains \"texte\"`, `mentions`, `links`, `attachments`, `length`, `rate`, `account_age`\nActions : `delete`, `warn`, `mute [secondes]`, `ban`",
+                    color=discord.Color.red()
+                )
+                await ctx.send(embed=embed)
+                return
+            
+            embed = discord.Embed(
+                title="✅ Règle enregistrée",
+                description=f"La règle **{name}** est active.",
+                color=discord.Color.green()
+            )
+            embed.add_field(name="Règle", value=f"`{rule[:1000]}`", inline=False)
+        
+        elif action == "remove":
+            if not await self.automod.remove(ctx.guild.id, name):
+                embed = discord.Embed(
+                    title="❌ Règle introuvable",
+                    description=f"Aucune règle nommée **{name}**.",
+                    color=discord.Color.red()
+                )
+                await ctx.send(embed=embed)
+                return
+            
+            embed = discord.Embed(
+                title="🗑️ Règle supprimée",
+                description=f"La règle **{name}** a été supprimée.",
+                color=discord.Color.green()
+            )
+        
+        else:
+            rules = {rule_name: enabled for rule_name, _, enabled in await self.automod.list(ctx.guild.id)}
+            if name not in rules:
+                embed = discord.Embed(
+                    title="❌ Règle introuvable",
+                    description=f"Aucune règle nommée **{name}**.",
+                    color=discord.Color.red()
+                )
+                await ctx.send(embed=embed)
+                return
+            
+            try:
+                await self.automod.set_enabled(ctx.guild.id, name, not rules[name])
+            except RuleSyntaxError as e:
+                embed = discord.Embed(
+                    title="❌ Règle invalide",
+                    description=str(e),
+                    color=discord.Color.red()
+                )
+                await ctx.send(embed=embed)
+                return
+            
+            embed = discord.Embed(
+                title="🔁 Règle modifiée",
+                description=f"La règle **{name}** est {'désactivée' if rules[name] else 'activée'}.",
+                color=discord.Color.green()
+            )
+        
+        await ctx.send(embed=embed)
+
+    @commands.command(name='filter', aliases=['fl'], brief="Gère la liste noire du serveur")
+    @commands.has_permissions(administrator=True)
+    async def filter_command(self, ctx, action: str, kind: str = None, *, term: str = None):
+        """Gère les mots, domaines et invitations interdits (Admin uniquement)"""
+        action = action.lower()
+        kind = kind.lower() if kind else None
+        kinds_text = ", ".join(f"`{name}`" for name in BLOCKLIST_KINDS)
+        
+        if action not in ("add", "remove", "import", "list", "clear"):
+            embed = discord.Embed(
+                title="❌ Action invalide",
+                description="Actions disponibles : `add`, `remove`, `import`, `list`, `clear`",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        if (kind is not None and kind not in BLOCKLIST_KINDS) or (kind is None and action in ("add", "remove", "import")):
+            embed = discord.Embed(
+                title="❌ Type invalide",
+                description=f"Types disponibles : {kinds_text}\nUsage: `+filter {action} <type> {'<terme>' if action in ('add', 'remove') else ''}`",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        if action == "list":
+            entries = self.blocklist.list(ctx.guild.id, kind)
+            counts = self.blocklist.counts(ctx.guild.id)
+            embed = discord.Embed(
+                title="🚫 Liste noire",
+                description=" | ".join(f"**{name}:** {counts[name]}" for name in BLOCKLIST_KINDS),
+                color=discord.Color.blue()
+            )
+            if entries:
+                lines = [f"`{entry_kind}` {entry_term}" for entry_kind, entry_term in entries[:50]]
+                embed.add_field(name="Termes", value="\n".join(lines)[:1024], inline=False)
+                if len(entries) > 50:
+                    embed.set_footer(text=f"... et {len(entries) - 50} autre(s)")
+            await ctx.send(embed=embed)
+            return
+        
+        if action == "clear":
+            removed = await self.blocklist.clear(ctx.guild.id, kind)
+            embed = discord.Embed(
+                title="🗑️ Liste noire vidée",
+                description=f"**{removed}** terme(s) supprimé(s).",
+                color=discord.Color.green()
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        if action == "import":
+            if not ctx.message.attachments:
+                embed = discord.Embed(
+                    title="❌ Fichier manquant",
+                    description="Joignez un fichier texte (un terme par ligne) à la commande.\nUsage: `+filter import <type>`",
+                    color=discord.Color.red()
+                )
+                await ctx.send(embed=embed)
+                return
+            
+            attachment = ctx.message.attachments[0]
+            if attachment.size > self.spam_config['filter_import_max_size']:
+                embed = discord.Embed(
+                    title="❌ Fichier trop volumineux",
+                    description=f"Taille max : {self.spam_config['filter_import_max_size'] // 1000} Ko",
+                    color=discord.Color.red()
+                )
+                await ctx.send(embed=embed)
+                return
+            
+            terms = parse_import(kind, (await attachment.read()).decode('utf-8', errors='replace'))
+            added = await self.blocklist.add(ctx.guild.id, kind, terms, ctx.author.id)
+            embed = discord.Embed(
+                title="📥 Import terminé",
+                description=f"**{added}** nouveau(x) terme(s) sur {len(terms)} lu(s).",
+                color=discord.Color.green()
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        if not term:
+            embed = discord.Embed(
+                title="❌ Argument manquant",
+                description=f"Usage: `+filter {action} <type> <terme>`",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        if action == "add":
+            added = await self.blocklist.add(ctx.guild.id, kind, [term], ctx.author.id)
+            embed = discord.Embed(
+                title="✅ Terme ajouté" if added else "⚠️ Terme existant",
+                description=f"`{term}` est dans la liste noire ({kind}).",
+                color=discord.Color.green() if added else discord.Color.orange()
+            )
+        
+        elif await self.blocklist.remove(ctx.guild.id, kind, term):
+            embed = discord.Embed(
+                title="🗑️ Terme retiré",
+                description=f"`{term}` n'est plus dans la liste noire ({kind}).",
+                color=discord.Color.green()
+            )
+        
+        else:
+            embed = discord.Embed(
+                title="❌ Terme introuvable",
+                description=f"`{term}` n'est pas dans la liste noire ({kind}).",
+                color=discord.Color.red()
+            )
+        
+        await ctx.send(embed=embed)
+
     @commands.command(name='unmute', aliases=['um'], brief="Démute un membre manuellement")
     @commands.has_permissions(administrator=True)
     async def unmute(self, ctx, member: discord.Member):
@@ -545,9 +1349,11 @@ class Security(commands.Cog):
         try:
             await member.remove_roles(muted_role, reason=f"Démute manuel par {ctx.author.name}")
             
-            # Retirer du tracking
-            if member.id in self.muted_users:
-                del self.muted_users[member.id]
+            # Retirer du tracking et annuler le démute automatique
+            state = self.guild_states.peek(member.guild.id)
+            if state and member.id in state.muted_users:
+                del state.muted_users[member.id]
+            await self.bot.scheduler.cancel('unmute', member.guild.id, member.id)
             
             embed = discord.Embed(
                 title="🔊 Membre démuté",
@@ -577,25 +1383,24 @@ class Security(commands.Cog):
                 current_time = datetime.now()
                 
                 # Nettoyer les utilisateurs mutés expirés
-                expired_mutes = [
-                    user_id for user_id, data in self.muted_users.items()
-                    if data['until'] < current_time
-                ]
-                
-                for user_id in expired_mutes:
-                    del self.muted_users[user_id]
-                
-                # Nettoyer l'historique des messages (garder seulement 1 heure)
-                cutoff_time = current_time - timedelta(hours=1)
-                for user_id in list(self.message_history.keys()):
-                    self.message_history[user_id] = [
-                        msg for msg in self.message_history[user_id]
-                        if msg['timestamp'] > cutoff_time
+                for guild_id, state in self.guild_states.items():
+                    expired_mutes = [
+                        user_id for user_id, data in state.muted_users.items()
+                        if data['until'] < current_time
                     ]
                     
-                    # Supprimer les utilisateurs sans historique
-                    if not self.message_history[user_id]:
-                        del self.message_history[user_id]
+                    for user_id in expired_mutes:
+                        del state.muted_users[user_id]
+                
+                # Supprimer les historiques expirés et libérer les serveurs inactifs
+                self.guild_states.cleanup()
+                self.coordinated_index.cleanup()
+                self.near_duplicates.cleanup()
+                self.user_buckets.cleanup()
+                self.channel_buckets.cleanup()
+                self.nuke_counters.cleanup()
+                self.audit_logs.cleanup()
+                self.automod.cleanup()
                 
                 await asyncio.sleep(300)  # Nettoyer toutes les 5 minutes
                 
@@ -626,6 +1431,9 @@ class Security(commands.Cog):
             await ctx.send(embed=embed)
 
     @security.error
+    @raidstats.error
+    @automod_command.error
+    @filter_command.error
     async def security_error(self, ctx, error):
         if isinstance(error, commands.MissingPermissions):
             embed = discord.Embed(
@@ -0,0 +1 @@
+"""Services partagés par les cogs du bot"""
@@ -0,0 +1,159 @@
+import asyncio
+import time
+from collections import deque
+
+# -- COMPTEURS --
+
+class ExecutorCounters:
+    """Compteurs à fenêtre glissante par (serveur, auteur, type d'action)"""
+
+    def __init__(self, time_window):
+        self.time_window = time_window
+        self.windows = {}  # {(guild_id, executor_id, action): deque([timestamp, ...])}
+
+    def hit(self, guild_id, executor_id, action, now=None):
+        """Enregistre une action et retourne le nombre d'actions dans la fenêtre"""
+        now = time.monotonic() if now is None else now
+        window = self.windows.get((guild_id, executor_id, action))
+        if window is None:
+            window = self.windows[(guild_id, executor_id, action)] = deque()
+
+        window.append(now)
+        while window[0] <= now - self.time_window:
+            window.popleft()
+        return len(window)
+
+    def reset(self, guild_id, executor_id):
+        for key in [key for key in self.windows if key[0] == guild_id and key[1] == executor_id]:
+            del self.windows[key]
+
+    def cleanup(self, now=None):
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.time_window
+        for key in list(self.windows):
+            window = self.windows[key]
+            while window and window[0] <= cutoff:
+                window.popleft()
+            if not window:
+                del self.windows[key]
+
+# -- JOURNAL D'AUDIT --
+
+class AuditEntry:
+    __slots__ = ('entry_id', 'action', 'target_id', 'executor_id', 'seen_at', 'consumed')
+
+    def __init__(self, entry_id, action, target_id, executor_id, seen_at):
+        self.entry_id = entry_id
+        self.action = action
+        self.target_id = target_id
+        self.executor_id = executor_id
+        self.seen_at = seen_at
+        self.consumed = False
+
+class AuditLogAttributor:
+    """Attribution des actions à leur auteur via le journal d'audit
+
+    Les entrées poussées par la gateway (on_audit_log_entry) et celles lues
+    par l'API sont gardées en cache par serveur. Quand une action n'est pas
+    encore dans le cache, les demandes arrivées pendant `batch_delay`
+    secondes sont servies par une seule lecture du journal d'audit.
+    """
+
+    def __init__(self, batch_delay=0.25, attempts=3, max_entries=200, max_age=60):
+        self.batch_delay = batch_delay
+        self.attempts = attempts
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.guilds = {}  # {guild_id: {entry_id: AuditEntry}}
+        self.waiters = {}  # {guild_id: [(action, target_id, future), ...]}
+        self.fetching = {}  # {guild_id: asyncio.Task} lecture du journal en cours
+
+    def record(self, guild_id, entry):
+        """Ajoute une entrée du journal d'audit au cache"""
+        entries = self.guilds.setdefault(guild_id, {})
+        if entry.id in entries or entry.user is None:
+            return
+
+        target_id = getattr(entry.target, 'id', None)
+        entries[entry.id] = AuditEntry(entry.id, entry.action, target_id, entry.user.id, time.monotonic())
+        while len(entries) > self.max_entries:
+            del entries[next(iter(entries))]
+
+        self._wake(guild_id)
+
+    def _match(self, guild_id, action, target_id):
+        """Première entrée non consommée correspondant à l'action (target_id None : n'importe quelle cible)"""
+        cutoff = time.monotonic() - self.max_age
+        for entry in reversed(list(self.guilds.get(guild_id, {}).values())):
+            if entry.consumed or entry.action != action or entry.seen_at < cutoff:
+                continue
+            if target_id is None or entry.target_id == target_id:
+                entry.consumed = True
+                return entry
+        return None
+
+    def _wake(self, guild_id):
+        remaining = []
+        for action, target_id, future in self.waiters.get(guild_id, []):
+            if future.done():
+                continue
+            entry = self._match(guild_id, action, target_id)
+            if entry:
+                future.set_result(entry)
+            else:
+                remaining.append((action, target_id, future))
+        self.waiters[guild_id] = remaining
+
+    async def resolve(self, guild, action, target_id=None):
+        """Retourne l'entrée d'audit (auteur, cible) d'une action, ou None"""
+        entry = self._match(guild.id, action, target_id)
+        if entry:
+            return entry
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(guild.id, []).append((action, target_id, future))
+        if guild.id not in self.fetching:
+            self.fetching[guild.id] = asyncio.create_task(self._fetch(guild))
+        return await future
+
+    async def _fetch(self, guild):
+        """Lit le journal d'audit pour toutes les demandes en attente d'un serveur"""
+        try:
+            for _ in range(self.attempts):
+                await asyncio.sleep(self.batch_delay)
+                if not self.waiters.get(guild.id):
+                    return
+                async for entry in guild.audit_logs(limit=50):
+                    self.record(guild.id, entry)
+                if not self.waiters.get(guild.id):
+                    return
+        except Exception as e:
+            print(f"Erreur lors de la lecture du journal d'audit de {guild.id}: {e}")
+        finally:
+            # Demandes restées sans réponse
+            self.fetching.pop(guild.id, None)
+            for _, _, future in self.waiters.pop(guild.id, []):
+                if not future.done():
+                    future.set_result(None)
+
+    def cleanup(self):
+        cutoff = time.monotonic() - self.max_age
+        for guild_id in list(self.guilds):
+            entries = self.guilds[guild_id]
+            for entry_id in [entry_id for entry_id, entry in entries.items() if entry.seen_at < cutoff]:
+                del entries[entry_id]
+            if not entries and not self.waiters.get(guild_id) and guild_id not in self.fetching:
+                del self.guilds[guild_id]
+
+# -- RESTAURATION --
+
+def index_snapshot(backup_data):
+    """Indexe par identifiant les rôles, catégories et salons d'une sauvegarde"""
+    return {
+        'roles': {role['id']: role for role in backup_data['roles'] if 'id' in role},
+        'channels': {
+            channel['id']: channel
+            for channel in backup_data['categories'] + backup_data['channels']
+            if 'id' in channel
+        }
+    }
@@ -0,0 +1,75 @@
+from collections import deque
+
+class AhoCorasick:
+    """Automate d'Aho-Corasick : recherche de milliers de motifs en une passe
+
+    Construit une fois à partir d'une liste de motifs (déjà normalisés), puis
+    immuable : il peut être reconstruit dans un autre thread et remplacé
+    d'un bloc. scan() parcourt le texte une seule fois, quel que soit le
+    nombre de motifs.
+    """
+
+    __slots__ = ('goto', 'fail', 'outputs', 'patterns')
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)  # Indice = identifiant du motif
+        self.goto = [{}]  # [{caractère: état}, ...]
+        self.fail = [0]
+        outputs = [[]]
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(pattern_id)
+
+        # Liens d'échec en largeur ; chaque état hérite des sorties de son lien
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                outputs[next_state].extend(outputs[self.fail[next_state]])
+
+        self.outputs = [tuple(output) for output in outputs]
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def finditer(self, text):
+        """Génère (position de fin, identifiant du motif) pour chaque occurrence"""
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in outputs[state]:
+                yield index, pattern_id
+
+    def scan(self, text):
+        """Ensemble des identifiants des motifs présents dans le texte"""
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
@@ -0,0 +1,489 @@
+import operator
+import re
+import time
+from bisect import bisect_left, bisect_right
+from collections import deque
+from core.automaton import AhoCorasick
+from core.normalize import normalize
+
+# Syntaxe d'une règle :
+#   <condition> then <action>[, <action>...]
+#   condition : terme, `not`, `and`, `or`, parenthèses
+#   terme     : content ~ /regex/ | content contains "texte" | <champ> <op> <nombre>
+#   champs    : mentions, links, attachments, length, rate, account_age
+#   actions   : delete, warn, mute [secondes], ban
+# Exemple : mentions >= 5 and account_age < 7 then delete, mute 600
+# Le contenu comparé est le texte normalisé du message (core.normalize)
+
+FIELDS = ('mentions', 'links', 'attachments', 'length', 'rate', 'account_age')
+ACTIONS = ('delete', 'warn', 'mute', 'ban')
+COMPARATORS = {
+    '>': operator.gt, '>=': operator.ge, '<': operator.lt,
+    '<=': operator.le, '==': operator.eq, '!=': operator.ne
+}
+
+class RuleSyntaxError(ValueError):
+    """Règle automod invalide"""
+
+# -- ANALYSE --
+
+TOKEN_PATTERN = re.compile(r'''
+    \s*(?:
+        (?P<regex>/(?:\\.|[^/\\])*/[a-z]*)
+      | (?P<string>"(?:\\.|[^"\\])*")
+      | (?P<number>\d+(?:\.\d+)?)
+      | (?P<op>>=|<=|==|!=|>|<|~|\(|\)|,)
+      | (?P<word>[a-z_]+)
+    )''', re.VERBOSE)
+
+def tokenize(source):
+    tokens = []
+    position = 0
+    source = source.strip()
+    while position < len(source):
+        match = TOKEN_PATTERN.match(source, position)
+        if match is None or match.end() == position:
+            raise RuleSyntaxError(f"Caractère inattendu à la position {position + 1} : `{source[position:position + 10]}`")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+        while position < len(source) and source[position].isspace():
+            position += 1
+    return tokens
+
+class Parser:
+    """Analyse une règle en arbre : ('and'|'or', a, b), ('not', a), ('cmp', champ, op, valeur),
+    ('regex', motif, drapeaux), ('contains', texte)"""
+
+    def __init__(self, source):
+        self.tokens = tokenize(source)
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self, kind=None, value=None):
+        token = self.peek()
+        if token[0] is None or (kind and token[0] != kind) or (value and token[1] != value):
+            expected = value or kind or "un élément"
+            raise RuleSyntaxError(f"`{expected}` attendu, trouvé `{token[1] or 'fin de règle'}`")
+        self.position += 1
+        return token[1]
+
+    def parse(self):
+        condition = self.parse_or()
+        self.take('word', 'then')
+        actions = [self.parse_action()]
+        while self.peek() == ('op', ','):
+            self.take()
+            actions.append(self.parse_action())
+        if self.peek()[0] is not None:
+            raise RuleSyntaxError(f"Élément en trop : `{self.peek()[1]}`")
+        return condition, actions
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.peek() == ('word', 'or'):
+            self.take()
+            node = ('or', node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.peek() == ('word', 'and'):
+            self.take()
+            node = ('and', node, self.parse_not())
+        return node
+
+    def parse_not(self):
+        if self.peek() == ('word', 'not'):
+            self.take()
+            return ('not', self.parse_not())
+        if self.peek() == ('op', '('):
+            self.take()
+            node = self.parse_or()
+            self.take('op', ')')
+            return node
+        return self.parse_term()
+
+    def parse_term(self):
+        field = self.take('word')
+        if field == 'content':
+            if self.peek() == ('op', '~'):
+                self.take()
+                literal = self.take('regex')
+                end = literal.rindex('/')
+                pattern, flags = literal[1:end], literal[end + 1:]
+                try:
+                    re.compile(pattern)
+                except re.error as e:
+                    raise RuleSyntaxError(f"Expression régulière invalide : {e}")
+                return ('regex', pattern, flags)
+            self.take('word', 'contains')
+            text = normalize(self.take('string')[1:-1].replace('\\"', '"'))
+            if not text:
+                raise RuleSyntaxError("Texte vide après `contains`")
+            return ('contains', text)
+
+        if field not in FIELDS:
+            raise RuleSyntaxError(f"Champ inconnu `{field}` (champs : content, {', '.join(FIELDS)})")
+        comparator = self.take('op')
+        if comparator not in COMPARATORS:
+            raise RuleSyntaxError(f"Comparateur inconnu `{comparator}`")
+        return ('cmp', field, comparator, float(self.take('number')))
+
+    def parse_action(self):
+        action = self.take('word')
+        if action not in ACTIONS:
+            raise RuleSyntaxError(f"Action inconnue `{action}` (actions : {', '.join(ACTIONS)})")
+        if action == 'mute' and self.peek()[0] == 'number':
+            return (action, int(float(self.take())))
+        return (action, None)
+
+def _class_end(pattern, index):
+    """Indice suivant la classe de caractères ouverte en `index` (None si non fermée)"""
+    index += 1
+    if index < len(pattern) and pattern[index] == '^':
+        index += 1
+    if index < len(pattern) and pattern[index] == ']':
+        index += 1  # ']' en tête de classe est littéral
+    while index < len(pattern):
+        if pattern[index] == '\\':
+            index += 2
+            continue
+        if pattern[index] == ']':
+            return index + 1
+        index += 1
+    return None
+
+def required_literal(pattern):
+    """Plus long texte littéral qu'une regex impose dans toute correspondance ('' si aucun)
+
+    Seuls les échappements de ponctuation (\\. \\+ ...) prolongent un texte
+    littéral ; les autres (\\d, \\x69 ...) l'interrompent. Un motif que
+    l'analyse ne sait pas découper donne '' (règle évaluée sur tous les
+    messages).
+    """
+    best, run, depth, index = '', '', 0, 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == '|' and depth == 0:
+            return ''
+        if char == '\\':
+            if index + 1 >= len(pattern):
+                return ''
+            escaped = pattern[index + 1]
+            index += 2
+            if escaped.isascii() and not escaped.isalnum() and not depth:
+                run += escaped
+                continue
+            best, run = max(best, run, key=len), ''
+            if escaped in 'xuU':
+                index += {'x': 2, 'u': 4, 'U': 8}[escaped]  # Code hexadécimal
+            elif escaped == 'N':
+                closing = pattern.find('}', index)
+                if closing == -1:
+                    return ''
+                index = closing + 1
+            elif escaped.isdigit():
+                return ''  # Octal ou référence arrière : longueur ambiguë
+            continue
+        if char == '[':
+            index = _class_end(pattern, index)
+            if index is None:
+                return ''
+            best, run = max(best, run, key=len), ''
+            continue
+        if char in '*?{':
+            run = run[:-1]  # Le caractère précédent est facultatif
+        if char == '{':
+            closing = pattern.find('}', index)
+            index = closing + 1 if closing != -1 else len(pattern)
+            best, run = max(best, run, key=len), ''
+            continue
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth = max(0, depth - 1)
+        if char in '.^$*+?{}()' or depth:
+            best, run = max(best, run, key=len), ''
+        else:
+            run += char
+        index += 1
+    return max(best, run, key=len).lower()
+
+# -- COMPILATION --
+
+class MessageFacts:
+    """Valeurs d'un message utilisées par les règles"""
+
+    __slots__ = ('content', 'mentions', 'links', 'attachments', 'length', 'rate', 'account_age', 'hits')
+
+    def __init__(self, content, mentions=0, links=0, attachments=0, rate=0, account_age=0.0):
+        self.content = content
+        self.mentions = mentions
+        self.links = links
+        self.attachments = attachments
+        self.length = len(content)
+        self.rate = rate
+        self.account_age = account_age
+        self.hits = ()  # Motifs littéraux trouvés par l'automate
+
+class CompiledRule:
+    __slots__ = ('rule_id', 'name', 'source', 'predicate', 'actions')
+
+    def __init__(self, rule_id, name, source, predicate, actions):
+        self.rule_id = rule_id
+        self.name = name
+        self.source = source
+        self.predicate = predicate
+        self.actions = actions
+
+class RuleSet:
+    """Règles compilées d'un serveur
+
+    Chaque règle devient une fermeture Python. Pour que le coût par message
+    ne dépende pas du nombre de règles, chaque règle est indexée par une
+    condition nécessaire (ancre) :
+    - un texte littéral (contains, ou littéral imposé par une regex), cherché
+      par un seul automate d'Aho-Corasick commun à toutes les règles ;
+    - un seuil numérique, rangé dans une liste triée parcourue par bisection.
+    Seules les règles dont l'ancre est satisfaite sont évaluées ; les règles
+    sans ancre possible (`not`, `!=`...) le sont à chaque message.
+    """
+
+    def __init__(self, rules):
+        self.rules = []
+        self.literals = {}  # {texte: identifiant}
+        self.literal_rules = {}  # {identifiant: [indices de règles]}
+        self.thresholds = {}  # {(champ, op): ([seuils triés], [indices de règles])}
+        self.equalities = {}  # {(champ, valeur): [indices de règles]}
+        self.always = []  # Règles sans ancre
+        self.uses_rate = False
+
+        for rule_id, name, source in rules:
+            condition, actions = Parser(source).parse()
+            index = len(self.rules)
+            self.rules.append(CompiledRule(rule_id, name, source, self.compile(condition), actions))
+            for anchor in self.anchors(condition) or [None]:
+                self.register(anchor, index)
+
+        self.automaton = AhoCorasick(list(self.literals)) if self.literals else None
+        self.thresholds = {
+            key: ([value for value, _ in entries], [index for _, index in entries])
+            for key, entries in ((key, sorted(entries)) for key, entries in self.thresholds.items())
+        }
+
+    def __len__(self):
+        return len(self.rules)
+
+    def literal_id(self, text):
+        if text not in self.literals:
+            self.literals[text] = len(self.literals)
+        return self.literals[text]
+
+    def compile(self, node):
+        """Transforme un nœud de l'arbre en prédicat facts -> bool"""
+        kind = node[0]
+        if kind == 'and':
+            left, right = self.compile(node[1]), self.compile(node[2])
+            return lambda facts: left(facts) and right(facts)
+        if kind == 'or':
+            left, right = self.compile(node[1]), self.compile(node[2])
+            return lambda facts: left(facts) or right(facts)
+        if kind == 'not':
+            inner = self.compile(node[1])
+            return lambda facts: not inner(facts)
+        if kind == 'cmp':
+            _, field, comparator, value = node
+            if field == 'rate':
+                self.uses_rate = True
+            compare = COMPARATORS[comparator]
+            return lambda facts: compare(getattr(facts, field), value)
+        if kind == 'contains':
+            literal_id = self.literal_id(node[1])
+            return lambda facts: literal_id in facts.hits
+        # regex : vérifiée seulement si son littéral imposé est présent
+        pattern = re.compile(node[1], re.IGNORECASE | (re.DOTALL if 's' in node[2] else 0))
+        literal = required_literal(node[1])
+        if literal:
+            literal_id = self.literal_id(literal)
+            return lambda facts: literal_id in facts.hits and pattern.search(facts.content) is not None
+        return lambda facts: pattern.search(facts.content) is not None
+
+    def anchors(self, node):
+        """Conditions nécessaires indexables d'une règle (liste vide : pas d'ancre)"""
+        kind = node[0]
+        if kind == 'and':
+            # Une seule ancre suffit ; préférer un littéral, plus sélectif
+            options = [self.anchors(node[1]), self.anchors(node[2])]
+            options = [option for option in options if option]
+            options.sort(key=lambda option: not all(anchor[0] == 'literal' for anchor in option))
+            return options[0] if options else []
+        if kind == 'or':
+            left, right = self.anchors(node[1]), self.anchors(node[2])
+            return left + right if left and right else []
+        if kind == 'cmp':
+            _, field, comparator, value = node
+            if comparator == '==':
+                return [('equal', field, value)]
+            if comparator != '!=':
+                return [('threshold', field, comparator, value)]
+            return []
+        if kind == 'contains':
+            return [('literal', self.literals[node[1]])]
+        if kind == 'regex':
+            literal = required_literal(node[1])
+            return [('literal', self.literals[literal])] if literal else []
+        return []
+
+    def register(self, anchor, index):
+        if anchor is None:
+            self.always.append(index)
+        elif anchor[0] == 'literal':
+            self.literal_rules.setdefault(anchor[1], []).append(index)
+        elif anchor[0] == 'equal':
+            self.equalities.setdefault((anchor[1], anchor[2]), []).append(index)
+        else:
+            _, field, comparator, value = anchor
+            self.thresholds.setdefault((field, comparator), []).append((value, index))
+
+    def candidates(self, facts):
+        """Indices des règles dont une condition nécessaire est remplie"""
+        found = set(self.always)
+
+        for literal_id in facts.hits:
+            found.update(self.literal_rules.get(literal_id, ()))
+
+        for (field, comparator), (values, indexes) in self.thresholds.items():
+            value = getattr(facts, field)
+            if comparator == '>':
+                found.update(indexes[:bisect_left(values, value)])
+            elif comparator == '>=':
+                found.update(indexes[:bisect_right(values, value)])
+            elif comparator == '<':
+                found.update(indexes[bisect_right(values, value):])
+            else:
+                found.update(indexes[bisect_left(values, value):])
+
+        for field in FIELDS:
+            found.update(self.equalities.get((field, float(getattr(facts, field))), ()))
+        return found
+
+    def evaluate(self, facts):
+        """Retourne les règles déclenchées par un message"""
+        if self.automaton is not None:
+            facts.hits = self.automaton.scan(facts.content)
+
+        return [
+            self.rules[index]
+            for index in sorted(self.candidates(facts))
+            if self.rules[index].predicate(facts)
+        ]
+
+# -- STOCKAGE --
+
+class RuleEngine:
+    """Règles automod par serveur, stockées dans `automod_rules`
+
+    Les règles de tous les serveurs sont compilées au démarrage ; seules
+    celles d'un serveur modifié sont recompilées.
+    """
+
+    def __init__(self, db, rate_window=10, max_rate_entries=50000):
+        self.db = db
+        self.rate_window = rate_window
+        self.max_rate_entries = max_rate_entries
+        self.rulesets = {}  # {guild_id: RuleSet}
+        self.recent = {}  # {(guild_id, user_id): deque([timestamp, ...])} pour le champ rate
+
+        self.db.setup('''
+            CREATE TABLE IF NOT EXISTS automod_rules (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                source TEXT NOT NULL,
+                enabled INTEGER NOT NULL DEFAULT 1,
+                created_by INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (guild_id, name)
+            )
+        ''')
+        self.load()
+
+    def load(self):
+        """Compile les règles de tous les serveurs (bloquant, au démarrage)"""
+        rows = self.db.submit(lambda conn: conn.execute('''
+            SELECT guild_id, id, name, source FROM automod_rules WHERE enabled = 1 ORDER BY id
+        ''').fetchall()).result()
+
+        by_guild = {}
+        for guild_id, rule_id, name, source in rows:
+            by_guild.setdefault(guild_id, []).append((rule_id, name, source))
+        for guild_id, rules in by_guild.items():
+            try:
+                self.rulesets[guild_id] = RuleSet(rules)
+            except RuleSyntaxError as e:
+                print(f"Règles automod invalides pour {guild_id}: {e}")
+
+    async def recompile(self, guild_id):
+        rules = await self.db.query('''
+            SELECT id, name, source FROM automod_rules WHERE guild_id = ? AND enabled = 1 ORDER BY id
+        ''', (guild_id,))
+        if rules:
+            self.rulesets[guild_id] = RuleSet(rules)
+        else:
+            self.rulesets.pop(guild_id, None)
+
+    async def add(self, guild_id, name, source, created_by):
+        """Ajoute ou remplace une règle (RuleSyntaxError si elle est invalide)"""
+        Parser(source).parse()
+        await self.db.execute('''
+            INSERT OR REPLACE INTO automod_rules (guild_id, name, source, enabled, created_by)
+            VALUES (?, ?, ?, 1, ?)
+        ''', (guild_id, name, source, created_by))
+        await self.recompile(guild_id)
+
+    async def remove(self, guild_id, name):
+        deleted = await self.db.execute('DELETE FROM automod_rules WHERE guild_id = ? AND name = ?', (guild_id, name))
+        if deleted:
+            await self.recompile(guild_id)
+        return deleted > 0
+
+    async def set_enabled(self, guild_id, name, enabled):
+        updated = await self.db.execute('''
+            UPDATE automod_rules SET enabled = ? WHERE guild_id = ? AND name = ?
+        ''', (1 if enabled else 0, guild_id, name))
+        if updated:
+            await self.recompile(guild_id)
+        return updated > 0
+
+    async def list(self, guild_id):
+        return await self.db.query('''
+            SELECT name, source, enabled FROM automod_rules WHERE guild_id = ? ORDER BY name
+        ''', (guild_id,))
+
+    def get(self, guild_id):
+        return self.rulesets.get(guild_id)
+
+    def rate(self, guild_id, user_id, now=None):
+        """Enregistre un message et retourne le nombre de messages du membre dans la fenêtre"""
+        now = time.monotonic() if now is None else now
+        window = self.recent.pop((guild_id, user_id), None)
+        if window is None:
+            window = deque(maxlen=100)
+            if len(self.recent) >= self.max_rate_entries:
+                del self.recent[next(iter(self.recent))]
+        self.recent[(guild_id, user_id)] = window  # Déplacé en fin d'ordre d'accès
+
+        window.append(now)
+        while window[0] <= now - self.rate_window:
+            window.popleft()
+        return len(window)
+
+    def cleanup(self, now=None):
+        now = time.monotonic() if now is None else now
+        for key in list(self.recent):
+            if self.recent[key][-1] > now - self.rate_window:
+                break
+            del self.recent[key]
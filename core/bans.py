@@ -0,0 +1,218 @@
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+import discord
+
+class BanJob:
+    """Lot de bannissements d'un serveur et son avancement"""
+
+    def __init__(self, guild, user_ids, reason, source):
+        self.guild = guild
+        self.user_ids = user_ids
+        self.reason = reason
+        self.source = source
+        self.results = {}  # {user_id: (statut, erreur)} statut: banned, forbidden, not_found, failed
+        self.started_at = time.monotonic()
+        self.done = asyncio.Event()
+
+    @property
+    def total(self):
+        return len(self.user_ids)
+
+    @property
+    def banned(self):
+        return sum(1 for status, _ in self.results.values() if status == 'banned')
+
+    @property
+    def failed(self):
+        return len(self.results) - self.banned
+
+    @property
+    def finished(self):
+        return self.done.is_set()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+    def record(self, user_id, status, error=None):
+        self.results[user_id] = (status, error)
+        if len(self.results) == self.total:
+            self.done.set()
+
+    async def wait(self):
+        await self.done.wait()
+        return self
+
+class GuildBanLane:
+    """File de bannissements d'un serveur (une route, un seau de limite)"""
+
+    __slots__ = ('queue', 'workers', 'paused_until')
+
+    def __init__(self):
+        self.queue = deque()  # [(job, user_id, tentative), ...]
+        self.workers = 0
+        self.paused_until = 0.0
+
+class BanPipeline:
+    """Bannissements en masse, concurrents et respectueux des limites de Discord
+
+    Les bannissements d'un serveur partagent le même seau de limite de débit
+    (route PUT /guilds/{guild_id}/bans/{user_id}) : chaque serveur a sa file
+    servie par au plus `concurrency` tâches. Un 429 met toute la file en
+    pause pendant le délai annoncé puis l'utilisateur est remis en file.
+    Les bannissements passent par l'identifiant (discord.Object), sans appel
+    à fetch_user ni parcours des serveurs. Chaque résultat est enregistré
+    dans la table `ban_logs`.
+    """
+
+    def __init__(self, db, concurrency=5, max_retries=3, progress_interval=1.5, recent_window=300):
+        self.db = db
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.progress_interval = progress_interval
+        self.recent_window = recent_window  # Durée (secondes) pendant laquelle un bannissement terminé reste connu
+        self.lanes = {}  # {guild_id: GuildBanLane}
+        self.issued_bans = {}  # {(guild_id, user_id): fin du lot, None tant qu'il est en cours}
+        self.tasks = set()  # Tâches des files et des lots en cours
+
+        self.db.setup('''
+            CREATE TABLE IF NOT EXISTS ban_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                reason TEXT,
+                status TEXT NOT NULL,
+                error TEXT,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+    def pending(self, guild_id=None):
+        """Nombre de bannissements en file (éventuellement d'un seul serveur)"""
+        if guild_id is not None:
+            lane = self.lanes.get(guild_id)
+            return len(lane.queue) if lane else 0
+        return sum(len(lane.queue) for lane in self.lanes.values())
+
+    def issued(self, guild_id, user_id):
+        """Vrai si le bannissement vient de ce pipeline (en cours ou terminé récemment)"""
+        if (guild_id, user_id) not in self.issued_bans:
+            return False
+        finished_at = self.issued_bans[(guild_id, user_id)]
+        return finished_at is None or time.monotonic() - finished_at < self.recent_window
+
+    def submit(self, guild, user_ids, reason, source='manual', progress=None):
+        """Met un lot en file et retourne son BanJob
+
+        progress(job) est appelée au plus toutes les `progress_interval`
+        secondes pendant le traitement, puis une dernière fois à la fin.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        job = BanJob(guild, user_ids, reason, source)
+        if not user_ids:
+            job.done.set()
+            return job
+
+        lane = self.lanes.get(guild.id)
+        if lane is None:
+            lane = self.lanes[guild.id] = GuildBanLane()
+        lane.queue.extend((job, user_id, 0) for user_id in user_ids)
+        for user_id in user_ids:
+            self.issued_bans[(guild.id, user_id)] = None
+
+        while lane.workers < min(self.concurrency, len(lane.queue)):
+            lane.workers += 1
+            self._start(self._worker(guild.id, lane))
+
+        self._start(self._finish(job, progress))
+        return job
+
+    def _start(self, coro):
+        """Lance une tâche en gardant une référence jusqu'à sa fin"""
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def ban(self, guild, user_id, reason, source='manual'):
+        """Bannit un seul utilisateur et retourne (statut, erreur)"""
+        job = await self.submit(guild, [user_id], reason, source).wait()
+        return job.results[user_id]
+
+    async def _worker(self, guild_id, lane):
+        try:
+            while lane.queue:
+                delay = lane.paused_until - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+
+                job, user_id, attempt = lane.queue.popleft()
+                await self._ban_one(lane, job, user_id, attempt)
+        finally:
+            lane.workers -= 1
+            if not lane.workers and not lane.queue and self.lanes.get(guild_id) is lane:
+                del self.lanes[guild_id]
+
+    async def _ban_one(self, lane, job, user_id, attempt):
+        try:
+            await job.guild.ban(discord.Object(id=user_id), reason=job.reason)
+            job.record(user_id, 'banned')
+        except discord.NotFound:
+            job.record(user_id, 'not_found', "Utilisateur introuvable")
+        except discord.Forbidden:
+            job.record(user_id, 'forbidden', "Permission insuffisante")
+        except discord.HTTPException as e:
+            if (e.status == 429 or e.status >= 500) and attempt < self.max_retries:
+                # Mettre la route en pause puis réessayer
+                retry_after = self._retry_after(e, attempt)
+                lane.paused_until = max(lane.paused_until, time.monotonic() + retry_after)
+                lane.queue.append((job, user_id, attempt + 1))
+                return
+            job.record(user_id, 'failed', str(e))
+        except Exception as e:
+            job.record(user_id, 'failed', str(e))
+
+    @staticmethod
+    def _retry_after(error, attempt):
+        """Délai annoncé par Discord, sinon attente exponentielle"""
+        try:
+            return float(error.response.headers.get('Retry-After'))
+        except (AttributeError, TypeError, ValueError):
+            return 2 ** attempt
+
+    async def _finish(self, job, progress):
+        """Publie l'avancement d'un lot puis enregistre ses résultats"""
+        while not job.finished:
+            try:
+                await asyncio.wait_for(job.done.wait(), self.progress_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            if progress is not None:
+                try:
+                    await progress(job)
+                except Exception as e:
+                    print(f"Erreur lors de l'avancement des bannissements: {e}")
+
+        # Bannissements connus pendant `recent_window` secondes après la fin du lot
+        finished_at = time.monotonic()
+        for user_id in job.user_ids:
+            self.issued_bans[(job.guild.id, user_id)] = finished_at
+        cutoff = finished_at - self.recent_window
+        for key in [key for key, value in self.issued_bans.items() if value is not None and value < cutoff]:
+            del self.issued_bans[key]
+
+        now = datetime.now()
+        try:
+            await self.db.executemany('''
+                INSERT INTO ban_logs (guild_id, user_id, source, reason, status, error, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (job.guild.id, user_id, job.source, job.reason, status, error, now)
+                for user_id, (status, error) in job.results.items()
+            ])
+        except Exception as e:
+            print(f"Erreur lors de l'enregistrement des bannissements: {e}")
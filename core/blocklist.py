@@ -0,0 +1,291 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from core.automaton import AhoCorasick
+from core.normalize import normalize
+
+KINDS = ('word', 'domain', 'invite')
+INVITE_PREFIXES = ('discord.gg/', 'discord.com/invite/', 'discordapp.com/invite/')
+
+def normalize_term(kind, term):
+    """Forme stockée d'un terme (normalisée, sans schéma ni préfixe d'invitation)"""
+    term = normalize(term)
+    if kind == 'domain':
+        for scheme in ('https://', 'http://'):
+            if term.startswith(scheme):
+                term = term[len(scheme):]
+        term = term.split('/', 1)[0]
+        if term.startswith('www.'):
+            term = term[4:]
+    elif kind == 'invite':
+        for prefix in ('https://', 'http://') + INVITE_PREFIXES:
+            if term.startswith(prefix):
+                term = term[len(prefix):]
+    return term
+
+def parse_import(kind, text):
+    """Termes d'un fichier texte : un par ligne, `#` pour les commentaires
+
+    Les listes de domaines au format hosts (`0.0.0.0 exemple.com`) sont
+    acceptées : seul le dernier mot de la ligne est gardé.
+    """
+    terms = set()
+    for line in text.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        if kind != 'word':
+            line = line.split()[-1]
+        term = normalize_term(kind, line)
+        if term:
+            terms.add(term)
+    return terms
+
+class CompiledFilter:
+    """Automate d'un serveur : chaque motif renvoie vers son (type, terme)"""
+
+    __slots__ = ('automaton', 'entries')
+
+    def __init__(self, terms):
+        patterns, self.entries = [], []
+        for kind, term in sorted(terms):
+            if kind == 'invite':
+                for prefix in INVITE_PREFIXES:
+                    patterns.append(prefix + term)
+                    self.entries.append((kind, term))
+            else:
+                patterns.append(term)
+                self.entries.append((kind, term))
+        self.automaton = AhoCorasick(patterns)
+
+    def match(self, content):
+        """Premier terme interdit présent dans le contenu normalisé, ou None"""
+        for _, kind, term in self.matches(content):
+            return kind, term
+        return None
+
+    def matches(self, content):
+        """Génère (position de fin, type, terme) pour chaque terme interdit du contenu normalisé"""
+        patterns = self.automaton.patterns
+        for end, pattern_id in self.automaton.finditer(content):
+            kind, term = self.entries[pattern_id]
+            start = end - len(patterns[pattern_id]) + 1
+            before = content[start - 1] if start > 0 else ' '
+            after = content[end + 1] if end + 1 < len(content) else ' '
+
+            if kind == 'word':
+                # Mot entier uniquement (« con » ne bloque pas « conseil »)
+                if before.isalnum() or after.isalnum():
+                    continue
+            elif kind == 'domain':
+                # Le domaine ou un sous-domaine, pas « exemple.com.evil » ni « pasexemple.com »
+                following = content[end + 2] if end + 2 < len(content) else ' '
+                if before.isalnum() or before == '-' or after.isalnum() or after == '-':
+                    continue
+                if after == '.' and following.isalnum():
+                    continue
+            elif after.isalnum() or after in '-_':
+                # Code d'invitation complet
+                continue
+            yield end, kind, term
+
+class GuildFilter:
+    """Automates d'un serveur : l'automate principal et celui des termes ajoutés depuis
+
+    Un ajout ne recompile que le petit automate des termes ajoutés ; une
+    suppression ne recompile rien, les termes retirés de l'automate
+    principal étant ignorés à la lecture.
+    """
+
+    __slots__ = ('base', 'base_terms', 'added', 'removed', 'delta')
+
+    def __init__(self, base=None, base_terms=frozenset()):
+        self.base = base  # CompiledFilter de base_terms (None avant la première compilation)
+        self.base_terms = base_terms
+        self.added = set()  # {(kind, term)} ajoutés depuis la compilation de base
+        self.removed = set()  # {(kind, term)} de base_terms retirés depuis
+        self.delta = None  # CompiledFilter de added
+
+class Blocklist:
+    """Mots, domaines et invitations interdits par serveur
+
+    Les termes sont stockés dans `blocklist_terms` et gardés en mémoire. Chaque
+    serveur a son propre automate d'Aho-Corasick : un message normalisé est
+    comparé à toute la liste en un seul passage. Les modifications sont
+    incrémentales : un ajout recompile seulement l'automate des termes
+    ajoutés (au plus `delta_max`), une suppression masque le terme. Quand
+    les ajouts ou les suppressions accumulés dépassent ces limites,
+    l'automate du serveur est recompilé en entier dans un thread dédié ;
+    l'ancien reste utilisé jusqu'au remplacement.
+    """
+
+    def __init__(self, db, delta_max=256, compact_ratio=0.25):
+        self.db = db
+        self.delta_max = delta_max  # Termes ajoutés au-delà desquels l'automate est recompilé en entier
+        self.compact_ratio = compact_ratio  # Part de termes retirés au-delà de laquelle il est recompilé
+        self.terms = {}  # {guild_id: {(kind, term), ...}}
+        self.filters = {}  # {guild_id: GuildFilter}
+        self.compacting = {}  # {guild_id: asyncio.Task} recompilation en cours
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='blocklist')
+
+        self.db.setup('''
+            CREATE TABLE IF NOT EXISTS blocklist_terms (
+                guild_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                term TEXT NOT NULL,
+                added_by INTEGER,
+                added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (guild_id, kind, term)
+            )
+        ''')
+
+        rows = self.db.submit(lambda conn: conn.execute('SELECT guild_id, kind, term FROM blocklist_terms').fetchall()).result()
+        for guild_id, kind, term in rows:
+            self.terms.setdefault(guild_id, set()).add((kind, term))
+
+    async def start(self):
+        """Construit les automates de tous les serveurs au démarrage"""
+        for guild_id in list(self.terms):
+            await self.compact(guild_id)
+
+    def close(self):
+        for task in self.compacting.values():
+            task.cancel()
+        self.executor.shutdown(wait=False)
+
+    # -- RECONSTRUCTION --
+
+    def needs_compaction(self, compiled):
+        return len(compiled.added) > self.delta_max or len(compiled.removed) > len(compiled.base_terms) * self.compact_ratio
+
+    def _apply(self, guild_id, added=(), removed=()):
+        """Répercute des ajouts et suppressions sur les automates d'un serveur"""
+        if not self.terms.get(guild_id):
+            self.filters.pop(guild_id, None)
+            return
+
+        compiled = self.filters.get(guild_id)
+        if compiled is None:
+            compiled = self.filters[guild_id] = GuildFilter()
+
+        delta_changed = False
+        for entry in added:
+            if entry in compiled.base_terms:
+                compiled.removed.discard(entry)
+            else:
+                compiled.added.add(entry)
+                delta_changed = True
+        for entry in removed:
+            if entry in compiled.added:
+                compiled.added.discard(entry)
+                delta_changed = True
+            elif entry in compiled.base_terms:
+                compiled.removed.add(entry)
+
+        if delta_changed and len(compiled.added) <= self.delta_max:
+            compiled.delta = CompiledFilter(compiled.added) if compiled.added else None
+        if self.needs_compaction(compiled):
+            self.compact(guild_id)
+
+    def compact(self, guild_id):
+        """Recompile en entier l'automate d'un serveur en arrière-plan, retourne la tâche"""
+        task = self.compacting.get(guild_id)
+        if task is None:
+            task = self.compacting[guild_id] = asyncio.create_task(self._compact(guild_id))
+        return task
+
+    async def _compact(self, guild_id):
+        try:
+            loop = asyncio.get_running_loop()
+            while True:
+                terms = frozenset(self.terms.get(guild_id, ()))
+                base = await loop.run_in_executor(self.executor, CompiledFilter, terms) if terms else None
+
+                # Modifications reçues pendant la compilation
+                live = self.terms.get(guild_id)
+                if not live:
+                    self.filters.pop(guild_id, None)
+                    break
+                compiled = GuildFilter(base, terms)
+                compiled.added = live - terms
+                compiled.removed = set(terms - live)
+                if compiled.added and len(compiled.added) <= self.delta_max:
+                    compiled.delta = CompiledFilter(compiled.added)
+                self.filters[guild_id] = compiled
+                if not self.needs_compaction(compiled):
+                    break
+        except Exception as e:
+            print(f"Erreur lors de la reconstruction de la liste noire de {guild_id}: {e}")
+        finally:
+            self.compacting.pop(guild_id, None)
+
+    # -- MODIFICATIONS --
+
+    async def add(self, guild_id, kind, terms, added_by=None):
+        """Ajoute des termes, retourne le nombre de nouveaux termes"""
+        known = self.terms.setdefault(guild_id, set())
+        new_terms = [term for term in {normalize_term(kind, term) for term in terms} if term and (kind, term) not in known]
+        if not new_terms:
+            return 0
+
+        await self.db.executemany('''
+            INSERT OR IGNORE INTO blocklist_terms (guild_id, kind, term, added_by) VALUES (?, ?, ?, ?)
+        ''', [(guild_id, kind, term, added_by) for term in new_terms])
+        entries = [(kind, term) for term in new_terms]
+        known.update(entries)
+        self._apply(guild_id, added=entries)
+        return len(new_terms)
+
+    async def remove(self, guild_id, kind, term):
+        term = normalize_term(kind, term)
+        known = self.terms.get(guild_id, set())
+        if (kind, term) not in known:
+            return False
+
+        await self.db.execute('DELETE FROM blocklist_terms WHERE guild_id = ? AND kind = ? AND term = ?', (guild_id, kind, term))
+        known.discard((kind, term))
+        self._apply(guild_id, removed=[(kind, term)])
+        return True
+
+    async def clear(self, guild_id, kind=None):
+        """Supprime tous les termes (d'un type), retourne le nombre supprimé"""
+        known = self.terms.get(guild_id, set())
+        removed = {entry for entry in known if kind is None or entry[0] == kind}
+        if not removed:
+            return 0
+
+        if kind is None:
+            await self.db.execute('DELETE FROM blocklist_terms WHERE guild_id = ?', (guild_id,))
+        else:
+            await self.db.execute('DELETE FROM blocklist_terms WHERE guild_id = ? AND kind = ?', (guild_id, kind))
+        known -= removed
+        self._apply(guild_id, removed=removed)
+        return len(removed)
+
+    # -- LECTURE --
+
+    def list(self, guild_id, kind=None):
+        return sorted(entry for entry in self.terms.get(guild_id, ()) if kind is None or entry[0] == kind)
+
+    def counts(self, guild_id):
+        counts = dict.fromkeys(KINDS, 0)
+        for kind, _ in self.terms.get(guild_id, ()):
+            counts[kind] += 1
+        return counts
+
+    def match(self, guild_id, content):
+        """Premier (type, terme) interdit trouvé dans le contenu, ou None"""
+        compiled = self.filters.get(guild_id)
+        if compiled is None:
+            return None
+
+        live = self.terms.get(guild_id, ())
+        found = None
+        for automaton in (compiled.base, compiled.delta):
+            if automaton is None:
+                continue
+            for end, kind, term in automaton.matches(content):
+                if (kind, term) in live:
+                    if found is None or end < found[0]:
+                        found = (end, kind, term)
+                    break
+        return found[1:] if found else None
@@ -0,0 +1,147 @@
+import argparse
+import json
+import random
+import time
+import numpy as np
+
+# Table des gains du casino : montant tiré uniformément entre min et max (négatif = perte)
+DEFAULT_PAYOUTS = [
+    {'name': 'win', 'probability': 0.4, 'min': 50, 'max': 200, 'emoji': '🎉', 'color': 0x00ff00},
+    {'name': 'small_loss', 'probability': 0.3, 'min': -50, 'max': -10, 'emoji': '😐', 'color': 0xffa500},
+    {'name': 'big_loss', 'probability': 0.3, 'min': -150, 'max': -50, 'emoji': '💸', 'color': 0xff0000}
+]
+
+class PayoutSpec:
+    """Table des gains du casino, partagée par la commande et le simulateur"""
+
+    def __init__(self, payouts):
+        if not isinstance(payouts, (list, tuple)):
+            raise ValueError(f"La table des gains du casino doit être une liste d'issues, pas {type(payouts).__name__}")
+        self.payouts = [self.check(payout) for payout in payouts]
+        if not self.payouts:
+            raise ValueError("La table des gains du casino est vide")
+        total = sum(payout['probability'] for payout in self.payouts)
+        if abs(total - 1) > 1e-9:
+            raise ValueError(f"La somme des probabilités du casino vaut {total}, au lieu de 1")
+
+        self.probabilities = np.array([payout['probability'] for payout in self.payouts])
+        self.cumulative = np.cumsum(self.probabilities)
+        self.cumulative[-1] = 1.0
+        self.low = np.array([payout['min'] for payout in self.payouts], dtype=np.int64)
+        self.high = np.array([payout['max'] for payout in self.payouts], dtype=np.int64)
+
+    @staticmethod
+    def check(payout):
+        """Valide une issue et complète l'emoji et la couleur (selon le signe du gain) s'ils manquent"""
+        if not isinstance(payout, dict):
+            raise ValueError(f"Issue de casino invalide : {payout!r}")
+        name = payout.get('name')
+        if not isinstance(name, str) or not name:
+            raise ValueError(f"Issue de casino sans nom : {payout!r}")
+        for key in ('probability', 'min', 'max'):
+            if key not in payout:
+                raise ValueError(f"Issue de casino {name} : champ {key} manquant")
+        if not all(isinstance(payout[key], int) and not isinstance(payout[key], bool) for key in ('min', 'max')):
+            raise ValueError(f"Issue de casino {name} : min et max doivent être des entiers")
+        if not isinstance(payout['probability'], (int, float)) or payout['probability'] < 0 or payout['min'] > payout['max']:
+            raise ValueError(f"Issue de casino invalide : {name}")
+
+        payout = dict(payout)
+        winning = payout['max'] > 0
+        payout.setdefault('emoji', '🎉' if winning else '💸')
+        payout.setdefault('color', 0x00ff00 if winning else 0xff0000)
+        if not isinstance(payout['emoji'], str) or not isinstance(payout['color'], int):
+            raise ValueError(f"Issue de casino {name} : emoji ou couleur invalide")
+        return payout
+
+    @classmethod
+    def load(cls, path):
+        """Table des gains depuis un fichier JSON : {"payouts": [issue, ...]}"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or 'payouts' not in data:
+            raise ValueError(f"{path} doit contenir un objet JSON avec une clé \"payouts\"")
+        return cls(data['payouts'])
+
+    def draw(self, rng=random):
+        """Tire une partie : retourne (issue, montant signé)"""
+        chance = rng.random()
+        for payout, threshold in zip(self.payouts, self.cumulative):
+            if chance < threshold:
+                return payout, rng.randint(payout['min'], payout['max'])
+        return self.payouts[-1], rng.randint(self.payouts[-1]['min'], self.payouts[-1]['max'])
+
+    def expected_value(self):
+        """Espérance exacte du gain par partie"""
+        return float(np.sum(self.probabilities * (self.low + self.high) / 2))
+
+    def variance(self):
+        """Variance exacte du gain par partie (loi uniforme discrète dans chaque issue)"""
+        means = (self.low + self.high) / 2
+        spreads = ((self.high - self.low + 1) ** 2 - 1) / 12
+        return float(np.sum(self.probabilities * (spreads + means ** 2)) - self.expected_value() ** 2)
+
+    def simulate(self, users, rounds, starting_balance=1000, seed=None, max_cells=4000000):
+        """Fait jouer `rounds` parties à `users` joueurs virtuels, en lots vectorisés
+
+        Les parties sont tirées par blocs de `max_cells` (joueurs x parties)
+        pour borner la mémoire. Retourne les statistiques observées et la
+        distribution des soldes finaux.
+        """
+        rng = np.random.default_rng(seed)
+        balances = np.full(users, starting_balance, dtype=np.int64)
+        lowest = balances.copy()
+        total = 0
+        total_squares = 0.0
+        chunk = max(1, max_cells // users)
+
+        for start in range(0, rounds, chunk):
+            size = min(chunk, rounds - start)
+            outcomes = np.searchsorted(self.cumulative, rng.random((users, size)), side='right')
+            amounts = rng.integers(self.low[outcomes], self.high[outcomes], endpoint=True)
+
+            path = balances[:, None] + np.cumsum(amounts, axis=1)
+            lowest = np.minimum(lowest, path.min(axis=1))
+            balances = path[:, -1]
+            total += int(amounts.sum())
+            total_squares += float(np.square(amounts, dtype=np.float64).sum())
+
+        played = users * rounds
+        mean = total / played
+        percentiles = np.percentile(balances, [1, 10, 50, 90, 99])
+        return {
+            'users': users,
+            'rounds': rounds,
+            'mean': mean,
+            'variance': total_squares / played - mean ** 2,
+            'balance_mean': float(balances.mean()),
+            'balance_std': float(balances.std()),
+            'percentiles': dict(zip((1, 10, 50, 90, 99), percentiles.tolist())),
+            'below_start': float(np.mean(balances < starting_balance)),
+            'ever_negative': float(np.mean(lowest < 0))
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulation Monte-Carlo du casino")
+    parser.add_argument('--users', type=int, default=10000, help="Nombre de joueurs virtuels")
+    parser.add_argument('--rounds', type=int, default=8640, help="Parties par joueur (8640 = un mois avec le cooldown de 5 minutes)")
+    parser.add_argument('--start', type=int, default=1000, help="Solde de départ")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--spec', help="Fichier JSON {\"payouts\": [...]} de la table des gains (par défaut : DEFAULT_PAYOUTS)")
+    args = parser.parse_args()
+
+    spec = PayoutSpec.load(args.spec) if args.spec else PayoutSpec(DEFAULT_PAYOUTS)
+    print(f"Espérance théorique : {spec.expected_value():+.2f} coins/partie, variance {spec.variance():.1f}")
+
+    start = time.perf_counter()
+    result = spec.simulate(args.users, args.rounds, args.start, args.seed)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.users * args.rounds:,} parties simulées en {elapsed:.2f}s")
+    print(f"Espérance observée : {result['mean']:+.2f} coins/partie, variance {result['variance']:.1f}")
+    print(f"Solde final : moyenne {result['balance_mean']:,.0f}, écart-type {result['balance_std']:,.0f}")
+    print("Percentiles : " + ", ".join(f"p{q} {value:,.0f}" for q, value in result['percentiles'].items()))
+    print(f"Joueurs sous le solde de départ : {result['below_start']:.1%}, passés en négatif : {result['ever_negative']:.1%}")
+
+if __name__ == '__main__':
+    main()
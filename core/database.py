@@ -0,0 +1,87 @@
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+class Database:
+    """Service de stockage SQLite partagé par tous les cogs
+
+    Une seule connexion longue durée, utilisée uniquement depuis un thread
+    dédié : les requêtes ne bloquent jamais la boucle d'événements et
+    s'exécutent dans l'ordre où elles ont été soumises.
+    """
+
+    def __init__(self, path='server.db'):
+        self.path = path
+        self.conn = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='database')
+        self.executor.submit(self._connect).result()
+
+    def _connect(self):
+        """Ouvre la connexion (exécuté dans le thread dédié)"""
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+
+    def _transaction(self, func, *args):
+        """Exécute func(conn, *args) dans une transaction"""
+        try:
+            result = func(self.conn, *args)
+            self.conn.commit()
+            return result
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    # -- API SYNCHRONE --
+
+    def setup(self, *statements):
+        """Exécute des requêtes de création de schéma au chargement d'un cog
+
+        Bloquant : à n'utiliser que dans le __init__ des cogs, avant que les
+        requêtes du cog ne soient soumises.
+        """
+        def create(conn):
+            for statement in statements:
+                conn.execute(statement)
+
+        self.executor.submit(self._transaction, create).result()
+
+    def submit(self, func, *args):
+        """Planifie func(conn, *args) sans attendre le résultat
+
+        Utile depuis du code synchrone (cog_unload) : l'ordre d'exécution est
+        garanti par rapport aux autres requêtes, y compris close().
+        """
+        return self.executor.submit(self._transaction, func, *args)
+
+    def close(self):
+        """Termine les requêtes en attente puis ferme la connexion"""
+        if self.conn is None:
+            return
+        self.executor.submit(self.conn.close).result()
+        self.executor.shutdown(wait=True)
+        self.conn = None
+
+    # -- API ASYNCHRONE --
+
+    async def run(self, func, *args):
+        """Exécute func(conn, *args) dans une seule transaction"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._transaction, func, *args)
+
+    async def query(self, sql, params=()):
+        """Retourne toutes les lignes d'une requête SELECT"""
+        return await self.run(lambda conn: conn.execute(sql, params).fetchall())
+
+    async def query_one(self, sql, params=()):
+        """Retourne la première ligne d'une requête SELECT (ou None)"""
+        return await self.run(lambda conn: conn.execute(sql, params).fetchone())
+
+    async def execute(self, sql, params=()):
+        """Exécute une requête d'écriture et retourne le nombre de lignes modifiées"""
+        return await self.run(lambda conn: conn.execute(sql, params).rowcount)
+
+    async def executemany(self, sql, seq_of_params):
+        """Exécute une requête d'écriture pour chaque jeu de paramètres"""
+        rows = list(seq_of_params)
+        return await self.run(lambda conn: conn.executemany(sql, rows).rowcount)
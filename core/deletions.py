@@ -0,0 +1,89 @@
+import asyncio
+import time
+import discord
+
+BULK_DELETE_MAX_AGE = 14 * 86400 - 60  # Discord refuse la suppression groupée au-delà de 14 jours
+
+class DeletionCollector:
+    """Suppression groupée des messages signalés, par salon
+
+    Les identifiants de messages à supprimer sont accumulés par salon puis
+    supprimés par lots de 100 via channel.delete_messages, dès que le lot est
+    plein ou après `flush_delay` secondes. Les messages de plus de 14 jours
+    sont supprimés un par un.
+    """
+
+    def __init__(self, batch_size=100, flush_delay=1.0):
+        self.batch_size = batch_size
+        self.flush_delay = flush_delay
+        self.pending = {}  # {channel_id: (salon, {message_id, ...})}
+        self.timers = {}  # {channel_id: asyncio.TimerHandle}
+        self.flushing = set()  # Tâches de suppression en cours
+
+    def __len__(self):
+        return sum(len(message_ids) for _, message_ids in self.pending.values())
+
+    def add(self, channel, message_ids):
+        """Programme la suppression de messages d'un salon"""
+        entry = self.pending.get(channel.id)
+        if entry is None:
+            entry = self.pending[channel.id] = (channel, set())
+        entry[1].update(message_ids)
+
+        if len(entry[1]) >= self.batch_size:
+            timer = self.timers.pop(channel.id, None)
+            if timer:
+                timer.cancel()
+            self._start_flush(channel.id)
+        elif channel.id not in self.timers:
+            self.timers[channel.id] = asyncio.get_running_loop().call_later(
+                self.flush_delay, self._start_flush, channel.id
+            )
+
+    def _start_flush(self, channel_id):
+        """Lance la suppression d'un salon en gardant une référence à la tâche"""
+        task = asyncio.create_task(self.flush(channel_id))
+        self.flushing.add(task)
+        task.add_done_callback(self.flushing.discard)
+
+    async def flush(self, channel_id):
+        """Supprime les messages en attente d'un salon"""
+        self.timers.pop(channel_id, None)
+        entry = self.pending.pop(channel_id, None)
+        if entry is None:
+            return
+
+        try:
+            await self._delete(*entry)
+        except Exception as e:
+            print(f"Erreur lors de la suppression des messages de {channel_id}: {e}")
+
+    async def _delete(self, channel, message_ids):
+        """Suppression groupée des messages récents, un par un pour les plus anciens"""
+        cutoff = time.time() - BULK_DELETE_MAX_AGE
+        recent, old = [], []
+        for message_id in sorted(message_ids):
+            if discord.utils.snowflake_time(message_id).timestamp() > cutoff:
+                recent.append(message_id)
+            else:
+                old.append(message_id)
+
+        for start in range(0, len(recent), self.batch_size):
+            batch = recent[start:start + self.batch_size]
+            try:
+                if len(batch) == 1:
+                    await channel.get_partial_message(batch[0]).delete()
+                else:
+                    await channel.delete_messages([discord.Object(id=message_id) for message_id in batch])
+            except discord.NotFound:
+                pass
+            except discord.HTTPException as e:
+                print(f"Erreur lors de la suppression groupée dans {channel.id}: {e}")
+
+        for message_id in old:
+            try:
+                await channel.get_partial_message(message_id).delete()
+            except discord.NotFound:
+                pass
+            except discord.HTTPException as e:
+                print(f"Erreur lors de la suppression du message {message_id}: {e}")
@@ -0,0 +1,181 @@
+import math
+
+class QuantileSketch:
+    """Esquisse de quantiles à erreur relative bornée (DDSketch), fusionnable
+
+    Chaque valeur tombe dans un seau logarithmique : le quantile renvoyé est
+    à moins de `relative_accuracy` de la valeur exacte. Contrairement à un
+    t-digest ou un KLL, les seaux sont de simples compteurs : une valeur peut
+    être retirée, ce qui permet de suivre des soldes qui changent. Chaque
+    seau garde aussi la somme exacte de ses valeurs.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}  # {indice: [nombre, somme]}
+        self.negative = {}  # {indice de |valeur|: [nombre, somme]}
+        self.zero = 0
+        self.count = 0
+        self.total = 0
+
+    def index(self, value):
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def representative(self, index):
+        """Valeur centrale d'un seau"""
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def _bucket(self, value):
+        if value >= 1:
+            return self.positive, self.index(value)
+        if value <= -1:
+            return self.negative, self.index(-value)
+        return None, None
+
+    def add(self, value, count=1):
+        store, index = self._bucket(value)
+        if store is None:
+            self.zero += count
+        else:
+            bucket = store.setdefault(index, [0, 0])
+            bucket[0] += count
+            bucket[1] += value * count
+        self.count += count
+        self.total += value * count
+
+    def remove(self, value):
+        """Retire une valeur ; retourne False, sans rien modifier, si son seau est vide"""
+        store, index = self._bucket(value)
+        if store is None:
+            if self.zero <= 0:
+                return False
+            self.zero -= 1
+        else:
+            bucket = store.get(index)
+            if bucket is None:
+                return False
+            bucket[0] -= 1
+            bucket[1] -= value
+            if bucket[0] <= 0:
+                del store[index]
+        self.count -= 1
+        self.total -= value
+        return True
+
+    def merge(self, other):
+        """Ajoute le contenu d'une autre esquisse (même précision)"""
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for index, (count, total) in other_store.items():
+                bucket = store.setdefault(index, [0, 0])
+                bucket[0] += count
+                bucket[1] += total
+        self.zero += other.zero
+        self.count += other.count
+        self.total += other.total
+
+    def groups(self):
+        """[(nombre, somme), ...] par seau, du plus petit au plus grand"""
+        groups = [tuple(self.negative[index]) for index in sorted(self.negative, reverse=True)]
+        if self.zero:
+            groups.append((self.zero, 0))
+        groups += [tuple(self.positive[index]) for index in sorted(self.positive)]
+        return groups
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.negative, reverse=True):
+            seen += self.negative[index][0]
+            if seen > rank:
+                return -self.representative(index)
+        seen += self.zero
+        if seen > rank:
+            return 0
+        for index in sorted(self.positive):
+            seen += self.positive[index][0]
+            if seen > rank:
+                return self.representative(index)
+        return self.representative(max(self.positive)) if self.positive else 0
+
+class EconomyStats:
+    """Agrégats de l'économie tenus à jour à chaque variation de solde
+
+    Nombre de comptes et masse monétaire sont exacts ; médiane, quantiles,
+    indice de Gini et part du top 1 % sont calculés à partir des seaux de
+    l'esquisse (quelques centaines au plus), quel que soit le nombre de
+    comptes.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.sketch = QuantileSketch(relative_accuracy)
+        self.drift = 0  # Anciens soldes introuvables dans l'esquisse depuis la dernière reconstruction
+
+    def build(self, balances):
+        """Reconstruit les agrégats depuis la table (au démarrage, ou après une dérive)"""
+        self.sketch = QuantileSketch(self.sketch.relative_accuracy)
+        self.drift = 0
+        for balance in balances:
+            self.sketch.add(balance)
+
+    def add_account(self, balance):
+        self.sketch.add(balance)
+
+    def update(self, old_balance, new_balance):
+        """Remplace un solde ; un ancien solde absent (solde modifié hors de la banque) est compté comme dérive"""
+        if old_balance != new_balance:
+            if not self.sketch.remove(old_balance):
+                self.drift += 1
+            self.sketch.add(new_balance)
+
+    @property
+    def accounts(self):
+        return self.sketch.count
+
+    @property
+    def total(self):
+        return self.sketch.total
+
+    def gini(self):
+        """Indice de Gini (données groupées par seau), ou None si la masse monétaire est nulle"""
+        if self.sketch.count == 0 or self.sketch.total <= 0:
+            return None
+        gini = 1.0
+        cumulative = 0.0
+        for count, total in self.sketch.groups():
+            share = total / self.sketch.total
+            gini -= count / self.sketch.count * (2 * cumulative + share)
+            cumulative += share
+        return gini
+
+    def top_share(self, fraction=0.01):
+        """Part de la masse monétaire détenue par les `fraction` comptes les plus riches"""
+        if self.sketch.count == 0 or self.sketch.total <= 0:
+            return None
+        remaining = max(1, self.sketch.count * fraction)
+        held = 0.0
+        for count, total in reversed(self.sketch.groups()):
+            if count >= remaining:
+                held += total * remaining / count
+                break
+            held += total
+            remaining -= count
+        return held / self.sketch.total
+
+    def snapshot(self):
+        sketch = self.sketch
+        return {
+            'accounts': sketch.count,
+            'total': sketch.total,
+            'mean': sketch.total / sketch.count if sketch.count else 0,
+            'median': sketch.quantile(0.5),
+            'p10': sketch.quantile(0.1),
+            'p90': sketch.quantile(0.9),
+            'p99': sketch.quantile(0.99),
+            'gini': self.gini(),
+            'top_share': self.top_share(0.01),
+            'buckets': len(sketch.positive) + len(sketch.negative) + (1 if sketch.zero else 0)
+        }
@@ -0,0 +1,242 @@
+import asyncio
+import gzip
+import json
+import os
+from datetime import datetime
+
+class TransactionLedger:
+    """Journal des transactions de la banque, en ajout seul dans la table `transactions`
+
+    Chaque transaction est une ligne ajoutée : le coût d'une écriture ne
+    dépend pas de la taille de l'historique. Avec `batch`, les entrées sont
+    regroupées et écrites (un seul commit) toutes les `flush_interval`
+    secondes ou dès que `max_pending` entrées sont en attente ; sinon chaque
+    entrée part immédiatement dans la file de la base.
+
+    Les transactions anciennes sont déplacées par rotate() dans des segments
+    JSONL compressés ; la table `transaction_segments` garde pour chacun ses
+    horodatages min et max, ce qui permet aux recherches par période de
+    n'ouvrir que les segments concernés.
+    """
+
+    COLUMNS = ('timestamp', 'action', 'user_id', 'target_id', 'amount', 'success')
+
+    def __init__(self, db, batch=True, flush_interval=2.0, max_pending=200, archive_dir='ledger_archives', segment_size=50000):
+        self.db = db
+        self.batch = batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.archive_dir = archive_dir
+        self.segment_size = segment_size
+        self.pending = []  # [(timestamp, action, user_id, target_id, amount, success), ...]
+        self.timer = None
+
+        self.db.setup('''
+            CREATE TABLE IF NOT EXISTS transactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TIMESTAMP NOT NULL,
+                action TEXT NOT NULL,
+                user_id INTEGER,
+                target_id INTEGER,
+                amount INTEGER,
+                success INTEGER DEFAULT 1
+            )
+        ''', '''
+            CREATE INDEX IF NOT EXISTS idx_transactions_user ON transactions (user_id, timestamp)
+        ''', '''
+            CREATE INDEX IF NOT EXISTS idx_transactions_target ON transactions (target_id, timestamp)
+        ''', '''
+            CREATE INDEX IF NOT EXISTS idx_transactions_action ON transactions (action, timestamp)
+        ''', '''
+            CREATE INDEX IF NOT EXISTS idx_transactions_timestamp ON transactions (timestamp)
+        ''', '''
+            CREATE TABLE IF NOT EXISTS transaction_segments (
+                path TEXT PRIMARY KEY,
+                first_id INTEGER NOT NULL,
+                last_id INTEGER NOT NULL,
+                min_timestamp TIMESTAMP NOT NULL,
+                max_timestamp TIMESTAMP NOT NULL,
+                row_count INTEGER NOT NULL
+            )
+        ''')
+
+    @staticmethod
+    def entry(action, user_id, target_id=None, amount=None, success=True, timestamp=None):
+        """Ligne du journal"""
+        return ((timestamp or datetime.now()).isoformat(), action, user_id, target_id, amount, 1 if success else 0)
+
+    @staticmethod
+    def write(conn, rows):
+        """Ajoute des lignes au journal (thread de la base, dans la transaction en cours)"""
+        conn.executemany('''
+            INSERT INTO transactions (timestamp, action, user_id, target_id, amount, success)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+    def record(self, action, user_id, target_id=None, amount=None, success=True):
+        """Ajoute une transaction au journal (sans attendre l'écriture)"""
+        row = self.entry(action, user_id, target_id, amount, success)
+        if not self.batch:
+            self.db.submit(self.write, [row])
+            return
+
+        self.pending.append(row)
+        if len(self.pending) >= self.max_pending:
+            self.flush_nowait()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.flush_interval, self.flush_nowait)
+
+    def flush_nowait(self):
+        """Planifie l'écriture des entrées en attente (ordre garanti par la file de la base)"""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return
+
+        rows, self.pending = self.pending, []
+        self.db.submit(self.write, rows)
+
+    # -- RECHERCHE --
+
+    @staticmethod
+    def _filters(user_id, since, until, action):
+        """Clause WHERE et paramètres d'une recherche (horodatages ISO)"""
+        clauses, params = [], []
+        if user_id is not None:
+            clauses.append('(user_id = ? OR target_id = ?)')
+            params += [user_id, user_id]
+        if action is not None:
+            clauses.append('action = ?')
+            params.append(action)
+        if since is not None:
+            clauses.append('timestamp >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('timestamp <= ?')
+            params.append(until)
+        return ' AND '.join(clauses) or '1', params
+
+    @staticmethod
+    def _matches(row, user_id, since, until, action):
+        timestamp, row_action, row_user, row_target = row[:4]
+        return (
+            (user_id is None or user_id in (row_user, row_target))
+            and (action is None or row_action == action)
+            and (since is None or timestamp >= since)
+            and (until is None or timestamp <= until)
+        )
+
+    def _scan_segment(self, path, user_id, since, until, action):
+        """Lignes correspondantes d'un segment archivé (exécuté hors de la boucle)"""
+        rows = []
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                row = json.loads(line)
+                if self._matches(row, user_id, since, until, action):
+                    rows.append(tuple(row))
+        return rows
+
+    async def search(self, user_id=None, since=None, until=None, action=None, limit=25):
+        """Dernières transactions correspondant aux filtres, de la plus ancienne à la plus récente
+
+        La table (indexée) est lue en premier ; les segments archivés ne sont
+        ouverts que s'il manque des résultats et que leur période recoupe la
+        recherche, du plus récent au plus ancien.
+        """
+        self.flush_nowait()
+        where, params = self._filters(user_id, since, until, action)
+        rows = await self.db.query(f'''
+            SELECT {', '.join(self.COLUMNS)} FROM transactions
+            WHERE {where}
+            ORDER BY timestamp DESC, id DESC LIMIT ?
+        ''', (*params, limit))
+
+        if len(rows) < limit:
+            segments = await self.db.query('''
+                SELECT path FROM transaction_segments
+                WHERE (? IS NULL OR max_timestamp >= ?) AND (? IS NULL OR min_timestamp <= ?)
+                ORDER BY max_timestamp DESC
+            ''', (since, since, until, until))
+
+            loop = asyncio.get_running_loop()
+            for (path,) in segments:
+                try:
+                    found = await loop.run_in_executor(None, self._scan_segment, path, user_id, since, until, action)
+                except OSError as e:
+                    print(f"Erreur lors de la lecture du segment {path}: {e}")
+                    continue
+                rows += sorted(found, key=lambda row: row[0], reverse=True)[:limit - len(rows)]
+                if len(rows) >= limit:
+                    break
+
+        return rows[::-1]
+
+    # -- ARCHIVAGE --
+
+    async def rotate(self, before):
+        """Archive les transactions antérieures à `before` (ISO) en segments compressés, retourne le nombre archivé"""
+        self.flush_nowait()
+        loop = asyncio.get_running_loop()
+        archived = 0
+
+        while True:
+            rows = await self.db.query(f'''
+                SELECT id, {', '.join(self.COLUMNS)} FROM transactions
+                WHERE timestamp < ? ORDER BY id LIMIT ?
+            ''', (before, self.segment_size))
+            if not rows:
+                return archived
+
+            first_id, last_id = rows[0][0], rows[-1][0]
+            path = os.path.join(self.archive_dir, f"transactions-{first_id}-{last_id}.jsonl.gz")
+            entries = [row[1:] for row in rows]
+            await loop.run_in_executor(None, self._write_segment, path, entries)
+
+            # Manifeste et suppression dans une seule transaction, une fois le fichier écrit
+            timestamps = [entry[0] for entry in entries]
+            await self.db.run(self._register_segment, path, [row[0] for row in rows], min(timestamps), max(timestamps))
+            archived += len(rows)
+
+    def _write_segment(self, path, entries):
+        """Écrit un segment compressé (exécuté hors de la boucle)"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        temporary = path + '.tmp'
+        with gzip.open(temporary, 'wt', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        os.replace(temporary, path)
+
+    @staticmethod
+    def _register_segment(conn, path, ids, min_timestamp, max_timestamp):
+        conn.execute('''
+            INSERT OR REPLACE INTO transaction_segments (path, first_id, last_id, min_timestamp, max_timestamp, row_count)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (path, ids[0], ids[-1], min_timestamp, max_timestamp, len(ids)))
+        conn.executemany('DELETE FROM transactions WHERE id = ?', [(row_id,) for row_id in ids])
+
+    # -- MIGRATION --
+
+    def migrate_json(self, path):
+        """Importe une fois l'ancien fichier de logs JSON puis le renomme (bloquant, au chargement)"""
+        if not os.path.exists(path):
+            return 0
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                logs = json.load(f)
+        except Exception as e:
+            print(f"Erreur lors de la lecture de {path}: {e}")
+            return 0
+
+        rows = [
+            (
+                log['timestamp'], log['action'], log.get('user_id'), log.get('target_id'),
+                log.get('amount'), 1 if log.get('success', True) else 0
+            )
+            for log in logs
+            if 'timestamp' in log and 'action' in log
+        ]
+        self.db.submit(self.write, rows).result()
+        os.replace(path, path + '.migrated')
+        return len(rows)
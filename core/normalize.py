@@ -0,0 +1,52 @@
+import unicodedata
+from functools import lru_cache
+
+# Lettres d'autres alphabets visuellement identiques à des lettres latines
+CONFUSABLES = {
+    # Cyrillique
+    'а': 'a', 'в': 'b', 'е': 'e', 'ё': 'e', 'к': 'k', 'м': 'm', 'н': 'h', 'о': 'o', 'р': 'p',
+    'с': 'c', 'т': 't', 'у': 'y', 'х': 'x', 'ѕ': 's', 'і': 'i', 'ї': 'i', 'ј': 'j', 'һ': 'h',
+    'ԁ': 'd', 'ԛ': 'q', 'ԝ': 'w', 'ӏ': 'l', 'ь': 'b', 'п': 'n', 'г': 'r',
+    # Grec
+    'α': 'a', 'β': 'b', 'ε': 'e', 'ζ': 'z', 'η': 'n', 'ι': 'i', 'κ': 'k', 'μ': 'u', 'ν': 'v',
+    'ο': 'o', 'ρ': 'p', 'τ': 't', 'υ': 'u', 'χ': 'x', 'ω': 'w', 'ϲ': 'c',
+    # Petites capitales
+    'ᴀ': 'a', 'ʙ': 'b', 'ᴄ': 'c', 'ᴅ': 'd', 'ᴇ': 'e', 'ғ': 'f', 'ɢ': 'g', 'ʜ': 'h', 'ɪ': 'i',
+    'ᴊ': 'j', 'ᴋ': 'k', 'ʟ': 'l', 'ᴍ': 'm', 'ɴ': 'n', 'ᴏ': 'o', 'ᴘ': 'p', 'ʀ': 'r', 'ꜱ': 's',
+    'ᴛ': 't', 'ᴜ': 'u', 'ᴠ': 'v', 'ᴡ': 'w', 'ʏ': 'y', 'ᴢ': 'z',
+    # Divers
+    'ı': 'i', 'ł': 'l', 'ø': 'o', 'đ': 'd', 'ß': 'ss', 'æ': 'ae', 'œ': 'oe'
+}
+
+class FoldTable(dict):
+    """Table de str.translate remplie à la première rencontre de chaque caractère
+
+    Supprime les marques combinantes (zalgo, accents) et les caractères de
+    format (espaces de largeur nulle, joints, marques de direction) ;
+    remplace les lettres confusables par leur équivalent latin.
+    """
+
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        if unicodedata.category(char) in ('Mn', 'Me', 'Cf'):
+            replacement = None
+        else:
+            replacement = CONFUSABLES.get(char.lower(), char)
+        self[codepoint] = replacement
+        return replacement
+
+FOLD_TABLE = FoldTable()
+
+@lru_cache(maxsize=4096)
+def fold(text):
+    """Normalisation complète d'un texte non ASCII (mémorisée pour les textes fréquents)"""
+    # NFKD : formes pleine chasse, lettres mathématiques et cerclées -> lettres simples ;
+    # lettres accentuées -> lettre + marque combinante (supprimée par la table)
+    text = unicodedata.normalize('NFKD', text).translate(FOLD_TABLE)
+    return ' '.join(text.casefold().split())
+
+def normalize(text):
+    """Texte comparable d'un message : minuscules, sans accents, confusables ni caractères invisibles, espaces réduits"""
+    if text.isascii():
+        return ' '.join(text.lower().split())
+    return fold(text)
@@ -0,0 +1,151 @@
+import asyncio
+import discord
+
+class NotificationRouter:
+    """Envoi des alertes du bot, par serveur
+
+    Le salon de notification de chaque serveur est résolu une fois puis
+    gardé en cache ; le cache est invalidé quand un salon, un rôle ou les
+    rôles du bot changent. Les alertes envoyées via notify() pendant
+    `digest_window` secondes vers un même salon sont regroupées en un seul
+    embed récapitulatif.
+    """
+
+    def __init__(self, bot, digest_window=3.0, max_fields=20):
+        self.bot = bot
+        self.digest_window = digest_window
+        self.max_fields = max_fields
+        self.channels = {}  # {guild_id: channel_id ou None si aucun salon disponible}
+        self.pending = {}  # {channel_id: [embed, ...]}
+        self.flushing = set()  # Tâches d'envoi en cours
+
+        for event in ('on_guild_channel_create', 'on_guild_channel_delete', 'on_guild_channel_update',
+                      'on_guild_role_update', 'on_guild_role_delete', 'on_member_update', 'on_guild_remove'):
+            self.bot.add_listener(getattr(self, event), event)
+
+    # -- SALON DE NOTIFICATION --
+
+    @staticmethod
+    def can_send(guild, channel):
+        permissions = channel.permissions_for(guild.me)
+        return permissions.send_messages and permissions.embed_links
+
+    def resolve(self, guild):
+        """Choisit le salon de notification (salon de logs en priorité)"""
+        channels = [channel for channel in guild.text_channels if self.can_send(guild, channel)]
+        for channel in channels:
+            if 'log' in channel.name:
+                return channel
+        return channels[0] if channels else None
+
+    def channel(self, guild):
+        """Salon de notification d'un serveur (mis en cache), ou None"""
+        if guild.id in self.channels:
+            channel_id = self.channels[guild.id]
+            return guild.get_channel(channel_id) if channel_id else None
+
+        channel = self.resolve(guild)
+        self.channels[guild.id] = channel.id if channel else None
+        return channel
+
+    def invalidate(self, guild_id):
+        self.channels.pop(guild_id, None)
+
+    async def on_guild_channel_create(self, channel):
+        self.invalidate(channel.guild.id)
+
+    async def on_guild_channel_delete(self, channel):
+        self.invalidate(channel.guild.id)
+
+    async def on_guild_channel_update(self, before, after):
+        if before.name != after.name or before.position != after.position or before.overwrites != after.overwrites:
+            self.invalidate(after.guild.id)
+
+    async def on_guild_role_update(self, before, after):
+        if before.permissions != after.permissions:
+            self.invalidate(after.guild.id)
+
+    async def on_guild_role_delete(self, role):
+        self.invalidate(role.guild.id)
+
+    async def on_member_update(self, before, after):
+        if after.id == self.bot.user.id and before.roles != after.roles:
+            self.invalidate(after.guild.id)
+
+    async def on_guild_remove(self, guild):
+        self.invalidate(guild.id)
+
+    # -- ENVOI --
+
+    async def send(self, guild, embed, channel=None):
+        """Envoie un embed immédiatement et retourne le message (ou None)"""
+        target = channel or self.channel(guild)
+        if target is None:
+            return None
+
+        try:
+            return await target.send(embed=embed)
+        except discord.Forbidden:
+            if channel is not None:
+                return None
+            # Permissions changées sans événement reçu : résoudre à nouveau une fois
+            self.invalidate(guild.id)
+            target = self.channel(guild)
+            if target is None:
+                return None
+            try:
+                return await target.send(embed=embed)
+            except discord.HTTPException:
+                return None
+        except discord.HTTPException as e:
+            print(f"Erreur lors de l'envoi d'une notification: {e}")
+            return None
+
+    def notify(self, guild, embed, channel=None):
+        """Met une alerte en attente ; les alertes rapprochées partent en un seul message"""
+        target = channel or self.channel(guild)
+        if target is None:
+            return
+
+        pending = self.pending.get(target.id)
+        if pending is None:
+            pending = self.pending[target.id] = []
+            asyncio.get_running_loop().call_later(
+                self.digest_window, self._start_flush, guild, target, channel is None
+            )
+        pending.append(embed)
+
+    def _start_flush(self, guild, target, routed):
+        """Lance l'envoi des alertes d'un salon en gardant une référence à la tâche"""
+        task = asyncio.create_task(self.flush(guild, target, routed))
+        self.flushing.add(task)
+        task.add_done_callback(self.flushing.discard)
+
+    async def flush(self, guild, target, routed):
+        """Envoie les alertes en attente d'un salon"""
+        embeds = self.pending.pop(target.id, [])
+        if not embeds:
+            return
+
+        try:
+            embed = embeds[0] if len(embeds) == 1 else self.digest(embeds)
+            await self.send(guild, embed, None if routed else target)
+        except Exception as e:
+            print(f"Erreur lors de l'envoi des alertes regroupées: {e}")
+
+    def digest(self, embeds):
+        """Regroupe plusieurs alertes dans un embed récapitulatif"""
+        digest = discord.Embed(
+            title=f"🧾 {len(embeds)} alertes",
+            description=f"Alertes regroupées sur les {self.digest_window:g} dernières secondes",
+            color=embeds[-1].color
+        )
+
+        for embed in embeds[:self.max_fields]:
+            lines = [embed.description] if embed.description else []
+            lines += [f"**{field.name}:** {field.value}" for field in embed.fields[:2]]
+            digest.add_field(name=embed.title or "Alerte", value="\n".join(lines)[:250] or "-", inline=False)
+
+        if len(embeds) > self.max_fields:
+            digest.set_footer(text=f"... et {len(embeds) - self.max_fields} autre(s)")
+        return digest
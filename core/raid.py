@@ -0,0 +1,203 @@
+import math
+import time
+import numpy as np
+
+AGE_BINS = 16  # Âges de compte par puissances de 2 (en jours), le dernier regroupe le reste
+
+def age_bin(age_days):
+    """Classe d'âge d'un compte : 0 pour < 1 jour, b pour [2^(b-1), 2^b) jours"""
+    return min(AGE_BINS - 1, max(0, int(age_days)).bit_length())
+
+def bin_upper_age(index):
+    """Âge (en jours) au-delà duquel un compte sort de la classe index"""
+    return 1 << index
+
+class JoinBaseline:
+    """Référence d'arrivées d'un serveur
+
+    Le nombre d'arrivées par intervalle de `bucket_seconds` est suivi par une
+    moyenne et une variance exponentielles. L'âge des comptes alimente deux
+    histogrammes à décroissance exponentielle : un long terme (la référence)
+    et un court terme (l'activité récente). Chaque arrivée coûte O(1).
+    """
+
+    __slots__ = ('bucket', 'count', 'previous', 'rate', 'buckets_seen', 'histograms', 'last_decay')
+
+    def __init__(self, now):
+        self.bucket = None  # Indice de l'intervalle en cours
+        self.count = 0  # Arrivées dans l'intervalle en cours
+        self.previous = 0  # Arrivées dans l'intervalle précédent
+        self.rate = np.zeros(2)  # [moyenne, variance] des arrivées par intervalle
+        self.buckets_seen = 0
+        self.histograms = np.zeros((2, AGE_BINS))  # [court terme, long terme]
+        self.last_decay = now
+
+class JoinRateMonitor:
+    """Détection statistique des raids à partir des arrivées
+
+    Deux signaux, évalués après une période d'apprentissage :
+    - débit : z-score du nombre d'arrivées récentes face à la référence ;
+    - âge : part des comptes récents tombant dans le quantile bas de la
+      distribution d'âge de référence (z-score binomial).
+    """
+
+    def __init__(self, bucket_seconds=60, alpha=0.02, short_half_life=1800, long_half_life=86400,
+                 warmup_buckets=60, rate_threshold=6.0, age_threshold=4.0, age_quantile=0.05,
+                 max_suspect_age=30, min_joins=3):
+        self.bucket_seconds = bucket_seconds
+        self.alpha = alpha  # Poids d'un intervalle dans la moyenne exponentielle
+        self.decay_rates = np.array([math.log(2) / short_half_life, math.log(2) / long_half_life])
+        self.warmup_buckets = warmup_buckets
+        self.rate_threshold = rate_threshold  # z-score de débit déclenchant une alerte
+        self.age_threshold = age_threshold  # z-score de comptes jeunes déclenchant une alerte
+        self.age_quantile = age_quantile
+        self.max_suspect_age = max_suspect_age  # Âge (jours) au-delà duquel un compte n'est jamais suspect
+        self.min_joins = min_joins  # Arrivées (ou comptes jeunes) minimales pour une alerte
+        self.max_catch_up = int(10 / alpha)  # Au-delà, la moyenne a oublié l'activité passée
+        self.guilds = {}  # {guild_id: JoinBaseline}
+
+    def __len__(self):
+        return len(self.guilds)
+
+    def get(self, guild_id):
+        return self.guilds.get(guild_id)
+
+    # -- MISE À JOUR --
+
+    def _fold(self, baseline, value):
+        """Intègre un intervalle terminé dans la moyenne et la variance"""
+        mean, variance = baseline.rate
+        diff = value - mean
+        increment = self.alpha * diff
+        baseline.rate[0] = mean + increment
+        baseline.rate[1] = (1 - self.alpha) * (variance + diff * increment)
+        baseline.buckets_seen += 1
+
+    def _advance(self, baseline, now):
+        """Clôt les intervalles écoulés et fait décroître les histogrammes"""
+        bucket = int(now // self.bucket_seconds)
+        if baseline.bucket is None:
+            baseline.bucket = bucket
+        elif bucket > baseline.bucket:
+            elapsed = bucket - baseline.bucket
+            self._fold(baseline, baseline.count)
+            for _ in range(min(elapsed - 1, self.max_catch_up)):
+                self._fold(baseline, 0)
+            baseline.buckets_seen += max(0, elapsed - 1 - self.max_catch_up)
+            baseline.previous = baseline.count if elapsed == 1 else 0
+            baseline.count = 0
+            baseline.bucket = bucket
+
+        dt = now - baseline.last_decay
+        if dt > 0:
+            baseline.histograms *= np.exp(-self.decay_rates * dt)[:, None]
+            baseline.last_decay = now
+
+    def observe(self, guild_id, age_days, now=None):
+        """Enregistre une arrivée et retourne le signal de raid éventuel (ou None)"""
+        now = time.monotonic() if now is None else now
+
+        baseline = self.guilds.get(guild_id)
+        if baseline is None:
+            baseline = self.guilds[guild_id] = JoinBaseline(now)
+
+        self._advance(baseline, now)
+        baseline.count += 1
+        baseline.histograms[:, age_bin(age_days)] += 1
+
+        return self.evaluate(baseline, now)
+
+    # -- ÉVALUATION --
+
+    def live_rate(self, baseline, now):
+        """Arrivées sur le dernier intervalle glissant (pondération de l'intervalle précédent)"""
+        elapsed = (now / self.bucket_seconds) - baseline.bucket if baseline.bucket is not None else 1
+        return baseline.count + baseline.previous * max(0.0, 1 - elapsed)
+
+    def rate_score(self, baseline, now):
+        """z-score du débit récent face à la référence"""
+        mean, variance = baseline.rate
+        return (self.live_rate(baseline, now) - mean) / math.sqrt(variance + 1)
+
+    @staticmethod
+    def reference(baseline):
+        """Histogramme de référence, hors arrivées récentes (un raid lent ne la déplace pas)"""
+        short_term, long_term = baseline.histograms
+        return np.maximum(long_term - short_term, 0)
+
+    def young_bins(self, baseline):
+        """Nombre de classes d'âge formant le quantile bas de la référence (0 si aucune)"""
+        long_term = self.reference(baseline)
+        total = long_term.sum()
+        if total <= 0:
+            return 0
+
+        cumulative = np.cumsum(long_term) / total
+        bins = int(np.searchsorted(cumulative, self.age_quantile, side='right'))
+        while bins and bin_upper_age(bins - 1) > self.max_suspect_age:
+            bins -= 1
+        return bins
+
+    def age_score(self, baseline):
+        """(z-score binomial de la part de comptes jeunes récents, comptes jeunes récents)"""
+        bins = self.young_bins(baseline)
+        if not bins:
+            return 0.0, 0.0
+
+        short_term = baseline.histograms[0]
+        long_term = self.reference(baseline)
+        recent = short_term.sum()
+        if recent <= 0:
+            return 0.0, 0.0
+
+        expected = min(0.99, max(0.01, long_term[:bins].sum() / long_term.sum()))
+        young = short_term[:bins].sum()
+        score = (young - recent * expected) / math.sqrt(recent * expected * (1 - expected))
+        return score, young
+
+    def suspect_age(self, baseline, fallback):
+        """Âge (jours) en dessous duquel un compte arrivé pendant un raid est suspect"""
+        bins = self.young_bins(baseline)
+        return max(fallback, bin_upper_age(bins - 1) if bins else 0)
+
+    def evaluate(self, baseline, now):
+        """Retourne (signal, score) si l'activité dévie de la référence, sinon None"""
+        if baseline.buckets_seen < self.warmup_buckets:
+            return None
+
+        score = self.rate_score(baseline, now)
+        if score >= self.rate_threshold and self.live_rate(baseline, now) >= self.min_joins:
+            return 'rate', score
+
+        score, young = self.age_score(baseline)
+        if score >= self.age_threshold and young >= self.min_joins:
+            return 'age', score
+
+        return None
+
+    def snapshot(self, guild_id, now=None):
+        """Résumé de la référence d'un serveur pour l'affichage (ou None)"""
+        now = time.monotonic() if now is None else now
+        baseline = self.guilds.get(guild_id)
+        if baseline is None:
+            return None
+
+        self._advance(baseline, now)
+        mean, variance = baseline.rate
+        age_score, young = self.age_score(baseline)
+        short_term = baseline.histograms[0]
+        long_term = self.reference(baseline)
+        return {
+            'mean': mean,
+            'std': math.sqrt(max(variance, 0.0)),
+            'live': self.live_rate(baseline, now),
+            'rate_score': self.rate_score(baseline, now),
+            'age_score': age_score,
+            'young_recent': young,
+            'recent': short_term.sum(),
+            'young_bins': self.young_bins(baseline),
+            'short_share': short_term / short_term.sum() if short_term.sum() > 0 else short_term,
+            'long_share': long_term / long_term.sum() if long_term.sum() > 0 else long_term,
+            'buckets_seen': baseline.buckets_seen,
+            'warm': baseline.buckets_seen >= self.warmup_buckets
+        }
@@ -0,0 +1,149 @@
+from bisect import bisect_left, insort
+
+class Leaderboard:
+    """Index de classement en mémoire
+
+    Les entrées (-xp, user_id) sont rangées dans une liste triée découpée en
+    blocs ; un arbre de Fenwick sur la taille des blocs permet de retrouver
+    le rang d'un utilisateur ou la N-ième place en O(log n).
+    """
+
+    def __init__(self, load=512):
+        self.load = load  # Taille cible d'un bloc
+        self.scores = {}  # {user_id: xp}
+        self.blocks = []  # Blocs triés de (-xp, user_id)
+        self.maxes = []  # Dernière entrée de chaque bloc
+        self.tree = [0]  # Arbre de Fenwick (indexé à partir de 1) sur la taille des blocs
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __contains__(self, user_id):
+        return user_id in self.scores
+
+    # -- FENWICK --
+
+    def _rebuild_tree(self):
+        """Reconstruit l'arbre après un découpage ou une suppression de bloc"""
+        self.tree = [0] + [len(block) for block in self.blocks]
+        for i in range(1, len(self.tree)):
+            parent = i + (i & -i)
+            if parent < len(self.tree):
+                self.tree[parent] += self.tree[i]
+
+    def _tree_add(self, index, delta):
+        """Ajoute delta à la taille du bloc index"""
+        i = index + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, index):
+        """Nombre d'entrées dans les blocs [0, index)"""
+        total = 0
+        i = index
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def _locate(self, position):
+        """Retourne (bloc, décalage) de l'entrée à la position donnée (base 0)"""
+        index = 0
+        bit = 1 << (len(self.tree) - 1).bit_length()
+        while bit:
+            nxt = index + bit
+            if nxt < len(self.tree) and self.tree[nxt] <= position:
+                position -= self.tree[nxt]
+                index = nxt
+            bit >>= 1
+        return index, position
+
+    # -- MISE À JOUR --
+
+    def build(self, rows):
+        """Construit l'index à partir de lignes (user_id, xp)"""
+        self.scores = {user_id: xp for user_id, xp in rows}
+        entries = sorted((-xp, user_id) for user_id, xp in self.scores.items())
+        self.blocks = [entries[i:i + self.load] for i in range(0, len(entries), self.load)]
+        self.maxes = [block[-1] for block in self.blocks]
+        self._rebuild_tree()
+
+    def _insert(self, entry):
+        if not self.blocks:
+            self.blocks.append([entry])
+            self.maxes.append(entry)
+            self._rebuild_tree()
+            return
+
+        index = min(bisect_left(self.maxes, entry), len(self.blocks) - 1)
+        block = self.blocks[index]
+        insort(block, entry)
+        self.maxes[index] = block[-1]
+
+        if len(block) > 2 * self.load:
+            # Découper le bloc trop grand
+            self.blocks[index:index + 1] = [block[:self.load], block[self.load:]]
+            self.maxes[index:index + 1] = [block[self.load - 1], block[-1]]
+            self._rebuild_tree()
+        else:
+            self._tree_add(index, 1)
+
+    def _delete(self, entry):
+        index = bisect_left(self.maxes, entry)
+        block = self.blocks[index]
+        del block[bisect_left(block, entry)]
+
+        if block:
+            self.maxes[index] = block[-1]
+            self._tree_add(index, -1)
+        else:
+            del self.blocks[index]
+            del self.maxes[index]
+            self._rebuild_tree()
+
+    def update(self, user_id, xp):
+        """Enregistre le nouveau total d'XP d'un utilisateur"""
+        old_xp = self.scores.get(user_id)
+        if old_xp == xp:
+            return
+        if old_xp is not None:
+            self._delete((-old_xp, user_id))
+        self.scores[user_id] = xp
+        self._insert((-xp, user_id))
+
+    def remove(self, user_id):
+        """Retire un utilisateur du classement"""
+        xp = self.scores.pop(user_id, None)
+        if xp is not None:
+            self._delete((-xp, user_id))
+
+    # -- REQUÊTES --
+
+    def rank(self, user_id):
+        """Rang (à partir de 1) d'un utilisateur, ou None s'il n'est pas classé"""
+        xp = self.scores.get(user_id)
+        if xp is None:
+            return None
+
+        entry = (-xp, user_id)
+        index = bisect_left(self.maxes, entry)
+        return self._prefix(index) + bisect_left(self.blocks[index], entry) + 1
+
+    def page(self, start, count):
+        """Retourne [(user_id, xp), ...] à partir de la position start (base 0)"""
+        if start < 0 or start >= len(self.scores):
+            return []
+
+        index, offset = self._locate(start)
+        results = []
+        while index < len(self.blocks) and len(results) < count:
+            for neg_xp, user_id in self.blocks[index][offset:offset + count - len(results)]:
+                results.append((user_id, -neg_xp))
+            index += 1
+            offset = 0
+        return results
+
+    def top(self, count):
+        """Retourne les count premiers [(user_id, xp), ...]"""
+        return self.page(0, count)
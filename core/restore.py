@@ -0,0 +1,81 @@
+import discord
+
+async def rebuild(guild, roles, channels, reason):
+    """Recrée des rôles et des salons supprimés à partir de leurs données de sauvegarde
+
+    Retourne le nombre d'objets recréés. Les catégories sont recréées avant
+    leurs salons, et les permissions visant un objet recréé sont reportées
+    sur le nouvel objet.
+    """
+    rebuilt = 0
+    new_ids = {}  # {ancien id: nouvel objet}
+
+    for data in sorted(roles, key=lambda role: role['position']):
+        if data.get('managed'):
+            continue
+        try:
+            role = await guild.create_role(
+                name=data['name'],
+                color=discord.Color(data['color']),
+                hoist=data['hoist'],
+                mentionable=data['mentionable'],
+                permissions=discord.Permissions(data['permissions']),
+                reason=reason
+            )
+            new_ids[data['id']] = role
+            rebuilt += 1
+            try:
+                await role.edit(position=max(1, min(data['position'], guild.me.top_role.position - 1)))
+            except discord.HTTPException:
+                pass
+        except discord.HTTPException as e:
+            print(f"Erreur lors de la recréation du rôle {data['name']}: {e}")
+
+    def overwrites_for(data):
+        overwrites = {}
+        for target_id, pair in data.get('overwrites', {}).items():
+            target = new_ids.get(int(target_id)) or guild.get_role(int(target_id)) or guild.get_member(int(target_id))
+            if target is not None:
+                overwrites[target] = discord.PermissionOverwrite.from_pair(
+                    discord.Permissions(pair['allow']),
+                    discord.Permissions(pair['deny'])
+                )
+        return overwrites
+
+    # Catégories d'abord (type absent dans le format de sauvegarde)
+    for data in sorted(channels, key=lambda channel: ('type' in channel, channel['position'])):
+        category = None
+        if data.get('category_id'):
+            category = new_ids.get(data['category_id']) or guild.get_channel(data['category_id'])
+
+        options = {'name': data['name'], 'overwrites': overwrites_for(data), 'position': data['position'], 'reason': reason}
+        try:
+            channel_type = data.get('type')
+            if channel_type is None:
+                channel = await guild.create_category(**options)
+            elif channel_type == 'text':
+                channel = await guild.create_text_channel(
+                    category=category, topic=data.get('topic'),
+                    slowmode_delay=data.get('slowmode_delay', 0), nsfw=data.get('nsfw', False), **options
+                )
+            elif channel_type == 'voice':
+                channel = await guild.create_voice_channel(
+                    category=category, bitrate=min(data.get('bitrate', 64000), guild.bitrate_limit),
+                    user_limit=data.get('user_limit', 0), **options
+                )
+            elif channel_type == 'news':
+                channel = await guild.create_news_channel(
+                    category=category, topic=data.get('topic'), nsfw=data.get('nsfw', False), **options
+                )
+            elif channel_type == 'forum':
+                channel = await guild.create_forum_channel(
+                    category=category, topic=data.get('topic'), nsfw=data.get('nsfw', False), **options
+                )
+            else:
+                continue
+            new_ids[data['id']] = channel
+            rebuilt += 1
+        except discord.HTTPException as e:
+            print(f"Erreur lors de la recréation du salon {data['name']}: {e}")
+
+    return rebuilt
@@ -0,0 +1,165 @@
+import asyncio
+import heapq
+import json
+import time
+
+class Scheduler:
+    """Planificateur d'actions différées persistant
+
+    Les actions (fin de mute, fin de lockdown...) sont gardées dans un tas
+    trié par échéance et dans la table `scheduled_actions`. Une seule tâche
+    les déclenche ; au redémarrage, les actions en attente sont rechargées
+    depuis la base. Chaque action est identifiée par (action, guild_id,
+    target_id) : reprogrammer une action remplace la précédente.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.handlers = {}  # {action: coroutine(guild_id, target_id, payload)}
+        self.heap = []  # [(due_at, action_id), ...] (entrées annulées ignorées)
+        self.actions = {}  # {action_id: (action, guild_id, target_id, due_at, payload)}
+        self.keys = {}  # {(action, guild_id, target_id): action_id}
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self.running = set()  # Tâches des actions en cours d'exécution
+
+        self.db.setup('''
+            CREATE TABLE IF NOT EXISTS scheduled_actions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                action TEXT NOT NULL,
+                guild_id INTEGER NOT NULL DEFAULT 0,
+                target_id INTEGER NOT NULL DEFAULT 0,
+                due_at REAL NOT NULL,
+                payload TEXT,
+                UNIQUE (action, guild_id, target_id)
+            )
+        ''')
+        self.load()
+
+    def __len__(self):
+        return len(self.actions)
+
+    def load(self):
+        """Recharge les actions en attente (bloquant, au démarrage)"""
+        rows = self.db.submit(lambda conn: conn.execute('''
+            SELECT id, action, guild_id, target_id, due_at, payload
+            FROM scheduled_actions
+        ''').fetchall()).result()
+
+        for action_id, action, guild_id, target_id, due_at, payload in rows:
+            self._arm(action_id, action, guild_id, target_id, due_at, json.loads(payload) if payload else None)
+
+    def register(self, action, handler):
+        """Associe une coroutine handler(guild_id, target_id, payload) à une action"""
+        self.handlers[action] = handler
+
+    def start(self):
+        """Démarre la tâche de déclenchement (idempotent)"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.dispatch())
+
+    async def stop(self, timeout=10):
+        """Arrête le déclenchement et laisse `timeout` secondes aux actions en cours
+
+        Une action interrompue reste en base et sera relancée au redémarrage.
+        """
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if not self.running:
+            return
+        _, unfinished = await asyncio.wait(set(self.running), timeout=timeout)
+        for task in unfinished:
+            task.cancel()
+        await asyncio.gather(*unfinished, return_exceptions=True)
+
+    def _arm(self, action_id, action, guild_id, target_id, due_at, payload):
+        self.actions[action_id] = (action, guild_id, target_id, due_at, payload)
+        self.keys[(action, guild_id, target_id)] = action_id
+        heapq.heappush(self.heap, (due_at, action_id))
+
+        if self.heap[0][1] == action_id:
+            self.wakeup.set()
+
+    def _disarm(self, action_id):
+        action, guild_id, target_id, _, _ = self.actions.pop(action_id)
+        if self.keys.get((action, guild_id, target_id)) == action_id:
+            del self.keys[(action, guild_id, target_id)]
+
+        # Compacter le tas quand les entrées annulées dominent
+        if len(self.heap) > 2 * len(self.actions) + 64:
+            self.heap = [(due_at, action_id) for due_at, action_id in self.heap if action_id in self.actions]
+            heapq.heapify(self.heap)
+
+    async def schedule(self, action, guild_id, target_id, delay, payload=None):
+        """Programme une action dans delay secondes (remplace l'existante)"""
+        guild_id = guild_id or 0
+        target_id = target_id or 0
+        due_at = time.time() + delay
+        encoded = json.dumps(payload) if payload is not None else None
+
+        def insert(conn):
+            cursor = conn.execute('''
+                INSERT OR REPLACE INTO scheduled_actions (action, guild_id, target_id, due_at, payload)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (action, guild_id, target_id, due_at, encoded))
+            return cursor.lastrowid
+
+        action_id = await self.db.run(insert)
+
+        previous = self.keys.get((action, guild_id, target_id))
+        if previous is not None:
+            self._disarm(previous)
+        self._arm(action_id, action, guild_id, target_id, due_at, payload)
+
+    async def cancel(self, action, guild_id, target_id):
+        """Annule une action programmée, retourne True si elle existait"""
+        action_id = self.keys.get((action, guild_id or 0, target_id or 0))
+        if action_id is None:
+            return False
+
+        self._disarm(action_id)
+        await self.db.execute('DELETE FROM scheduled_actions WHERE id = ?', (action_id,))
+        return True
+
+    def pending(self, action=None):
+        """Nombre d'actions en attente (éventuellement d'un seul type)"""
+        if action is None:
+            return len(self.actions)
+        return sum(1 for key in self.keys if key[0] == action)
+
+    async def dispatch(self):
+        """Déclenche les actions arrivées à échéance"""
+        while True:
+            self.wakeup.clear()
+
+            # Ignorer les entrées annulées ou remplacées
+            while self.heap and self.heap[0][1] not in self.actions:
+                heapq.heappop(self.heap)
+
+            if self.heap and self.heap[0][0] <= time.time():
+                _, action_id = heapq.heappop(self.heap)
+                action, guild_id, target_id, _, payload = self.actions[action_id]
+                self._disarm(action_id)
+                task = asyncio.create_task(self.run(action_id, action, guild_id, target_id, payload))
+                self.running.add(task)
+                task.add_done_callback(self.running.discard)
+                continue
+
+            timeout = self.heap[0][0] - time.time() if self.heap else None
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self, action_id, action, guild_id, target_id, payload):
+        """Exécute une action puis la retire de la base (sauf si elle est interrompue)"""
+        handler = self.handlers.get(action)
+        try:
+            if handler is None:
+                print(f"Aucun gestionnaire pour l'action planifiée {action}")
+            else:
+                await handler(guild_id, target_id, payload)
+        except Exception as e:
+            print(f"Erreur lors de l'action planifiée {action}: {e}")
+        await self.db.execute('DELETE FROM scheduled_actions WHERE id = ?', (action_id,))
@@ -0,0 +1,78 @@
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from core.spam import SpamTracker
+
+class GuildSecurityState:
+    """État de sécurité d'un serveur (spam, mutes, arrivées, lockdown)"""
+
+    __slots__ = (
+        'spam_tracker', 'muted_users', 'recent_joins',
+        'raid_detected', 'raid_lockdown', 'last_activity'
+    )
+
+    def __init__(self, spam_time_window, max_history):
+        self.spam_tracker = SpamTracker(spam_time_window, max_history)
+        self.muted_users = {}  # {user_id: {'until': datetime, 'reason': str}}
+        self.recent_joins = deque()  # [{'user_id': int, 'join_time': datetime, 'account_age': int}, ...]
+        self.raid_detected = False
+        self.raid_lockdown = False
+        self.last_activity = time.monotonic()
+
+    def expire_joins(self, cutoff):
+        """Retire les arrivées antérieures à cutoff (datetime)"""
+        while self.recent_joins and self.recent_joins[0]['join_time'] <= cutoff:
+            self.recent_joins.popleft()
+
+    def is_idle(self, now, idle_timeout):
+        """Vérifie si l'état peut être libéré sans perte d'information"""
+        return (
+            now - self.last_activity >= idle_timeout
+            and not self.raid_lockdown
+            and not self.muted_users
+            and not self.recent_joins
+            and not len(self.spam_tracker)
+        )
+
+class GuildStateStore:
+    """États de sécurité par serveur, créés à la demande et libérés quand inactifs"""
+
+    def __init__(self, spam_time_window, max_history, idle_timeout=3600, join_window=1800):
+        self.spam_time_window = spam_time_window
+        self.max_history = max_history
+        self.idle_timeout = idle_timeout
+        self.join_window = join_window  # Durée (secondes) pendant laquelle une arrivée est gardée
+        self.states = {}  # {guild_id: GuildSecurityState}
+
+    def __len__(self):
+        return len(self.states)
+
+    def get(self, guild_id):
+        """Retourne l'état d'un serveur, en le créant si besoin"""
+        state = self.states.get(guild_id)
+        if state is None:
+            state = self.states[guild_id] = GuildSecurityState(self.spam_time_window, self.max_history)
+        state.last_activity = time.monotonic()
+        return state
+
+    def peek(self, guild_id):
+        """Retourne l'état d'un serveur sans le créer (ou None)"""
+        return self.states.get(guild_id)
+
+    def items(self):
+        return list(self.states.items())
+
+    def cleanup(self, now=None, current_time=None):
+        """Libère les états inactifs
+
+        now : horloge monotone (activité, historique des messages) ;
+        current_time : datetime des arrivées (datetime.now() par défaut).
+        """
+        now = time.monotonic() if now is None else now
+        current_time = datetime.now() if current_time is None else current_time
+        join_cutoff = current_time - timedelta(seconds=self.join_window)
+        for guild_id, state in list(self.states.items()):
+            state.spam_tracker.cleanup(now)
+            state.expire_joins(join_cutoff)
+            if state.is_idle(now, self.idle_timeout):
+                del self.states[guild_id]
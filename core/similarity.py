@@ -0,0 +1,266 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import blake2b
+
+# -- FINGERPRINTS --
+
+def simhash(text, shingle_size=3):
+    """Empreinte SimHash 64 bits des n-grammes de caractères d'un texte
+
+    Les bits des n-grammes sont additionnés colonne par colonne avec des
+    compteurs « bit-slicés » (une addition binaire sur des entiers 64 bits
+    par n-gramme) au lieu d'une boucle sur les 64 bits.
+    """
+    text = ' '.join(text.split())
+    if len(text) <= shingle_size:
+        shingles = {text}
+    else:
+        shingles = {text[i:i + shingle_size] for i in range(len(text) - shingle_size + 1)}
+
+    counters = []  # counters[j] : bit j du compteur de chaque colonne
+    for shingle in shingles:
+        carry = int.from_bytes(blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for j in range(len(counters)):
+            if not carry:
+                break
+            counters[j], carry = counters[j] ^ carry, counters[j] & carry
+        if carry:
+            counters.append(carry)
+
+    half = len(shingles) / 2
+    fingerprint = 0
+    for bit in range(64):
+        count = 0
+        for j, counter in enumerate(counters):
+            count |= ((counter >> bit) & 1) << j
+        if count > half:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+def simhash_batch(texts):
+    """Empreintes d'un lot de textes (exécutable dans un processus séparé)"""
+    return [simhash(text) for text in texts]
+
+def similarity(a, b):
+    """Similarité entre deux empreintes (1 - distance de Hamming / 64)"""
+    return 1 - (a ^ b).bit_count() / 64
+
+class Fingerprinter:
+    """Calcul des empreintes par lots
+
+    Les messages reçus pendant une même itération de la boucle sont traités
+    ensemble. Un petit lot est calculé sur place ; au-delà de
+    `offload_threshold` messages en attente, le lot part dans un pool de
+    processus pour ne pas retarder la boucle d'événements.
+    """
+
+    def __init__(self, offload_threshold=64, max_workers=2):
+        self.offload_threshold = offload_threshold
+        self.max_workers = max_workers
+        self.pool = None  # Créé à la première surcharge
+        self.pending = []  # [(texte, future), ...]
+
+    async def fingerprint(self, text):
+        """Retourne l'empreinte d'un texte"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self.pending:
+            loop.call_soon(self._flush)
+        self.pending.append((text, future))
+        return await future
+
+    def _flush(self):
+        batch, self.pending = self.pending, []
+        texts = [text for text, _ in batch]
+
+        if len(batch) < self.offload_threshold:
+            self._resolve(batch, simhash_batch(texts))
+            return
+
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        task = asyncio.get_running_loop().run_in_executor(self.pool, simhash_batch, texts)
+        task.add_done_callback(lambda done: self._resolve_task(batch, done))
+
+    def _resolve_task(self, batch, task):
+        """Transmet le résultat d'un lot calculé dans le pool de processus"""
+        if task.cancelled() or task.exception():
+            # Pool indisponible : calculer sur place plutôt que perdre le lot
+            self._resolve(batch, simhash_batch([text for text, _ in batch]))
+            return
+        self._resolve(batch, task.result())
+
+    @staticmethod
+    def _resolve(batch, results):
+        for (_, future), fingerprint in zip(batch, results):
+            if not future.done():
+                future.set_result(fingerprint)
+
+    def close(self):
+        """Arrête le pool de processus"""
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+# -- INDEX LSH --
+
+class SimilarityIndex:
+    """Fenêtre glissante d'empreintes indexées par bandes (LSH)
+
+    L'empreinte est découpée en `max_distance + 1` bandes : deux empreintes
+    à distance de Hamming <= max_distance ont forcément une bande identique,
+    donc seuls les messages partageant une bande sont comparés. Chaque
+    entrée garde la référence de son message pour pouvoir supprimer toutes
+    les copies proches d'un message signalé.
+    """
+
+    __slots__ = ('max_distance', 'bands', 'entries', 'fingerprints', 'buckets', 'ids')
+
+    def __init__(self, max_distance, max_entries):
+        self.max_distance = max_distance
+        self.bands = self._make_bands(min(64, max_distance + 1))
+        self.entries = deque(maxlen=max_entries)  # [(timestamp, entry_id), ...]
+        self.fingerprints = {}  # {entry_id: [empreinte, author_id, (channel_id, message_id) ou None]}
+        self.buckets = [{} for _ in self.bands]  # [{valeur de bande: {entry_id, ...}}, ...]
+        self.ids = itertools.count()
+
+    @staticmethod
+    def _make_bands(count):
+        """Découpe 64 bits en `count` bandes (décalage, masque)"""
+        bands = []
+        start = 0
+        for i in range(count):
+            width = (64 - start) // (count - i)
+            bands.append((start, (1 << width) - 1))
+            start += width
+        return bands
+
+    def _pop_oldest(self):
+        _, entry_id = self.entries.popleft()
+        fingerprint = self.fingerprints.pop(entry_id)[0]
+        for buckets, (shift, mask) in zip(self.buckets, self.bands):
+            key = (fingerprint >> shift) & mask
+            bucket = buckets[key]
+            bucket.discard(entry_id)
+            if not bucket:
+                del buckets[key]
+
+    def expire(self, cutoff):
+        """Retire les entrées antérieures à cutoff"""
+        while self.entries and self.entries[0][0] <= cutoff:
+            self._pop_oldest()
+
+    def _similar(self, fingerprint):
+        """Entrées à distance de Hamming <= max_distance d'une empreinte"""
+        candidates = set()
+        for buckets, (shift, mask) in zip(self.buckets, self.bands):
+            bucket = buckets.get((fingerprint >> shift) & mask)
+            if bucket:
+                candidates.update(bucket)
+        return [
+            self.fingerprints[entry_id] for entry_id in candidates
+            if (fingerprint ^ self.fingerprints[entry_id][0]).bit_count() <= self.max_distance
+        ]
+
+    def add(self, now, fingerprint, author_id, ref=None):
+        """Ajoute une empreinte et retourne {author_id: nombre de messages similaires}"""
+        similar = {author_id: 1}
+        for _, other_author, _ in self._similar(fingerprint):
+            similar[other_author] = similar.get(other_author, 0) + 1
+
+        if len(self.entries) == self.entries.maxlen:
+            self._pop_oldest()
+        entry_id = next(self.ids)
+        self.entries.append((now, entry_id))
+        self.fingerprints[entry_id] = [fingerprint, author_id, ref]
+        for buckets, (shift, mask) in zip(self.buckets, self.bands):
+            buckets.setdefault((fingerprint >> shift) & mask, set()).add(entry_id)
+
+        return similar
+
+    def take_messages(self, fingerprint):
+        """Retire et retourne les références des messages proches d'une empreinte"""
+        refs = []
+        for entry in self._similar(fingerprint):
+            if entry[2] is not None:
+                refs.append(entry[2])
+                entry[2] = None
+        return refs
+
+class NearDuplicateDetector:
+    """Détection de messages quasi identiques, par utilisateur et par serveur"""
+
+    def __init__(self, threshold, user_window, user_max_entries, guild_accounts, guild_window, guild_max_entries):
+        self.max_distance = int(64 * (1 - threshold))
+        self.user_window = user_window
+        self.user_max_entries = user_max_entries
+        self.guild_accounts = guild_accounts
+        self.guild_window = guild_window
+        self.guild_max_entries = guild_max_entries
+
+        self.users = {}  # {(guild_id, user_id): SimilarityIndex}
+        self.guilds = {}  # {guild_id: SimilarityIndex}
+        self.reported = {}  # {(guild_id, author_id): timestamp du signalement}
+
+    def add(self, guild_id, user_id, fingerprint, now=None, ref=None):
+        """Enregistre une empreinte
+
+        Retourne (copies proches envoyées par l'utilisateur, auteurs du
+        serveur à sanctionner pour spam coordonné). ref : (channel_id,
+        message_id), pour pouvoir supprimer les copies ensuite.
+        """
+        now = time.monotonic() if now is None else now
+
+        index = self.users.get((guild_id, user_id))
+        if index is None:
+            index = self.users[(guild_id, user_id)] = SimilarityIndex(self.max_distance, self.user_max_entries)
+        index.expire(now - self.user_window)
+        user_count = index.add(now, fingerprint, user_id, ref)[user_id]
+
+        if guild_id is None:
+            return user_count, []
+
+        index = self.guilds.get(guild_id)
+        if index is None:
+            index = self.guilds[guild_id] = SimilarityIndex(self.max_distance, self.guild_max_entries)
+        index.expire(now - self.guild_window)
+        authors = index.add(now, fingerprint, user_id, ref)
+        if len(authors) < self.guild_accounts:
+            return user_count, []
+
+        # Ne signaler chaque compte qu'une fois par fenêtre
+        cutoff = now - self.guild_window
+        flagged = []
+        for author_id in authors:
+            reported_at = self.reported.get((guild_id, author_id))
+            if reported_at is None or reported_at <= cutoff:
+                self.reported[(guild_id, author_id)] = now
+                flagged.append(author_id)
+        return user_count, flagged
+
+    def take_messages(self, guild_id, user_id, fingerprint):
+        """Retire et retourne les références des copies proches envoyées par un utilisateur"""
+        index = self.users.get((guild_id, user_id))
+        return index.take_messages(fingerprint) if index else []
+
+    def take_guild_messages(self, guild_id, fingerprint):
+        """Retire et retourne les références des copies proches envoyées dans un serveur"""
+        index = self.guilds.get(guild_id)
+        return index.take_messages(fingerprint) if index else []
+
+    def cleanup(self, now=None):
+        """Supprime les index et signalements expirés"""
+        now = time.monotonic() if now is None else now
+
+        for indexes, window in ((self.users, self.user_window), (self.guilds, self.guild_window)):
+            for key in list(indexes):
+                indexes[key].expire(now - window)
+                if not indexes[key].entries:
+                    del indexes[key]
+
+        cutoff = now - self.guild_window
+        for key in [key for key, reported_at in self.reported.items() if reported_at <= cutoff]:
+            del self.reported[key]
@@ -0,0 +1,270 @@
+import time
+from collections import deque
+from hashlib import blake2b
+
+def content_hash(content):
+    """Empreinte 64 bits d'un contenu normalisé"""
+    return int.from_bytes(blake2b(content.encode('utf-8'), digest_size=8).digest(), 'big')
+
+class UserHistory:
+    """Historique borné des messages récents d'un utilisateur"""
+
+    __slots__ = ('entries', 'counts')
+
+    def __init__(self, max_entries):
+        self.entries = deque(maxlen=max_entries)  # [[timestamp, hash, (channel_id, message_id) ou None], ...]
+        self.counts = {}  # {hash: occurrences dans la fenêtre}
+
+    def _pop_oldest(self):
+        _, digest, _ = self.entries.popleft()
+        remaining = self.counts[digest] - 1
+        if remaining:
+            self.counts[digest] = remaining
+        else:
+            del self.counts[digest]
+
+    def expire(self, cutoff):
+        """Retire les entrées antérieures à cutoff"""
+        while self.entries and self.entries[0][0] <= cutoff:
+            self._pop_oldest()
+
+    def add(self, now, digest, ref=None):
+        """Ajoute une entrée et retourne le nombre d'occurrences de ce hash"""
+        if len(self.entries) == self.entries.maxlen:
+            self._pop_oldest()
+        self.entries.append([now, digest, ref])
+        count = self.counts.get(digest, 0) + 1
+        self.counts[digest] = count
+        return count
+
+    def take_messages(self, digest):
+        """Retire et retourne les références des messages portant ce hash"""
+        refs = []
+        for entry in self.entries:
+            if entry[1] == digest and entry[2] is not None:
+                refs.append(entry[2])
+                entry[2] = None
+        return refs
+
+class SpamTracker:
+    """Détection de messages répétés en O(1) par message
+
+    Chaque utilisateur a un tampon circulaire de (timestamp, hash 64 bits,
+    référence du message) et un compteur par hash tenu à jour à l'ajout et à
+    l'expiration des entrées. Le texte des messages n'est jamais conservé.
+    """
+
+    def __init__(self, time_window, max_entries=20):
+        self.time_window = time_window
+        self.max_entries = max_entries
+        self.histories = {}  # {user_id: UserHistory}
+
+    def __len__(self):
+        return len(self.histories)
+
+    def add(self, user_id, digest, now=None, ref=None):
+        """Enregistre un message (par son hash) et retourne le nombre de copies dans la fenêtre
+
+        ref : (channel_id, message_id), pour pouvoir supprimer les copies ensuite.
+        """
+        now = time.monotonic() if now is None else now
+
+        history = self.histories.get(user_id)
+        if history is None:
+            history = self.histories[user_id] = UserHistory(self.max_entries)
+
+        history.expire(now - self.time_window)
+        return history.add(now, digest, ref)
+
+    def take_messages(self, user_id, digest):
+        """Retire et retourne les références [(channel_id, message_id), ...] des copies d'un message"""
+        history = self.histories.get(user_id)
+        return history.take_messages(digest) if history else []
+
+    def cleanup(self, now=None):
+        """Supprime les historiques expirés des utilisateurs inactifs"""
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.time_window
+
+        for user_id in list(self.histories):
+            history = self.histories[user_id]
+            history.expire(cutoff)
+            if not history.entries:
+                del self.histories[user_id]
+
+class GuildContentIndex:
+    """Fenêtre glissante des contenus récents d'un serveur"""
+
+    __slots__ = ('entries', 'authors', 'flagged')
+
+    def __init__(self, max_entries):
+        self.entries = deque(maxlen=max_entries)  # [[timestamp, hash, author_id, (channel_id, message_id) ou None], ...]
+        self.authors = {}  # {hash: {author_id: occurrences}}
+        self.flagged = {}  # {hash: {author_id, ...}} auteurs déjà signalés
+
+    def _pop_oldest(self):
+        _, digest, author_id, _ = self.entries.popleft()
+        authors = self.authors[digest]
+        remaining = authors[author_id] - 1
+        if remaining:
+            authors[author_id] = remaining
+            return
+
+        del authors[author_id]
+        if not authors:
+            del self.authors[digest]
+            self.flagged.pop(digest, None)
+
+    def expire(self, cutoff):
+        """Retire les entrées antérieures à cutoff"""
+        while self.entries and self.entries[0][0] <= cutoff:
+            self._pop_oldest()
+
+    def add(self, now, digest, author_id, threshold, ref=None):
+        """Ajoute une entrée et retourne les auteurs à sanctionner"""
+        if len(self.entries) == self.entries.maxlen:
+            self._pop_oldest()
+        self.entries.append([now, digest, author_id, ref])
+
+        authors = self.authors.setdefault(digest, {})
+        authors[author_id] = authors.get(author_id, 0) + 1
+        if len(authors) < threshold:
+            return []
+
+        # Premier déclenchement : tous les auteurs, ensuite uniquement les nouveaux
+        reported = self.flagged.get(digest)
+        if reported is None:
+            self.flagged[digest] = set(authors)
+            return list(authors)
+        if author_id not in reported:
+            reported.add(author_id)
+            return [author_id]
+        return []
+
+    def take_messages(self, digest):
+        """Retire et retourne les références des messages portant ce hash"""
+        refs = []
+        for entry in self.entries:
+            if entry[1] == digest and entry[3] is not None:
+                refs.append(entry[3])
+                entry[3] = None
+        return refs
+
+class CoordinatedSpamIndex:
+    """Détection d'un même contenu envoyé par plusieurs comptes d'un serveur
+
+    Pour chaque serveur, un index hash -> auteurs distincts est tenu sur une
+    fenêtre glissante bornée en taille et en temps. Dès que `threshold`
+    comptes différents ont envoyé le même contenu, ils sont tous signalés.
+    """
+
+    def __init__(self, threshold, time_window, max_entries=5000):
+        self.threshold = threshold
+        self.time_window = time_window
+        self.max_entries = max_entries
+        self.guilds = {}  # {guild_id: GuildContentIndex}
+
+    def add(self, guild_id, author_id, digest, now=None, ref=None):
+        """Enregistre un message et retourne la liste des auteurs à sanctionner"""
+        now = time.monotonic() if now is None else now
+
+        index = self.guilds.get(guild_id)
+        if index is None:
+            index = self.guilds[guild_id] = GuildContentIndex(self.max_entries)
+
+        index.expire(now - self.time_window)
+        return index.add(now, digest, author_id, self.threshold, ref)
+
+    def take_messages(self, guild_id, digest):
+        """Retire et retourne les références des copies d'un contenu dans un serveur"""
+        index = self.guilds.get(guild_id)
+        return index.take_messages(digest) if index else []
+
+    def cleanup(self, now=None):
+        """Supprime les index expirés des serveurs inactifs"""
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.time_window
+
+        for guild_id in list(self.guilds):
+            index = self.guilds[guild_id]
+            index.expire(cutoff)
+            if not index.entries:
+                del self.guilds[guild_id]
+
+class TokenBucketStore:
+    """Seaux à jetons indexés par clé, remplis paresseusement à l'accès
+
+    Aucun minuteur : le niveau d'un seau est recalculé à partir du temps
+    écoulé depuis son dernier accès. Les seaux sont rangés par ordre
+    d'accès, ce qui permet d'évincer les plus anciens en O(1) quand la
+    taille maximale est atteinte ou qu'ils sont redevenus pleins.
+    """
+
+    def __init__(self, capacity, refill_rate, max_entries=50000):
+        self.capacity = capacity
+        self.refill_rate = refill_rate  # Jetons par seconde
+        self.max_entries = max_entries
+        self.buckets = {}  # {key: [jetons, dernier accès, déjà signalé]}
+
+    def __len__(self):
+        return len(self.buckets)
+
+    def _level(self, bucket, now):
+        return min(self.capacity, bucket[0] + (now - bucket[1]) * self.refill_rate)
+
+    def consume(self, key, now=None, cost=1):
+        """Consomme des jetons
+
+        Retourne (autorisé, premier refus) : le second booléen n'est vrai
+        qu'au premier message refusé depuis le dernier message autorisé.
+        """
+        now = time.monotonic() if now is None else now
+
+        bucket = self.buckets.pop(key, None)
+        if bucket is None:
+            bucket = [self.capacity, now, False]
+            if len(self.buckets) >= self.max_entries:
+                del self.buckets[next(iter(self.buckets))]
+        self.buckets[key] = bucket  # Déplacé en fin d'ordre d'accès
+
+        tokens = self._level(bucket, now)
+        bucket[1] = now
+        if tokens >= cost:
+            bucket[0] = tokens - cost
+            bucket[2] = False
+            return True, False
+
+        bucket[0] = tokens
+        first_denial = not bucket[2]
+        bucket[2] = True
+        return False, first_denial
+
+    def fill_ratio(self, key, now=None):
+        """Niveau actuel d'un seau entre 0 (vide) et 1 (plein)"""
+        now = time.monotonic() if now is None else now
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            return 1.0
+        return self._level(bucket, now) / self.capacity
+
+    def pressure(self, match=None, now=None, limit=5):
+        """Seaux les plus vidés [(key, niveau), ...], filtrés par match(key)"""
+        now = time.monotonic() if now is None else now
+        levels = [
+            (key, self._level(bucket, now) / self.capacity)
+            for key, bucket in self.buckets.items()
+            if match is None or match(key)
+        ]
+        levels.sort(key=lambda item: item[1])
+        return [item for item in levels[:limit] if item[1] < 1]
+
+    def cleanup(self, now=None):
+        """Évince les seaux redevenus pleins (équivalents à un seau neuf)"""
+        now = time.monotonic() if now is None else now
+        idle = self.capacity / self.refill_rate
+
+        # Ordre d'accès : on s'arrête au premier seau encore actif
+        for key in list(self.buckets):
+            if now - self.buckets[key][1] < idle:
+                break
+            del self.buckets[key]
@@ -0,0 +1,109 @@
+import time
+from collections import OrderedDict
+
+class WarningScoreStore:
+    """Score d'avertissements par membre et par serveur, décroissant avec le temps
+
+    Chaque avertissement vaut 1 puis perd la moitié de sa valeur toutes les
+    `half_life` secondes. Le score d'un membre est chargé depuis
+    `security_warnings` la première fois qu'il est vu, gardé dans un cache
+    LRU borné, et chaque nouvel avertissement est écrit immédiatement en base :
+    l'escalade survit aux redémarrages sans croissance mémoire.
+    """
+
+    def __init__(self, db, half_life=21600, max_entries=10000, action_type='spam_warning'):
+        self.db = db
+        self.half_life = half_life
+        self.horizon = 10 * half_life  # Au-delà, un avertissement ne pèse plus rien
+        self.max_entries = max_entries
+        self.action_type = action_type
+        self.entries = OrderedDict()  # {(guild_id, user_id): [score, timestamp du score]}
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def count(score):
+        """Nombre d'avertissements équivalent à un score"""
+        return int(score + 0.5)
+
+    def _decayed(self, entry, now):
+        return entry[0] * 0.5 ** (max(0.0, now - entry[1]) / self.half_life)
+
+    def _remember(self, key, score, now):
+        self.entries[key] = [score, now]
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _load(self, conn, guild_id, user_id, now):
+        """Recalcule le score depuis la base (avertissements des `horizon` dernières secondes)"""
+        rows = conn.execute('''
+            SELECT CAST(strftime('%s', timestamp) AS INTEGER)
+            FROM security_warnings
+            WHERE user_id = ? AND (guild_id = ? OR guild_id IS NULL)
+              AND action_type = ? AND timestamp >= datetime(?, 'unixepoch')
+        ''', (user_id, guild_id, self.action_type, int(now - self.horizon))).fetchall()
+        return sum(0.5 ** (max(0.0, now - timestamp) / self.half_life) for (timestamp,) in rows)
+
+    def _insert(self, conn, guild_id, user_id, reason, moderator_id, now):
+        conn.execute('''
+            INSERT INTO security_warnings (guild_id, user_id, reason, moderator_id, action_type, timestamp)
+            VALUES (?, ?, ?, ?, ?, datetime(?, 'unixepoch'))
+        ''', (guild_id, user_id, reason, moderator_id, self.action_type, int(now)))
+
+    async def get(self, guild_id, user_id):
+        """Score actuel d'un membre"""
+        now = time.time()
+        key = (guild_id, user_id)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return self._decayed(entry, now)
+
+        score = await self.db.run(self._load, guild_id, user_id, now)
+        if key in self.entries:
+            # Chargé par un autre appel entre-temps
+            return self._decayed(self.entries[key], time.time())
+        self._remember(key, score, now)
+        return score
+
+    async def add(self, guild_id, user_id, reason, moderator_id=None):
+        """Enregistre un avertissement et retourne le nouveau score"""
+        now = time.time()
+        key = (guild_id, user_id)
+        entry = self.entries.get(key)
+        if entry is not None:
+            score = self._decayed(entry, now) + 1
+            self._remember(key, score, now)
+            await self.db.run(self._insert, guild_id, user_id, reason, moderator_id, now)
+            return score
+
+        # Premier avertissement vu depuis le démarrage : écrire puis relire l'historique
+        def insert_and_load(conn):
+            self._insert(conn, guild_id, user_id, reason, moderator_id, now)
+            return self._load(conn, guild_id, user_id, now)
+
+        score = await self.db.run(insert_and_load)
+        self._remember(key, score, now)
+        return score
+
+    async def clear(self, guild_id, user_id):
+        """Efface les avertissements d'un membre dans un serveur, retourne le nombre supprimé
+
+        Les avertissements antérieurs à la colonne guild_id (guild_id NULL)
+        comptent dans tous les serveurs, ils sont donc effacés aussi.
+        """
+        self.entries.pop((guild_id, user_id), None)
+        return await self.db.execute(
+            'DELETE FROM security_warnings WHERE user_id = ? AND (guild_id = ? OR guild_id IS NULL)',
+            (user_id, guild_id)
+        )
+
+    def active(self, guild_id):
+        """Nombre de membres en cache ayant encore au moins un avertissement actif"""
+        now = time.time()
+        return sum(
+            1 for (entry_guild_id, _), entry in self.entries.items()
+            if entry_guild_id == guild_id and self.count(self._decayed(entry, now)) > 0
+        )
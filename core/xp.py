@@ -0,0 +1,122 @@
+import asyncio
+from datetime import datetime
+
+class XPAggregator:
+    """Accumulateur d'XP en mémoire avec écriture différée
+
+    Les totaux de chaque utilisateur sont gardés en cache pour calculer les
+    passages de niveau immédiatement. Les deltas sont écrits dans la table
+    `levels` par lots (un seul executemany) toutes les `flush_interval`
+    secondes ou dès que `max_pending` utilisateurs sont en attente.
+    """
+
+    def __init__(self, db, calculate_level, flush_interval=30, max_pending=100):
+        self.db = db
+        self.calculate_level = calculate_level
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self.totals = {}  # {user_id: [xp, level, total_messages, total_voice_time]}
+        self.pending = {}  # {user_id: [xp, total_messages, total_voice_time, last_update]}
+        self.flushing = None  # Tâche de flush en cours
+
+    @property
+    def pending_count(self):
+        """Nombre de lignes en attente d'écriture"""
+        return len(self.pending)
+
+    async def get(self, user_id):
+        """Retourne (xp, level, total_messages, total_voice_time) depuis le cache"""
+        if user_id not in self.totals:
+            row = await self.db.query_one('''
+                SELECT xp, level, total_messages, total_voice_time
+                FROM levels
+                WHERE user_id = ?
+            ''', (user_id,))
+            # Une autre coroutine a pu remplir le cache pendant la lecture
+            if user_id not in self.totals:
+                self.totals[user_id] = list(row) if row else [0, 1, 0, 0]
+
+        return tuple(self.totals[user_id])
+
+    async def add(self, user_id, xp_gained, message_count=0, voice_time=0):
+        """Ajoute de l'XP et retourne (ancien niveau, nouveau niveau)"""
+        await self.get(user_id)
+
+        totals = self.totals[user_id]
+        old_level = totals[1]
+        totals[0] += xp_gained
+        totals[1] = self.calculate_level(totals[0])
+        totals[2] += message_count
+        totals[3] += voice_time
+
+        delta = self.pending.setdefault(user_id, [0, 0, 0, None])
+        delta[0] += xp_gained
+        delta[1] += message_count
+        delta[2] += voice_time
+        delta[3] = datetime.now()
+
+        if len(self.pending) >= self.max_pending and self.flushing is None:
+            self.flushing = asyncio.create_task(self.flush())
+
+        return old_level, totals[1]
+
+    def _take_pending(self):
+        """Détache les deltas en attente et prépare les paramètres du lot"""
+        pending, self.pending = self.pending, {}
+        rows = [
+            (user_id, xp, self.totals[user_id][1], messages, voice, last_update)
+            for user_id, (xp, messages, voice, last_update) in pending.items()
+        ]
+        return pending, rows
+
+    def _restore_pending(self, pending):
+        """Réintègre des deltas dont l'écriture a échoué"""
+        for user_id, (xp, messages, voice, last_update) in pending.items():
+            delta = self.pending.setdefault(user_id, [0, 0, 0, None])
+            delta[0] += xp
+            delta[1] += messages
+            delta[2] += voice
+            delta[3] = delta[3] or last_update
+
+    @staticmethod
+    def _write(conn, rows):
+        """Écrit un lot de deltas (thread de la base)"""
+        conn.executemany('''
+            INSERT INTO levels (user_id, xp, level, total_messages, total_voice_time, last_message_time)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                xp = xp + excluded.xp,
+                level = excluded.level,
+                total_messages = total_messages + excluded.total_messages,
+                total_voice_time = total_voice_time + excluded.total_voice_time,
+                last_message_time = excluded.last_message_time
+        ''', rows)
+
+    async def flush(self):
+        """Écrit tous les deltas en attente dans une seule transaction"""
+        try:
+            if not self.pending:
+                return
+
+            pending, rows = self._take_pending()
+            try:
+                await self.db.run(self._write, rows)
+            except Exception as e:
+                self._restore_pending(pending)
+                print(f"Erreur lors de l'écriture de l'XP: {e}")
+        finally:
+            if self.flushing is asyncio.current_task():
+                self.flushing = None
+
+    def flush_nowait(self):
+        """Planifie l'écriture des deltas sans attendre (déchargement du cog)
+
+        La requête passe par la file de la base : elle sera exécutée avant
+        la fermeture de la connexion.
+        """
+        if not self.pending:
+            return
+
+        _, rows = self._take_pending()
+        self.db.submit(self._write, rows)
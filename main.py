@@ -1,17 +1,44 @@
-import discord 
+import discord
 from discord.ext import commands
-import os 
-import json 
+import os
+import json
+from core.database import Database
+from core.scheduler import Scheduler
+from core.bans import BanPipeline
+from core.notifications import NotificationRouter
+from core.pipeline import MessagePipeline
 
 with open('config.json', 'r') as f:
     config = json.load(f)
     token = config['token']
 
-bot = commands.Bot(command_prefix='+', intents=discord.Intents.all())
+class Bot(commands.Bot):
+    async def close(self):
+        # Laisser finir les actions planifiées en cours avant la déconnexion
+        await self.scheduler.stop()
+        await super().close()
+
+bot = Bot(command_prefix='+', intents=discord.Intents.all())
+
+# Stockage partagé par tous les cogs (une seule connexion SQLite)
+bot.db = Database('server.db')
+
+# Actions différées persistantes (fins de mute, de lockdown...)
+bot.scheduler = Scheduler(bot.db)
+
+# Bannissements en masse (anti-raid, modération)
+bot.bans = BanPipeline(bot.db)
+
+# Salon de notification par serveur et regroupement des alertes
+bot.notifier = NotificationRouter(bot)
+
+# Traitement des messages partagé par les cogs (prétraitement unique, étapes par priorité)
+bot.pipeline = MessagePipeline(bot)
 
 @bot.event
 async def on_ready():
     print(f'Logged in as {bot.user}')
+    bot.scheduler.start()
 
 def load_cogs(start_dir):
     """Recursively load cogs from the start directory"""
@@ -26,4 +53,13 @@ def load_cogs(start_dir):
 
 if __name__ == '__main__':
     load_cogs('cogs')
-    bot.run(token)
\ No newline at end of file
+    try:
+        bot.run(token)
+    finally:
+        # Décharger les cogs pour qu'ils écrivent leurs données en attente
+        for extension in list(bot.extensions):
+            try:
+                bot.unload_extension(extension)
+            except Exception as e:
+                print(f'Error unloading {extension}: {e}')
+        bot.db.close()
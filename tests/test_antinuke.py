@@ -0,0 +1,76 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from core.antinuke import AuditLogAttributor, ExecutorCounters, index_snapshot
+
+def audit_entry(entry_id, action, target_id, user_id):
+    return SimpleNamespace(
+        id=entry_id, action=action,
+        target=SimpleNamespace(id=target_id) if target_id is not None else None,
+        user=SimpleNamespace(id=user_id)
+    )
+
+class FakeGuild:
+    """Serveur dont le journal d'audit est une liste, avec compteur de lectures"""
+
+    def __init__(self, guild_id, entries=()):
+        self.id = guild_id
+        self.entries = list(entries)
+        self.fetches = 0
+
+    async def audit_logs(self, limit=50):
+        self.fetches += 1
+        for entry in self.entries[-limit:]:
+            yield entry
+
+def test_counters_use_a_sliding_window():
+    counters = ExecutorCounters(time_window=10)
+    assert [counters.hit(1, 42, 'ban', now=now) for now in (0, 1, 2)] == [1, 2, 3]
+    assert counters.hit(1, 42, 'ban', now=11) == 2
+    assert counters.hit(1, 43, 'ban', now=11) == 1
+    assert counters.hit(1, 42, 'role_delete', now=11) == 1
+
+    counters.reset(1, 42)
+    assert counters.hit(1, 42, 'ban', now=12) == 1
+    counters.cleanup(now=100)
+    assert not counters.windows
+
+def test_record_and_match_consume_entries_by_target():
+    attributor = AuditLogAttributor()
+    attributor.record(1, audit_entry(100, 'ban', 555, 42))
+    attributor.record(1, audit_entry(101, 'ban', 556, 43))
+
+    assert attributor._match(1, 'ban', 556).executor_id == 43
+    assert attributor._match(1, 'ban', 556) is None
+    assert attributor._match(1, 'channel_delete', 555) is None
+    assert attributor._match(1, 'ban', 555).executor_id == 42
+
+def test_resolve_batches_concurrent_requests_into_one_fetch():
+    guild = FakeGuild(1, [audit_entry(100 + i, 'channel_delete', 500 + i, 42) for i in range(5)])
+    attributor = AuditLogAttributor(batch_delay=0.01)
+
+    async def run():
+        entries = await asyncio.gather(*(attributor.resolve(guild, 'channel_delete', 500 + i) for i in range(5)))
+        return entries, dict(attributor.fetching)
+
+    entries, fetching = asyncio.run(run())
+    assert [entry.target_id for entry in entries] == [500, 501, 502, 503, 504]
+    assert guild.fetches == 1
+    assert fetching == {}
+
+def test_resolve_gives_up_after_the_attempts():
+    guild = FakeGuild(1)
+    attributor = AuditLogAttributor(batch_delay=0.001, attempts=2)
+    assert asyncio.run(attributor.resolve(guild, 'webhook_create', 9)) is None
+    assert guild.fetches == 2
+    assert not attributor.fetching and not attributor.waiters
+
+def test_index_snapshot_keys_by_id():
+    backup = {
+        'roles': [{'id': 1, 'name': 'Admin'}, {'name': 'sans id'}],
+        'categories': [{'id': 2, 'name': 'Général'}],
+        'channels': [{'id': 3, 'name': 'discussion', 'type': 'text'}]
+    }
+    snapshot = index_snapshot(backup)
+    assert set(snapshot['roles']) == {1}
+    assert set(snapshot['channels']) == {2, 3}
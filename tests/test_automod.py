@@ -0,0 +1,121 @@
+import re
+import pytest
+from core.automaton import AhoCorasick
+from core.automod import MessageFacts, Parser, RuleSet, RuleSyntaxError, required_literal, tokenize
+
+# -- ANALYSE --
+
+def test_parse_builds_the_tree_with_precedence():
+    condition, actions = Parser('mentions >= 5 or not links > 0 and content contains "Free" then delete, mute 600').parse()
+    assert condition == (
+        'or',
+        ('cmp', 'mentions', '>=', 5.0),
+        ('and', ('not', ('cmp', 'links', '>', 0.0)), ('contains', 'free'))
+    )
+    assert actions == [('delete', None), ('mute', 600)]
+
+def test_parse_regex_with_flags_and_parentheses():
+    condition, actions = Parser('(content ~ /disc[o0]rd\\.gg/s) then ban').parse()
+    assert condition == ('regex', 'disc[o0]rd\\.gg', 's')
+    assert actions == [('ban', None)]
+
+@pytest.mark.parametrize('source, message', [
+    ('mentions >= 5', "`then` attendu"),
+    ('mentions >= 5 then', "fin de règle"),
+    ('mentions >= then delete', "`number` attendu"),
+    ('followers > 3 then delete', "Champ inconnu `followers`"),
+    ('mentions ~ 3 then delete', "Comparateur inconnu `~`"),
+    ('mentions > 3 then kick', "Action inconnue `kick`"),
+    ('content ~ /(/ then delete', "Expression régulière invalide"),
+    ('content contains "" then delete', "Texte vide"),
+    ('(mentions > 3 then delete', "`)` attendu"),
+    ('mentions > 3 then delete delete', "Élément en trop"),
+    ('mentions > 3 & links > 1 then delete', "Caractère inattendu"),
+])
+def test_parse_errors(source, message):
+    with pytest.raises(RuleSyntaxError, match=re.escape(message)):
+        Parser(source).parse()
+
+def test_syntax_errors_are_value_errors():
+    assert issubclass(RuleSyntaxError, ValueError)
+
+def test_tokenize_keeps_escaped_quotes_and_slashes():
+    assert tokenize('content contains "a \\"b\\""') == [('word', 'content'), ('word', 'contains'), ('string', '"a \\"b\\""')]
+    assert tokenize('content ~ /a\\/b/i')[-1] == ('regex', '/a\\/b/i')
+
+@pytest.mark.parametrize('pattern, literal', [
+    ('discord\\.gg/\\w+', 'discord.gg/'),
+    ('free (nitro|steam)', 'free '),
+    ('nitro|steam', ''),
+    ('colou?r', 'colo'),
+    ('ab{2,3}cdef', 'cdef'),
+    ('[a-z]+spam', 'spam'),
+    ('FREE', 'free'),
+    ('\\x69nvite', 'nvite'),
+    ('\\u0069nvite', 'nvite'),
+    ('[a\\]]c', 'c'),
+    ('[]x]yz', 'yz'),
+    ('(a)\\1bcd', ''),
+    ('abc[', ''),
+])
+def test_required_literal(pattern, literal):
+    assert required_literal(pattern) == literal
+
+# -- ÉVALUATION --
+
+RULES = [
+    (1, 'mentions', 'mentions >= 5 then delete'),
+    (2, 'nitro', 'content contains "nitro" and account_age < 7 then ban'),
+    (3, 'invite', 'content ~ /discord\\.gg\\/\\w+/ then delete'),
+    (4, 'not-short', 'not length > 3 then warn'),
+    (5, 'exact', 'links == 2 then warn'),
+    (6, 'either', 'mentions > 10 or content contains "raid" then mute 60'),
+]
+
+def triggered(ruleset, content, **facts):
+    return sorted(rule.name for rule in ruleset.evaluate(MessageFacts(content, **facts)))
+
+def with_hits(ruleset, facts):
+    facts.hits = ruleset.automaton.scan(facts.content)
+    return facts
+
+def test_ruleset_evaluates_indexed_rules():
+    ruleset = RuleSet(RULES)
+    assert len(ruleset) == 6
+    assert triggered(ruleset, "hello everyone", mentions=5) == ['mentions']
+    assert triggered(ruleset, "free nitro here", account_age=2) == ['nitro']
+    assert triggered(ruleset, "free nitro here", account_age=30) == []
+    assert triggered(ruleset, "join discord.gg/abc now") == ['invite']
+    assert triggered(ruleset, "hey") == ['not-short']
+    assert triggered(ruleset, "two links", links=2) == ['exact']
+    assert triggered(ruleset, "raid time") == ['either']
+    assert triggered(ruleset, "plenty of pings", mentions=11) == ['either', 'mentions']
+
+def test_candidates_skip_rules_whose_anchor_is_not_met():
+    ruleset = RuleSet(RULES)
+    facts = with_hits(ruleset, MessageFacts("a quiet message"))
+    candidates = {ruleset.rules[index].name for index in ruleset.candidates(facts)}
+    assert candidates == {'not-short'}
+
+def test_ruleset_matches_brute_force():
+    ruleset = RuleSet(RULES)
+    for content in ("hey", "free nitro raid", "discord.gg/x", "nothing to see here"):
+        for mentions in (0, 5, 11):
+            for links in (0, 2):
+                facts = MessageFacts(content, mentions=mentions, links=links, account_age=1)
+                expected = {rule.name for rule in ruleset.rules if rule.predicate(with_hits(ruleset, facts))}
+                assert set(triggered(ruleset, content, mentions=mentions, links=links, account_age=1)) == expected
+
+@pytest.mark.parametrize('source, content', [
+    ('content ~ /\\x69nvite/ then delete', "invite"),
+    ('content ~ /[a\\]]c/ then delete', "ac"),
+    ('content ~ /[a\\]]c/ then delete', "]c"),
+])
+def test_escaped_patterns_still_fire(source, content):
+    assert triggered(RuleSet([(1, 'escape', source)]), content) == ['escape']
+
+def test_aho_corasick_finds_overlapping_patterns():
+    automaton = AhoCorasick(['he', 'she', 'his', 'hers'])
+    assert sorted(automaton.finditer('ushers')) == [(3, 0), (3, 1), (5, 3)]
+    assert automaton.scan('ahishers') == {0, 1, 2, 3}
+    assert automaton.scan('xyz') == set()
@@ -0,0 +1,121 @@
+import asyncio
+import pytest
+from core.blocklist import Blocklist, CompiledFilter, normalize_term, parse_import
+from core.database import Database
+
+# -- TERMES --
+
+@pytest.mark.parametrize('kind, raw, term', [
+    ('word', '  Crétin ', 'cretin'),
+    ('domain', 'https://www.Exemple.com/page?x=1', 'exemple.com'),
+    ('domain', 'evil.example.org', 'evil.example.org'),
+    ('invite', 'https://discord.gg/AbC12', 'abc12'),
+    ('invite', 'discord.com/invite/xyz', 'xyz'),
+])
+def test_normalize_term(kind, raw, term):
+    assert normalize_term(kind, raw) == term
+
+def test_parse_import_accepts_comments_and_hosts_files():
+    text = "# liste\n0.0.0.0 ads.example.com\n127.0.0.1 tracker.net # commentaire\n\nplain.org\n"
+    assert parse_import('domain', text) == {'ads.example.com', 'tracker.net', 'plain.org'}
+    assert parse_import('word', "gros mot\n# rien\nautre") == {'gros mot', 'autre'}
+
+# -- LIMITES --
+
+@pytest.mark.parametrize('content, expected', [
+    ("quel con celui-là", ('word', 'con')),
+    ("con", ('word', 'con')),
+    ("(con)", ('word', 'con')),
+    ("un bon conseil", None),
+    ("deconne pas", None),
+    ("lacon", None),
+])
+def test_word_boundaries(content, expected):
+    assert CompiledFilter({('word', 'con')}).match(content) == expected
+
+@pytest.mark.parametrize('content, expected', [
+    ("va sur exemple.com", ('domain', 'exemple.com')),
+    ("https://exemple.com/page", ('domain', 'exemple.com')),
+    ("sous.exemple.com est pareil", ('domain', 'exemple.com')),
+    ("fin de phrase exemple.com.", ('domain', 'exemple.com')),
+    ("pasexemple.com", None),
+    ("mon-exemple.com", None),
+    ("exemple.com.evil.net", None),
+    ("exemple.community", None),
+])
+def test_domain_boundaries(content, expected):
+    assert CompiledFilter({('domain', 'exemple.com')}).match(content) == expected
+
+@pytest.mark.parametrize('content, expected', [
+    ("rejoins discord.gg/abc12", ('invite', 'abc12')),
+    ("https://discord.com/invite/abc12 !", ('invite', 'abc12')),
+    ("discordapp.com/invite/abc12", ('invite', 'abc12')),
+    ("discord.gg/abc123", None),
+    ("discord.gg/abc12-x", None),
+])
+def test_invite_boundaries(content, expected):
+    assert CompiledFilter({('invite', 'abc12')}).match(content) == expected
+
+def test_first_match_wins_across_kinds():
+    compiled = CompiledFilter({('word', 'spam'), ('domain', 'evil.com')})
+    assert compiled.match("evil.com puis spam") == ('domain', 'evil.com')
+    assert [entry[1:] for entry in compiled.matches("spam evil.com")] == [('word', 'spam'), ('domain', 'evil.com')]
+
+# -- MISES À JOUR INCRÉMENTALES --
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / 'test.db'))
+    yield database
+    database.close()
+
+def test_edits_apply_immediately_without_full_recompile(db):
+    async def run():
+        blocklist = Blocklist(db, delta_max=4)
+        await blocklist.add(1, 'word', ['alpha', 'beta'] + [f"mot{i}" for i in range(6)])
+        await blocklist.compact(1)
+        base = blocklist.filters[1].base
+
+        await blocklist.add(1, 'word', ['gamma'])
+        assert blocklist.match(1, "un gamma") == ('word', 'gamma')
+        await blocklist.remove(1, 'word', 'alpha')
+        assert blocklist.match(1, "alpha") is None
+        assert blocklist.match(1, "beta") == ('word', 'beta')
+        assert blocklist.filters[1].base is base and not blocklist.compacting
+
+        await blocklist.add(1, 'word', ['alpha'])
+        assert blocklist.match(1, "alpha") == ('word', 'alpha')
+        blocklist.close()
+
+    asyncio.run(run())
+
+def test_large_edits_trigger_a_background_recompile(db):
+    async def run():
+        blocklist = Blocklist(db, delta_max=4)
+        await blocklist.add(1, 'word', [f"mot{i}" for i in range(10)])
+        await blocklist.compact(1)
+        compiled = blocklist.filters[1]
+        assert compiled.base_terms == frozenset(blocklist.terms[1])
+        assert not compiled.added and not compiled.removed
+        assert blocklist.match(1, "mot7") == ('word', 'mot7')
+
+        await blocklist.clear(1, 'word')
+        assert 1 not in blocklist.filters
+        assert blocklist.match(1, "mot7") is None
+        blocklist.close()
+
+    asyncio.run(run())
+
+def test_terms_are_reloaded_from_the_database(db):
+    async def run():
+        blocklist = Blocklist(db)
+        await blocklist.add(1, 'domain', ['https://evil.com/x'])
+        blocklist.close()
+
+        reloaded = Blocklist(db)
+        await reloaded.start()
+        assert reloaded.counts(1) == {'word': 0, 'domain': 1, 'invite': 0}
+        assert reloaded.match(1, "va sur evil.com") == ('domain', 'evil.com')
+        reloaded.close()
+
+    asyncio.run(run())
@@ -0,0 +1,118 @@
+import json
+import math
+import random
+import pytest
+from core.casino import DEFAULT_PAYOUTS, PayoutSpec
+
+def enumerate_moments(payouts):
+    """Espérance et variance en énumérant chaque montant possible"""
+    mean = second = 0.0
+    for payout in payouts:
+        amounts = range(payout['min'], payout['max'] + 1)
+        for amount in amounts:
+            weight = payout['probability'] / len(amounts)
+            mean += weight * amount
+            second += weight * amount ** 2
+    return mean, second - mean ** 2
+
+SPECS = [
+    DEFAULT_PAYOUTS,
+    [{'name': 'jackpot', 'probability': 0.01, 'min': 5000, 'max': 5000},
+     {'name': 'rien', 'probability': 0.99, 'min': -60, 'max': -40}],
+    [{'name': 'pile', 'probability': 0.5, 'min': 1, 'max': 1},
+     {'name': 'face', 'probability': 0.5, 'min': -1, 'max': -1}],
+]
+
+# -- MOMENTS --
+
+@pytest.mark.parametrize('payouts', SPECS)
+def test_moments_match_closed_form(payouts):
+    spec = PayoutSpec(payouts)
+    mean, variance = enumerate_moments(payouts)
+    assert spec.expected_value() == pytest.approx(mean)
+    assert spec.variance() == pytest.approx(variance)
+
+def test_default_moments():
+    spec = PayoutSpec(DEFAULT_PAYOUTS)
+    # 0.4 * 125 + 0.3 * -30 + 0.3 * -100
+    assert spec.expected_value() == pytest.approx(11.0)
+    assert spec.variance() == pytest.approx(enumerate_moments(DEFAULT_PAYOUTS)[1])
+    assert spec.variance() == pytest.approx(10456, abs=1)
+
+def test_simulation_agrees_with_theory():
+    spec = PayoutSpec(DEFAULT_PAYOUTS)
+    users, rounds = 500, 400
+    result = spec.simulate(users, rounds, seed=1, max_cells=50000)
+
+    standard_error = math.sqrt(spec.variance() / (users * rounds))
+    assert abs(result['mean'] - spec.expected_value()) < 5 * standard_error
+    assert result['variance'] == pytest.approx(spec.variance(), rel=0.02)
+    assert result['balance_mean'] == pytest.approx(1000 + rounds * result['mean'])
+
+def test_simulation_is_reproducible_and_chunking_independent():
+    spec = PayoutSpec(DEFAULT_PAYOUTS)
+    assert spec.simulate(50, 100, seed=3) == spec.simulate(50, 100, seed=3)
+    chunked = spec.simulate(50, 100, seed=3, max_cells=50 * 7)
+    assert chunked['users'] == 50 and chunked['rounds'] == 100
+
+def test_draw_stays_within_outcome_range():
+    spec = PayoutSpec(DEFAULT_PAYOUTS)
+    rng = random.Random(7)
+    seen = set()
+    for _ in range(2000):
+        payout, amount = spec.draw(rng)
+        assert payout['min'] <= amount <= payout['max']
+        seen.add(payout['name'])
+    assert seen == {'win', 'small_loss', 'big_loss'}
+
+# -- VALIDATION --
+
+def test_missing_emoji_and_color_default_by_sign():
+    spec = PayoutSpec([
+        {'name': 'gain', 'probability': 0.5, 'min': 1, 'max': 10},
+        {'name': 'perte', 'probability': 0.5, 'min': -10, 'max': -1},
+    ])
+    assert (spec.payouts[0]['emoji'], spec.payouts[0]['color']) == ('🎉', 0x00ff00)
+    assert (spec.payouts[1]['emoji'], spec.payouts[1]['color']) == ('💸', 0xff0000)
+
+@pytest.mark.parametrize('payouts', [
+    [],
+    ['win'],
+    [{'probability': 1, 'min': 1, 'max': 2}],
+    [{'name': '', 'probability': 1, 'min': 1, 'max': 2}],
+    [{'name': 'x', 'min': 1, 'max': 2}],
+    [{'name': 'x', 'probability': 1, 'min': 1}],
+    [{'name': 'x', 'probability': '1', 'min': 1, 'max': 2}],
+    [{'name': 'x', 'probability': 1, 'min': 1.5, 'max': 2}],
+    [{'name': 'x', 'probability': 1, 'min': True, 'max': 2}],
+    [{'name': 'x', 'probability': 1, 'min': 3, 'max': 2}],
+    [{'name': 'x', 'probability': -0.5, 'min': 1, 'max': 2},
+     {'name': 'y', 'probability': 1.5, 'min': 1, 'max': 2}],
+    [{'name': 'x', 'probability': 0.5, 'min': 1, 'max': 2}],
+    [{'name': 'x', 'probability': 1, 'min': 1, 'max': 2, 'emoji': 3}],
+    [{'name': 'x', 'probability': 1, 'min': 1, 'max': 2, 'color': '#fff'}],
+])
+def test_invalid_specs_are_rejected(payouts):
+    with pytest.raises(ValueError):
+        PayoutSpec(payouts)
+
+def test_load_from_json(tmp_path):
+    path = tmp_path / 'casino.json'
+    path.write_text(json.dumps({'payouts': DEFAULT_PAYOUTS}), encoding='utf-8')
+    assert PayoutSpec.load(path).payouts == DEFAULT_PAYOUTS
+
+@pytest.mark.parametrize('content', [
+    '42',
+    '"win"',
+    'null',
+    json.dumps(DEFAULT_PAYOUTS),
+    json.dumps({'outcomes': DEFAULT_PAYOUTS}),
+    json.dumps({'payouts': 3}),
+    json.dumps({'payouts': {'win': 1}}),
+    '{"payouts": [',
+])
+def test_load_rejects_bad_shapes_with_value_error(tmp_path, content):
+    path = tmp_path / 'casino.json'
+    path.write_text(content, encoding='utf-8')
+    with pytest.raises(ValueError):
+        PayoutSpec.load(path)
@@ -0,0 +1,116 @@
+import random
+import pytest
+from core.econstats import EconomyStats, QuantileSketch
+
+def exact_quantile(values, q):
+    return sorted(values)[int(q * (len(values) - 1))]
+
+def exact_gini(values):
+    values = sorted(values)
+    n, total = len(values), sum(values)
+    return sum((2 * i - n - 1) * value for i, value in enumerate(values, 1)) / (n * total)
+
+@pytest.fixture
+def balances():
+    rng = random.Random(42)
+    return [int(rng.lognormvariate(7, 2)) + 1 for _ in range(20000)]
+
+# -- ESQUISSE --
+
+@pytest.mark.parametrize('accuracy', [0.01, 0.05])
+def test_quantiles_within_relative_accuracy(balances, accuracy):
+    sketch = QuantileSketch(accuracy)
+    for balance in balances:
+        sketch.add(balance)
+
+    for q in (0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1):
+        exact = exact_quantile(balances, q)
+        assert abs(sketch.quantile(q) - exact) <= accuracy * exact + 1e-9
+
+def test_negative_and_zero_values():
+    values = [-5000, -200, -3, 0, 0, 0, 7, 150, 9000]
+    sketch = QuantileSketch(0.01)
+    for value in values:
+        sketch.add(value)
+
+    assert sketch.quantile(0.5) == 0
+    for q in (0, 0.125, 0.875, 1):
+        exact = exact_quantile(values, q)
+        assert abs(sketch.quantile(q) - exact) <= 0.01 * abs(exact)
+    assert sketch.total == sum(values)
+
+def test_remove_restores_previous_state(balances):
+    sketch = QuantileSketch()
+    for balance in balances[:1000]:
+        sketch.add(balance)
+    reference = (dict((k, list(v)) for k, v in sketch.positive.items()), sketch.count, sketch.total)
+
+    for balance in balances[1000:1100]:
+        sketch.add(balance)
+    for balance in balances[1000:1100]:
+        assert sketch.remove(balance)
+
+    assert (sketch.positive, sketch.count, sketch.total) == reference
+
+def test_remove_missing_value_is_rejected():
+    sketch = QuantileSketch()
+    sketch.add(100)
+
+    assert not sketch.remove(100000)
+    assert not sketch.remove(-100)
+    assert not sketch.remove(0)
+    assert sketch.count == 1 and sketch.total == 100 and sketch.zero == 0
+
+    assert sketch.remove(100)
+    assert not sketch.remove(100)
+    assert sketch.count == 0 and not sketch.positive
+    assert sketch.quantile(0.5) is None
+
+def test_merge_equals_single_sketch(balances):
+    whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for i, balance in enumerate(balances):
+        whole.add(balance)
+        (left if i % 2 else right).add(balance)
+    left.merge(right)
+
+    assert left.count == whole.count and left.total == whole.total
+    for q in (0.1, 0.5, 0.9, 0.99):
+        assert left.quantile(q) == whole.quantile(q)
+
+# -- AGRÉGATS --
+
+def test_gini_and_top_share(balances):
+    stats = EconomyStats()
+    stats.build(balances)
+
+    assert stats.accounts == len(balances) and stats.total == sum(balances)
+    assert stats.gini() == pytest.approx(exact_gini(balances), abs=0.01)
+
+    top = sorted(balances, reverse=True)[:len(balances) // 100]
+    assert stats.top_share(0.01) == pytest.approx(sum(top) / sum(balances), rel=0.02)
+
+def test_gini_extremes():
+    stats = EconomyStats()
+    stats.build([100] * 50)
+    assert stats.gini() == pytest.approx(0, abs=1e-9)
+    assert stats.top_share(0.1) == pytest.approx(0.1)
+
+    stats.build([0] * 99 + [1000])
+    assert stats.gini() == pytest.approx(0.99)
+    assert stats.top_share(0.01) == pytest.approx(1)
+
+    stats.build([0, 0])
+    assert stats.gini() is None and stats.top_share() is None
+
+def test_update_counts_drift():
+    stats = EconomyStats()
+    stats.build([100, 200])
+
+    stats.update(100, 150)
+    assert stats.drift == 0 and stats.total == 350
+
+    stats.update(5000, 10)  # Ancien solde modifié hors de la banque
+    assert stats.drift == 1 and stats.accounts == 3
+
+    stats.build([150, 200])
+    assert stats.drift == 0 and stats.accounts == 2
@@ -0,0 +1,27 @@
+import pytest
+from core.normalize import fold, normalize
+
+@pytest.mark.parametrize('text, expected', [
+    ("Bonjour   À   TOUS", "bonjour a tous"),
+    ("  Hello\tWorld\n ", "hello world"),
+    ("élève ÇA où", "eleve ca ou"),
+    ("ѕрам", "spam"),  # cyrillique
+    ("ΑΒΟ", "abo"),  # grec en capitales
+    ("ꜱᴘᴀᴍ", "spam"),  # petites capitales
+    ("ｆｒｅｅ ｎｉｔｒｏ", "free nitro"),  # pleine chasse
+    ("𝐟𝐫𝐞𝐞", "free"),  # lettres mathématiques
+    ("ⓢⓟⓐⓜ", "spam"),  # lettres cerclées
+    ("s​p‍a⁠m", "spam"),  # caractères de largeur nulle
+    ("s̷̢p̶a̵m̴", "spam"),  # zalgo
+    ("Straße", "strasse"),
+])
+def test_normalize(text, expected):
+    assert normalize(text) == expected
+
+def test_ascii_path_matches_full_normalization():
+    for text in ("Hello  World", "FREE nitro\t!", "  a b  c "):
+        assert normalize(text) == fold(text)
+
+def test_normalize_is_idempotent():
+    for text in ("Ｗéｉｒｄ  ᴛᴇxᴛ", "ѕрам​", "déjà vu"):
+        assert normalize(normalize(text)) == normalize(text)
@@ -0,0 +1,73 @@
+from core.raid import AGE_BINS, JoinRateMonitor, age_bin, bin_upper_age
+
+OLD_ACCOUNT = 400  # Jours
+YOUNG_ACCOUNT = 0.5
+
+def make_monitor():
+    return JoinRateMonitor(bucket_seconds=60, short_half_life=1800, warmup_buckets=10)
+
+def warm_up(monitor, guild_id=1, buckets=30):
+    """Une arrivée de compte ancien par intervalle"""
+    for bucket in range(buckets):
+        assert monitor.observe(guild_id, OLD_ACCOUNT, now=bucket * 60 + 1) is None
+    return buckets * 60
+
+def test_age_bins_are_powers_of_two():
+    assert age_bin(0.2) == 0
+    assert age_bin(1) == 1
+    assert age_bin(3) == 2
+    assert age_bin(10 ** 6) == AGE_BINS - 1
+    assert all(age_bin(bin_upper_age(index) - 0.5) <= index for index in range(1, AGE_BINS - 1))
+
+def test_no_signal_during_warmup_even_for_a_burst():
+    monitor = make_monitor()
+    signals = [monitor.observe(1, YOUNG_ACCOUNT, now=120 + i * 0.1) for i in range(50)]
+    assert signals == [None] * 50
+    assert monitor.get(1).buckets_seen < monitor.warmup_buckets
+    assert monitor.snapshot(1, now=130)['warm'] is False
+
+def test_steady_baseline_raises_no_signal():
+    monitor = make_monitor()
+    end = warm_up(monitor)
+    assert monitor.get(1).buckets_seen >= monitor.warmup_buckets
+    assert monitor.observe(1, OLD_ACCOUNT, now=end + 1) is None
+
+def test_join_burst_after_warmup_raises_a_rate_signal():
+    monitor = make_monitor()
+    end = warm_up(monitor)
+    signals = [monitor.observe(1, OLD_ACCOUNT, now=end + 5 + i * 0.1) for i in range(10)]
+    assert signals[0] is None
+    kind, score = next(signal for signal in signals if signal is not None)
+    assert kind == 'rate' and score >= monitor.rate_threshold
+
+def test_young_accounts_at_normal_rate_raise_an_age_signal():
+    monitor = make_monitor()
+    end = warm_up(monitor)
+    signals = [monitor.observe(1, YOUNG_ACCOUNT, now=end + i * 60 + 1) for i in range(6)]
+    assert signals[:monitor.min_joins - 1] == [None] * (monitor.min_joins - 1)
+    kind, score = next(signal for signal in signals if signal is not None)
+    assert kind == 'age' and score >= monitor.age_threshold
+
+def test_suspect_age_follows_the_baseline_low_quantile():
+    monitor = make_monitor()
+    warm_up(monitor)
+    baseline = monitor.get(1)
+    # Aucun compte de moins de 16 jours dans la référence : le quantile bas va jusqu'à 16 jours
+    assert monitor.suspect_age(baseline, 2) == 16
+    assert monitor.suspect_age(baseline, 20) == 20
+    assert monitor.suspect_age(baseline, 2) <= monitor.max_suspect_age
+
+def test_guilds_are_independent():
+    monitor = make_monitor()
+    end = warm_up(monitor, guild_id=1)
+    assert monitor.observe(2, YOUNG_ACCOUNT, now=end) is None
+    assert monitor.get(2).buckets_seen == 0
+    assert len(monitor) == 2
+
+def test_long_silence_is_folded_in_constant_time():
+    monitor = make_monitor()
+    end = warm_up(monitor)
+    monitor.observe(1, OLD_ACCOUNT, now=end + 10 ** 7)
+    baseline = monitor.get(1)
+    assert baseline.rate[0] < 0.01
+    assert baseline.buckets_seen > 10 ** 5
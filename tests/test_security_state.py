@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+from core.security_state import GuildStateStore
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+def add_join(state, user_id, join_time):
+    state.recent_joins.append({'user_id': user_id, 'join_time': join_time, 'account_age': 1.0})
+
+def test_guild_with_only_old_joins_is_evicted():
+    store = GuildStateStore(10, 50, idle_timeout=60, join_window=1800)
+    state = store.get(1)
+    add_join(state, 10, NOW - timedelta(seconds=3600))
+    add_join(state, 11, NOW - timedelta(seconds=1900))
+
+    store.cleanup(now=state.last_activity + 61, current_time=NOW)
+
+    assert not state.recent_joins
+    assert store.peek(1) is None
+
+def test_recent_joins_keep_the_guild():
+    store = GuildStateStore(10, 50, idle_timeout=60, join_window=1800)
+    state = store.get(1)
+    add_join(state, 10, NOW - timedelta(seconds=3600))
+    add_join(state, 11, NOW - timedelta(seconds=60))
+
+    store.cleanup(now=state.last_activity + 61, current_time=NOW)
+
+    assert store.peek(1) is state
+    assert [join['user_id'] for join in state.recent_joins] == [11]
+
+    store.cleanup(now=state.last_activity + 61, current_time=NOW + timedelta(seconds=1800))
+    assert store.peek(1) is None
+
+def test_active_or_locked_guilds_are_kept():
+    store = GuildStateStore(10, 50, idle_timeout=60)
+    active = store.get(1)
+    locked = store.get(2)
+    locked.raid_lockdown = True
+    muted = store.get(3)
+    muted.muted_users[10] = {'until': NOW, 'reason': "spam"}
+
+    store.cleanup(now=active.last_activity + 30, current_time=NOW)
+    assert len(store) == 3
+
+    store.cleanup(now=active.last_activity + 61, current_time=NOW)
+    assert store.peek(1) is None
+    assert store.peek(2) is locked and store.peek(3) is muted
@@ -0,0 +1,71 @@
+import asyncio
+from core.similarity import Fingerprinter, NearDuplicateDetector, SimilarityIndex, similarity, simhash
+
+SPAM = "Free nitro for everyone, claim it now on the link below before it expires"
+
+def test_simhash_is_deterministic_and_whitespace_insensitive():
+    assert simhash(SPAM) == simhash(SPAM)
+    assert simhash(SPAM) == simhash(SPAM.replace(' ', '   '))
+
+def test_near_copies_are_similar_and_unrelated_texts_are_not():
+    assert similarity(simhash(SPAM), simhash(SPAM + "!")) >= 0.9
+    assert similarity(simhash(SPAM), simhash("Quelqu'un a vu le match de foot hier soir ?")) < 0.8
+
+def test_make_bands_cover_all_bits():
+    bands = SimilarityIndex._make_bands(7)
+    assert len(bands) == 7
+    assert sum(mask.bit_length() for _, mask in bands) == 64
+
+def test_index_counts_near_copies_per_author_and_expires():
+    index = SimilarityIndex(max_distance=6, max_entries=10)
+    fingerprint = simhash(SPAM)
+    assert index.add(0, fingerprint, 1) == {1: 1}
+    assert index.add(1, fingerprint ^ 0b101, 2) == {2: 1, 1: 1}
+    assert index.add(2, fingerprint ^ (1 << 63) ^ 0xff, 3) == {3: 1}
+
+    index.expire(1)
+    assert len(index.entries) == 1
+    assert index.add(3, fingerprint, 1) == {1: 1}
+
+def test_index_is_bounded():
+    index = SimilarityIndex(max_distance=6, max_entries=3)
+    for now in range(10):
+        index.add(now, simhash(f"{SPAM} {now}"), now)
+    assert len(index.entries) == 3
+    assert len(index.fingerprints) == 3
+
+def test_detector_counts_user_copies_and_takes_the_cluster():
+    detector = NearDuplicateDetector(0.9, 10, 20, 3, 30, 100)
+    counts = [
+        detector.add(1, 7, simhash(text), now=now, ref=(5, now))[0]
+        for now, text in enumerate([SPAM, SPAM + "!", SPAM + " :)"])
+    ]
+    assert counts == [1, 2, 3]
+
+    refs = detector.take_messages(1, 7, simhash(SPAM + " :)"))
+    assert sorted(refs) == [(5, 0), (5, 1), (5, 2)]
+    assert detector.take_messages(1, 7, simhash(SPAM)) == []
+
+def test_detector_flags_each_guild_author_once_per_window():
+    detector = NearDuplicateDetector(0.9, 10, 20, 3, 30, 100)
+    fingerprint = simhash(SPAM)
+    assert detector.add(1, 1, fingerprint, now=0)[1] == []
+    assert detector.add(1, 2, fingerprint, now=1)[1] == []
+    assert sorted(detector.add(1, 3, fingerprint, now=2)[1]) == [1, 2, 3]
+    assert detector.add(1, 3, fingerprint, now=3)[1] == []
+    assert detector.add(1, 4, fingerprint, now=4)[1] == [4]
+
+def test_detector_cleanup_drops_expired_indexes():
+    detector = NearDuplicateDetector(0.9, 10, 20, 3, 30, 100)
+    detector.add(1, 1, simhash(SPAM), now=0)
+    detector.cleanup(now=100)
+    assert not detector.users and not detector.guilds and not detector.reported
+
+def test_fingerprinter_batches_match_simhash():
+    async def run():
+        fingerprinter = Fingerprinter(offload_threshold=64)
+        texts = [f"{SPAM} {i}" for i in range(5)]
+        return texts, await asyncio.gather(*(fingerprinter.fingerprint(text) for text in texts))
+
+    texts, fingerprints = asyncio.run(run())
+    assert fingerprints == [simhash(text) for text in texts]
@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from core import warning_scores
+from core.database import Database
+from core.warning_scores import WarningScoreStore
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS security_warnings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guild_id INTEGER,
+        user_id INTEGER NOT NULL,
+        reason TEXT NOT NULL,
+        moderator_id INTEGER,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        action_type TEXT DEFAULT 'warn'
+    )
+'''
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / 'test.db'))
+    database.setup(SCHEMA)
+    yield database
+    database.close()
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(warning_scores.time, 'time', lambda: now[0])
+    return now
+
+def test_count_rounds_to_nearest_warning():
+    assert WarningScoreStore.count(0.49) == 0
+    assert WarningScoreStore.count(0.5) == 1
+    assert WarningScoreStore.count(2.4) == 2
+
+def test_scores_add_up_and_halve_every_half_life(db, clock):
+    store = WarningScoreStore(db, half_life=100)
+
+    async def run():
+        assert await store.add(1, 10, "spam") == pytest.approx(1)
+        assert await store.add(1, 10, "spam") == pytest.approx(2)
+        clock[0] += 100
+        assert await store.get(1, 10) == pytest.approx(1)
+        clock[0] += 100
+        return await store.add(1, 10, "spam")
+
+    assert asyncio.run(run()) == pytest.approx(1.5)
+
+def test_scores_are_per_guild(db, clock):
+    store = WarningScoreStore(db, half_life=100)
+
+    async def run():
+        await store.add(1, 10, "spam")
+        return await store.get(2, 10)
+
+    assert asyncio.run(run()) == 0
+
+def test_scores_survive_a_restart(db, clock):
+    async def run():
+        await WarningScoreStore(db, half_life=100).add(1, 10, "spam")
+        await WarningScoreStore(db, half_life=100).add(1, 10, "spam")
+        clock[0] += 100
+        return await WarningScoreStore(db, half_life=100).get(1, 10)
+
+    assert asyncio.run(run()) == pytest.approx(1)
+
+def test_cache_is_bounded_and_reloads_evicted_members(db, clock):
+    store = WarningScoreStore(db, half_life=100, max_entries=2)
+
+    async def run():
+        for user_id in (10, 11, 12):
+            await store.add(1, user_id, "spam")
+        assert len(store) == 2
+        assert (1, 10) not in store.entries
+        return await store.get(1, 10)
+
+    assert asyncio.run(run()) == pytest.approx(1)
+
+def test_clear_only_affects_one_guild(db, clock):
+    store = WarningScoreStore(db, half_life=100)
+
+    async def run():
+        await store.add(1, 10, "spam")
+        await store.add(2, 10, "spam")
+        assert store.active(1) == 1
+        removed = await store.clear(1, 10)
+        reloaded = WarningScoreStore(db, half_life=100)
+        return removed, await store.get(1, 10), store.active(1), await store.get(2, 10), await reloaded.get(2, 10)
+
+    assert asyncio.run(run()) == (1, 0, 0, pytest.approx(1), pytest.approx(1))
+
+def test_clear_includes_warnings_without_guild(db, clock):
+    store = WarningScoreStore(db, half_life=100)
+    db.setup('''
+        INSERT INTO security_warnings (guild_id, user_id, reason, action_type, timestamp)
+        VALUES (NULL, 10, 'ancien', 'spam_warning', datetime(1700000000, 'unixepoch'))
+    ''')
+
+    async def run():
+        assert await store.get(1, 10) == pytest.approx(1)
+        removed = await store.clear(1, 10)
+        return removed, await WarningScoreStore(db, half_life=100).get(1, 10)
+
+    assert asyncio.run(run()) == (1, 0)